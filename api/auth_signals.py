@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_tokens, invalidate_users
+from callManager.models import Administrator, Company, Manager, Owner, Steward, UserProfile
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    invalidate_users([instance.id])
+
+
+@receiver(post_save, sender=Administrator)
+@receiver(post_delete, sender=Administrator)
+@receiver(post_save, sender=Manager)
+@receiver(post_delete, sender=Manager)
+@receiver(post_save, sender=Owner)
+@receiver(post_delete, sender=Owner)
+@receiver(post_save, sender=Steward)
+@receiver(post_delete, sender=Steward)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def role_changed(sender, instance, **kwargs):
+    invalidate_users([instance.user_id])
+
+
+@receiver(post_save, sender=Company)
+def company_saved(sender, instance, **kwargs):
+    user_ids = set(Manager.objects.filter(company=instance).values_list('user_id', flat=True))
+    user_ids |= set(Steward.objects.filter(company=instance).values_list('user_id', flat=True))
+    user_ids |= set(Owner.objects.filter(company=instance).values_list('user_id', flat=True))
+    if user_ids:
+        invalidate_users(user_ids)
@@ -0,0 +1,69 @@
+import pickle
+
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+# Principals are cached in the shared Django cache (Redis, see CACHES) for
+# SHARED_CACHE_TTL seconds. There is deliberately no per-process copy: invalidation
+# deletes the shared entry, so a revoked token or role stops working on every worker
+# at once.
+SHARED_CACHE_TTL = 300
+
+# everything the views probe on request.user, fetched with the token in one query
+PRINCIPAL_RELATED = (
+    'user',
+    'user__administrator',
+    'user__manager__company',
+    'user__owner__company',
+    'user__steward__company',
+    'user__profile',
+)
+
+
+def principal_cache_key(token_key):
+    return f"auth_principal:{token_key}"
+
+
+def load_principal(token_key):
+    """Token -> user with role and company rows attached, or None"""
+    token = Token.objects.select_related(*PRINCIPAL_RELATED).filter(key=token_key).first()
+    return token.user if token else None
+
+
+def resolve_token(token_key):
+    """The user for a token key, from the shared cache or the database.
+
+    Every call returns a fresh copy, so a view changing request.user (or its manager,
+    company, ...) never touches another request's object.
+    """
+    data = cache.get(principal_cache_key(token_key))
+    if data is None:
+        user = load_principal(token_key)
+        if user is None:
+            return None
+        data = pickle.dumps(user)
+        cache.set(principal_cache_key(token_key), data, SHARED_CACHE_TTL)
+    return pickle.loads(data)
+
+
+def invalidate_tokens(token_keys):
+    cache.delete_many([principal_cache_key(key) for key in token_keys])
+
+
+def invalidate_users(user_ids):
+    invalidate_tokens(Token.objects.filter(user_id__in=user_ids).values_list('key', flat=True))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication backed by resolve_token, so a cache hit costs no queries"""
+
+    def authenticate_credentials(self, key):
+        user = resolve_token(key)
+        if user is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return (user, Token(key=key, user=user))
@@ -116,7 +116,7 @@ class LaborRequestTrackingSerializer(serializers.ModelSerializer):
     time_entry = serializers.SerializerMethodField()
 
     def get_time_entry(self, obj):
-        time_entry = obj.time_entries.first()
+        time_entry = obj.time_entry
         if time_entry:
             return TimeEntrySerializer(time_entry).data
         return None
@@ -136,7 +136,7 @@ class LaborRequestSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = LaborRequest
-        fields = '__all__'
+        exclude = ['event', 'company']  # denormalized copies of labor_requirement.call_time.event
         depth = 3
 
         def create(self, validated_data):
@@ -1,3 +1,185 @@
-from django.test import TestCase
+import uuid
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from callManager.models import (
+        CallTime,
+        ClockInToken,
+        Company,
+        Event,
+        LaborRequest,
+        LaborRequirement,
+        LaborType,
+        Manager,
+        Steward,
+        TemporaryScanner,
+        TimeEntry,
+        Worker,
+        )
+from callManager.utils import fill_status, station_session
+from callManager.utils.query_budget import assert_max_queries
+from callManager.view_files import notify
+
+EVENTS = 6
+CALL_TIMES = 3
+WORKERS = 8
+
+
+# QueryBudgetMiddleware raises QueryBudgetExceeded in strict mode, and the test client
+# re-raises it, so a view going over its @query_budget fails here. TransactionTestCase
+# keeps the savepoints of TestCase's wrapping transaction out of the counts, and runs
+# on_commit hooks as production does. WebSocket pushes are sent from a timer outside
+# the request; here they are held and flushed in tearDown instead.
+@override_settings(
+    QUERY_BUDGET_STRICT=True,
+    NOTIFICATION_PUSH_DELAY=3600,
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class QueryBudgetTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        station_session._sessions.clear()
+        now = timezone.now().replace(second=0, microsecond=0)
+        self.company = Company.objects.create(
+            name='Budget Co', phone_number='5555550100', email='budget@example.com', website='https://example.com')
+        self.manager_user = manager_user = User.objects.create_user(username='budget-manager')
+        Manager.objects.create(user=manager_user, company=self.company)
+        steward_user = User.objects.create_user(username='budget-steward')
+        steward = Steward.objects.create(user=steward_user, company=self.company)
+        self.manager_token = Token.objects.create(user=manager_user).key
+        self.steward_token = Token.objects.create(user=steward_user).key
+
+        labor_type = LaborType.objects.create(company=self.company, name='Stagehand')
+        self.workers = [
+            Worker.objects.create(company=self.company, name=f"Worker {i}", phone_number=f"555{i:07d}")
+            for i in range(WORKERS)]
+        self.events = []
+        self.labor_requests = []
+        for e in range(EVENTS):
+            event = Event.objects.create(
+                event_name=f"Event {e}", event_description='', company=self.company,
+                start_date=now.date() + timedelta(days=e), end_date=now.date() + timedelta(days=e), steward=steward)
+            self.events.append(event)
+            for c in range(CALL_TIMES):
+                call_time = CallTime.objects.create(
+                    event=event, name=f"Call {c}", date=event.start_date, time=(now + timedelta(hours=c * 4)).time())
+                requirement = LaborRequirement.objects.create(call_time=call_time, labor_type=labor_type, needed_labor=WORKERS)
+                for worker in self.workers:
+                    self.labor_requests.append(LaborRequest.objects.create(
+                        worker=worker, labor_requirement=requirement, requested=True, sms_sent=True))
+        self.call_time = CallTime.objects.filter(event=self.events[0]).order_by('time').first()
+        self.flush_pushes()
+
+    def tearDown(self):
+        self.flush_pushes()
+
+    def flush_pushes(self):
+        for company_id in list(notify._pending_pushes):
+            notify.flush_push(company_id, close_connection=False)
+        fill_status.flush_fill_status(close_connection=False)
+
+    def client_for(self, token=None):
+        client = APIClient()
+        if token:
+            client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        return client
+
+    def test_list_events(self):
+        client = self.client_for(self.manager_token)
+        self.assertEqual(client.get('/events/list/').status_code, 200)
+        response = client.get('/events/list/', {'limit': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['has_more'])
+        response = client.get('/events/list/', {'limit': 3, 'cursor': response.data['next_cursor']})
+        self.assertEqual(response.status_code, 200)
+
+    def test_steward_events(self):
+        response = self.client_for(self.steward_token).get('/steward/events/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), EVENTS)
+
+    def test_copy_call_time(self):
+        client = self.client_for(self.manager_token)
+        data = {'name': 'Load Out', 'date': self.call_time.date.isoformat(), 'time': '23:00'}
+        self.assertEqual(client.post(f"/call-time/{self.call_time.slug}/copy/", data, format='json').status_code, 201)
+        days = [(self.call_time.date + timedelta(days=i)).isoformat() for i in range(1, 8)]
+        response = client.post(f"/call-time/{self.call_time.slug}/copy/", {**data, 'dates': days}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), len(days))
+
+    def test_bulk_confirm_requests(self):
+        ids = [labor_request.id for labor_request in self.labor_requests[:WORKERS * CALL_TIMES]]
+        response = self.client_for(self.manager_token).post(
+            '/confirm/bulk/', {'labor_requests': [str(request_id) for request_id in ids] + ['nope']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated_count'], len(ids))
+        self.assertEqual(response.data['errors'], [{'id': 'nope', 'error': 'Invalid id'}])
+        response = self.client_for(self.manager_token).post('/confirm/bulk/', {'labor_requests': ids[:2]}, format='json')
+        self.assertEqual(response.data['updated_count'], 0)
+        self.assertEqual(response.data['errors'], [{'id': request_id, 'error': 'Already confirmed'} for request_id in ids[:2]])
+
+    def test_workers_csv_export(self):
+        # the rows are queried while the body streams, after QueryBudgetMiddleware has
+        # returned, so the stream is counted here instead
+        LaborRequest.objects.update(confirmed=True, availability_response='yes')
+        self.client.force_login(self.manager_user)
+        response = self.client.get('/app/event-workers-report/', {
+            'event_ids': ','.join(str(event.id) for event in self.events), 'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        with assert_max_queries(5):
+            body = b''.join(response.streaming_content)
+        self.assertEqual(body.count(b'\n'), 1 + EVENTS * CALL_TIMES * WORKERS)
+
+    def station(self):
+        """A station on the first event with every worker confirmed on its first call time"""
+        LaborRequest.objects.filter(labor_requirement__call_time=self.call_time).update(
+            confirmed=True, availability_response='yes')
+        expires_at = timezone.now() + timedelta(hours=2)
+        scanner = TemporaryScanner.objects.create(
+            event=self.events[0], user=User.objects.create_user(username='budget-station'), expires_at=expires_at)
+        tokens = [
+            str(ClockInToken.objects.create(event=self.events[0], worker=worker, expires_at=expires_at).token)
+            for worker in self.workers]
+        return str(scanner.token), tokens
+
+    def test_station_clock(self):
+        token, worker_tokens = self.station()
+        client = self.client_for()
+        # the station loads its session when it is opened
+        self.assertEqual(client.get(f"/station/{token}/validate/").status_code, 200)
+        for worker_token in worker_tokens:
+            response = client.post(f"/station/{token}/clock/", {'worker_token': worker_token}, format='json')
+            self.assertEqual(response.status_code, 200, response.data)
+
+    # the scan after the change reloads the roster, which is over the steady state budget
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_station_drops_unconfirmed_worker(self):
+        token, worker_tokens = self.station()
+        client = self.client_for()
+        self.assertEqual(client.get(f"/station/{token}/validate/").status_code, 200)
+        labor_request = LaborRequest.objects.get(labor_requirement__call_time=self.call_time, worker=self.workers[0])
+        labor_request.confirmed = False
+        labor_request.save()
+        response = client.post(f"/station/{token}/clock/", {'worker_token': worker_tokens[0]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(TimeEntry.objects.filter(worker=self.workers[0]).exists())
+
+    def test_station_sync(self):
+        token, worker_tokens = self.station()
+        scanned_at = timezone.now().isoformat()
+        scans = [
+            {'scan_id': str(uuid.uuid4()), 'worker_token': worker_token, 'scanned_at': scanned_at}
+            for worker_token in worker_tokens]
+        client = self.client_for()
+        response = client.post('/station/sync/', {'station_token': token, 'scans': scans}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.data['results']], ['success'] * WORKERS)
+        # a resent batch replays the stored results
+        response = client.post('/station/sync/', {'station_token': token, 'scans': scans}, format='json')
+        self.assertTrue(all(result['duplicate'] for result in response.data['results']))
@@ -40,6 +40,7 @@ urlpatterns = [
     path('skills/', skills_list),
     path('event/<slug:slug>/', event_views.event_details),
     path('event/<slug:slug>/assign-steward/', event_views.assign_steward),
+    path('event/<slug:slug>/clone/', event_views.clone_event),
     path('event/<slug:slug>/send-messages/', send_event_messages),
     path('event/<slug:slug>/confirm/<event_token>/', confirm_requests),
     path('notifications/', notifications),
@@ -71,6 +72,7 @@ urlpatterns = [
     path('workers/', worker_views.list_workers),
     path('workers/import/', worker_views.import_workers),
     path('workers/import-contacts/', worker_views.import_contacts_json),
+    path('workers/import/<int:job_id>/', worker_views.import_job_status),
     path('workers/<slug:slug>/history/', worker_views.worker_history),
     path('call-times/<slug:slug>/add-labor/', call_times.add_labor_to_call),
     path('call-times/<slug:slug>/requests/', request_views.call_time_list),
@@ -89,6 +91,7 @@ urlpatterns = [
     path('clock-in/<uuid:token>/', time_tracking.worker_clock_in_out_api),
     path('clock-in-qr/<uuid:token>/', time_tracking.worker_qr_clock),
     path('event/<slug:slug>/generate-station/', event_views.generate_signin_station),
+    path('station/sync/', time_tracking.station_sync),
     path('station/<uuid:token>/validate/', time_tracking.validate_station),
     path('station/<uuid:token>/clock/', time_tracking.station_clock),
     path('contact/', contact_views.contact_form),
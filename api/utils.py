@@ -1,3 +1,7 @@
+import base64
+import binascii
+from datetime import datetime
+
 from django.conf import settings
 
 
@@ -19,3 +23,19 @@ def get_client_ip(request):
     else:
         ip = request.META.get('REMOTE_ADDR')
     return ip
+
+
+def encode_cursor(sent_at, pk):
+    """Opaque keyset cursor for a (datetime, id) position."""
+    raw = f"{sent_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        sent_at, pk = raw.split('|')
+        return datetime.fromisoformat(sent_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -3,7 +3,7 @@ from django.db.models import Q, Count
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
-from rest_framework.authentication import TokenAuthentication
+from api.authentication import CachedTokenAuthentication
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from api.serializers import TimeEntrySerializer, LaborRequestTrackingSerializer
@@ -30,12 +30,17 @@ from api.serializers import (
         )
 import json
 from callManager.views import generate_short_token, send_message
+from callManager.utils.bulk_requests import BULK_ACTIONS, apply_bulk_action
+from callManager.utils.cloning import clone_call_times
 from api.utils import frontend_url
 from callManager.view_files.notify import notify
+from callManager.utils.fill_status import fill_counts
+from callManager.utils.query_budget import query_budget
+from callManager.utils.time_rules import DEFAULT_ROUND_UP_TARGET, first_set, time_rules_for
 
 
 @api_view(['GET','POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def add_call_time(request, slug):
     user = request.user
@@ -45,15 +50,11 @@ def add_call_time(request, slug):
         company = user.steward.company
     else:
         return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
-    event = get_object_or_404(Event, slug=slug, company=company)
+    event = get_object_or_404(Event.objects.select_related('company', 'location_profile'), slug=slug, company=company)
     if hasattr(user, 'steward') and not hasattr(user, 'manager') and event.steward != user.steward:
         return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
     if request.method == "POST":
         request.data['event'] = event.id
-        from datetime import datetime
-        date_obj = datetime.strptime(request.data['date'], '%Y-%m-%d').date()
-        time_obj = datetime.strptime(request.data['time'], '%H:%M').time()
-        call_unixtime = timezone.datetime.combine(date_obj, time_obj)
         serializer = CallTimeSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save(event=event)
@@ -76,7 +77,7 @@ def add_call_time(request, slug):
         return Response({'status': 'error', 'message': 'Invalid request method'}, status=400)
 
 @api_view(['PATCH'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def edit_call_time(request, slug):
     user = request.user
@@ -88,20 +89,19 @@ def edit_call_time(request, slug):
         manager = company.managers.first()
     else:
         return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
-    call_time = get_object_or_404(CallTime, slug=slug, event__company=company)
+    call_time = get_object_or_404(CallTime.objects.select_related('event__company'), slug=slug, event__company=company)
     if hasattr(user, 'steward') and not hasattr(user, 'manager') and call_time.event.steward != user.steward:
         return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
-    original_time = call_time.call_unixtime
     serializer = CallTimeSerializer(call_time, data=request.data, partial=True)
 
     if serializer.is_valid():
-        updated_call_time = serializer.save()
-        updated_call_time.update_call_unixtime()
-        new_time = updated_call_time.call_unixtime
+        time_changed = any(
+            field in serializer.validated_data and serializer.validated_data[field] != getattr(call_time, field)
+            for field in ('date', 'time'))
+        # a single UPDATE; call_unixtime and original date/time are maintained by CallTime.save
+        updated_call_time = serializer.save(**({'time_has_changed': True} if time_changed else {}))
 
-        if original_time != new_time:
-            call_time.time_has_changed = True
-            call_time.save()
+        if time_changed:
             confirmed_requests = LaborRequest.objects.filter(
                 labor_requirement__call_time=call_time,
                 confirmed=True,
@@ -130,7 +130,7 @@ def edit_call_time(request, slug):
 
 
 @api_view(['DELETE'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def delete_call_time(request, slug):
     user = request.user
@@ -230,30 +230,15 @@ def call_time_tracking(request, slug):
             'selected_labor_type': labor_type_filter,
             'meal_penalty_trigger_time': meal_penalty_trigger_time_str,
             'meal_penalty_diff': meal_penalty_diff,
-            'round_up_target': company.round_up_target or 30,
+            'round_up_target': first_set(company.round_up_target, DEFAULT_ROUND_UP_TARGET),
             'company_name': company.name
         })
     elif request.method == 'POST':
         request_id = request.data.get('request_id')
         action = request.data.get('action')
         labor_request = get_object_or_404(LaborRequest, id=request_id, labor_requirement__call_time=call_time)
-        minimum_hours = labor_request.labor_requirement.minimum_hours or call_time.minimum_hours or call_time.event.location_profile.minimum_hours or company.minimum_hours
+        rules = time_rules_for(call_time)
         worker = labor_request.worker
-        def round_time(dt, target):
-            if target == 0:
-                # round to nearest hour
-                if dt.minute >= 30:
-                    dt = dt.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-                else:
-                    dt = dt.replace(minute=0, second=0, microsecond=0)
-            else:
-                # round to nearest target
-                rounded_min = round(dt.minute / target) * target
-                if rounded_min == 60:
-                    dt = dt.replace(hour=dt.hour + 1, minute=0, second=0, microsecond=0)
-                else:
-                    dt = dt.replace(minute=rounded_min, second=0, microsecond=0)
-            return dt
 
         if action in ['sign_in', 'sign_out', 'ncns', 'call_out', 'update_start_time', 'update_end_time', 'add_meal_break', 'update_meal_break', 'delete_meal_break']:
             time_entry, created = TimeEntry.objects.get_or_create(
@@ -263,22 +248,10 @@ def call_time_tracking(request, slug):
                 defaults={'start_time': datetime.combine(call_time.date, call_time.time)})
             was_ncns = worker.nocallnoshow > 0 and labor_request.availability_response == 'no'
             if action == 'sign_in' and not time_entry.start_time:
-                start_time = datetime.combine(call_time.date, call_time.time)
-                time_entry.start_time = round_time(start_time, company.round_up_target or 30)
+                time_entry.start_time = rules.round(rules.call_datetime)
                 time_entry.save()
             elif action == 'sign_out' and time_entry.start_time and not time_entry.end_time:
-                end_time = datetime.now()
-                if time_entry.start_time + timedelta(hours=minimum_hours) > end_time:
-                    end_time = time_entry.start_time + timedelta(hours=minimum_hours)
-                minutes = end_time.minute
-                round_up = call_time.event.location_profile.hour_round_up or company.hour_round_up or 0
-                if minutes > 30 + round_up:
-                    end_time = end_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-                elif minutes > round_up:
-                    end_time = end_time.replace(minute=30, second=0, microsecond=0)
-                else:
-                    end_time = end_time.replace(minute=0, second=0, microsecond=0)
-                time_entry.end_time = end_time
+                time_entry.end_time = rules.clock_out(datetime.now(), time_entry.start_time, labor_request.labor_requirement_id)
                 time_entry.save()
             elif action == 'ncns' and not was_ncns:
                 labor_request.confirmed = False
@@ -290,13 +263,13 @@ def call_time_tracking(request, slug):
             elif action == 'update_start_time':
                 new_time_str = request.data.get('new_time')
                 dt = datetime.fromisoformat(new_time_str)
-                rounded_dt = round_time(dt, company.round_up_target or 30)
+                rounded_dt = rules.round(dt)
                 time_entry.start_time = rounded_dt
                 time_entry.save()
             elif action == 'update_end_time':
                 new_time_str = request.data.get('new_time')
                 dt = datetime.fromisoformat(new_time_str)
-                rounded_dt = round_time(dt, company.round_up_target or 30)
+                rounded_dt = rules.round(dt)
                 time_entry.end_time = rounded_dt
                 time_entry.save()
             elif action == 'add_meal_break':
@@ -304,7 +277,7 @@ def call_time_tracking(request, slug):
                 break_time_str = request.data.get('break_time')
                 if break_time_str:
                     break_time = datetime.fromisoformat(break_time_str)
-                    break_time = round_time(break_time, company.round_up_target or 30)
+                    break_time = rules.round(break_time)
                 else:
                     break_time = datetime.now()
                 duration = timedelta(minutes=type_minutes)
@@ -319,7 +292,7 @@ def call_time_tracking(request, slug):
                 break_time_str = request.data.get('break_time')
                 duration_min = int(request.data.get('duration'))
                 break_time = datetime.fromisoformat(break_time_str)
-                break_time = round_time(break_time, company.round_up_target or 30)
+                break_time = rules.round(break_time)
                 meal_break.break_time = break_time
                 meal_break.duration = timedelta(minutes=duration_min)
                 meal_break.break_type = 'paid' if duration_min == 30 else 'unpaid'
@@ -352,8 +325,9 @@ def call_time_confirmations(request, slug):
         'cant_do_it_requests': LaborRequestSerializer(cant_do_it_requests, many=True).data,
     })
 
+@query_budget(25)
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def copy_call_time(request, slug):
     user = request.user
@@ -369,47 +343,29 @@ def copy_call_time(request, slug):
     event = original_call_time.event
     formdata = request.data.copy()
     formdata['event'] = event.id
-    from datetime import datetime
-    date_obj = datetime.strptime(formdata['date'], '%Y-%m-%d').date()
-    try:
-        time_obj = datetime.strptime(formdata['time'], '%H:%M:%S').time()
-    except ValueError:
-        time_obj = datetime.strptime(formdata['time'], '%H:%M').time()
-    call_unixtime = timezone.datetime.combine(date_obj, time_obj)
-    formdata['call_unixtime'] = call_unixtime
     serializer = CallTimeSerializer(data=formdata)
     if serializer.is_valid():
-        new_call_time = serializer.save(event=event)
-        # Copy labor_requirements
-        for lr in original_call_time.labor_requirements.all():
-            new_lr = LaborRequirement.objects.create(
-                call_time=new_call_time,
-                labor_type=lr.labor_type,
-                needed_labor=lr.needed_labor,
-                fcfs_positions=lr.fcfs_positions,
-                minimum_hours=lr.minimum_hours
-            )
-            # Copy all labor_requests as fresh
-            for original_req in lr.labor_requests.all():
-                LaborRequest.objects.create(
-                    labor_requirement=new_lr,
-                    worker=original_req.worker,
-                    requested=True,
-                    availability_response=None,
-                    confirmed=False,
-                    sms_sent=False,
-                    event_token=None,
-                    token_short=generate_short_token(),
-                    responded_at=None,
-                    canceled=False,
-                    is_reserved=original_req.is_reserved
-                )
-        return Response(CallTimeSerializer(new_call_time).data, status=201)
+        overrides = {
+            field: serializer.validated_data[field]
+            for field in ('name', 'date', 'time', 'minimum_hours', 'message')
+            if field in serializer.validated_data}
+        # optional 'dates': copy the call time onto each of these days at once
+        try:
+            dates = [datetime.strptime(day, '%Y-%m-%d').date() for day in request.data.get('dates') or []]
+        except (TypeError, ValueError):
+            return Response({'status': 'error', 'message': 'dates must be a list of YYYY-MM-DD dates'}, status=400)
+        copies = [(original_call_time, event, {**overrides, 'date': day}) for day in dates or [overrides['date']]]
+        new_call_times = clone_call_times(copies)
+        new_call_times = CallTime.objects.filter(id__in=[call_time.id for call_time in new_call_times]).select_related(
+            'event').prefetch_related('labor_requirements__labor_type').order_by('date', 'time')
+        if not dates:
+            return Response(CallTimeSerializer(new_call_times[0]).data, status=201)
+        return Response(CallTimeSerializer(new_call_times, many=True).data, status=201)
     return Response(serializer.errors, status=400)
 
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def send_reminder(request, slug):
     user = request.user
@@ -452,7 +408,7 @@ def send_reminder(request, slug):
     return Response({'status': 'success', 'message': f'Reminders sent to {sent_count} workers.'})
     
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def send_call_time_messages(request, slug):
     user = request.user
@@ -504,7 +460,7 @@ def send_call_time_messages(request, slug):
 
 
 @api_view(['GET', 'POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def add_labor_to_call(request, slug):
     user = request.user
@@ -539,7 +495,7 @@ def add_labor_to_call(request, slug):
 
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def labor_requirement_status(request, slug):
     user = request.user
@@ -556,19 +512,12 @@ def labor_requirement_status(request, slug):
     if hasattr(user, 'steward') and not hasattr(user, 'manager') and labor_requirement.call_time.event.steward != user.steward:
         return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
     if request.method == "GET":
-        labor_requests = LaborRequest.objects.filter(labor_requirement=labor_requirement)
-        pending = labor_requests.filter(availability_response__isnull=True).count()
-        confirmed = labor_requests.filter(confirmed=True).count()
-        available = labor_requests.filter(availability_response='yes', confirmed=False).count()
-        declined = labor_requests.filter(availability_response='no').count()
+        counts = fill_counts([labor_requirement.id])[labor_requirement.id]
         labor_type = labor_requirement.labor_type
         context = {
             'job': labor_type.name,
             'labor_requirement': lr_serializer.data,
-            'pending': pending,
-            'confirmed': confirmed,
-            'available': available,
-            'declined': declined,
+            **counts,
         }
         return Response(context)
     else:
@@ -576,7 +525,7 @@ def labor_requirement_status(request, slug):
 
 
 @api_view(['POST', 'GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def edit_labor_requirement(request, slug):
     user = request.user
@@ -616,7 +565,7 @@ def edit_labor_requirement(request, slug):
 
 
 @api_view(['DELETE'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def delete_labor_requirement(request, slug):
     user = request.user
@@ -640,43 +589,38 @@ def delete_labor_requirement(request, slug):
         return Response({'status': 'error', 'message': 'Invalid request method'}, status=400)
 
 
+@query_budget(12)
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def bulk_confirm_requests(request):
     user = request.user
     if not hasattr(user, 'manager'):
         return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
-    manager = user.manager
-    company = manager.company
-    if not manager.company == company:
-        return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
-    labor_request_ids = request.data.get('labor_requests', [])
-    confirmed_count = 0
+    company = user.manager.company
+    action = request.data.get('action', 'confirm')
+    if action not in BULK_ACTIONS:
+        return Response({'status': 'error', 'message': f"action must be one of {', '.join(BULK_ACTIONS)}"}, status=400)
+    labor_request_ids = []
     errors = []
-    for req_data in labor_request_ids:
-        req_id = req_data.get('id')
+    for req_data in request.data.get('labor_requests', []):
+        req_id = req_data.get('id') if isinstance(req_data, dict) else req_data
         if not req_id:
             errors.append({'id': req_id, 'error': 'Missing id'})
             continue
         try:
-            labor_request = LaborRequest.objects.get(pk=req_id)
-            # Check if belongs to company
-            if labor_request.labor_requirement.call_time.event.company != company:
-                errors.append({'id': req_id, 'error': 'Unauthorized'})
-                continue
-            labor_request.availability_response = 'yes'
-            labor_request.canceled = False
-            labor_request.confirmed = True
-            labor_request.save()
-            confirmed_count += 1
-        except LaborRequest.DoesNotExist:
-            errors.append({'id': req_id, 'error': 'Not found'})
-    
+            labor_request_ids.append(int(req_id))
+        except (TypeError, ValueError):
+            errors.append({'id': req_id, 'error': 'Invalid id'})
+    updated_ids, action_errors = apply_bulk_action(company, action, labor_request_ids)
+    errors.extend(action_errors)
+    verb = BULK_ACTIONS[action][2]
     return Response({
         'status': 'success',
-        'message': f'{confirmed_count} requests confirmed',
-        'confirmed_count': confirmed_count,
+        'message': f'{len(updated_ids)} requests {verb}',
+        'updated_count': len(updated_ids),
+        'confirmed_count': len(updated_ids) if action == 'confirm' else 0,
+        'updated_ids': updated_ids,
         'errors': errors
     })
 
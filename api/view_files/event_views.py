@@ -1,9 +1,10 @@
-from datetime import timedelta
+from datetime import date, datetime, timedelta
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
-from rest_framework.authentication import TokenAuthentication
+from api.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from callManager.models import (
@@ -21,9 +22,6 @@ from callManager.models import (
         )
 import uuid
 from django.contrib.auth.models import User
-import qrcode
-from io import BytesIO
-import base64
 from api.serializers import (
         CallTimeSerializer,
         CompanySerializer,
@@ -35,84 +33,95 @@ from api.serializers import (
         CallTimeSerializer,
         LaborRequestSerializer,
         )
-from callManager.models import generate_unique_slug
 from callManager.views import send_message, generate_short_token
-from api.utils import frontend_url
+from api.utils import decode_cursor, encode_cursor, frontend_url
 from callManager.view_files.notify import notify
-from django.db.models import Q, Count
+from callManager.utils.cloning import clone_events
+from callManager.utils.counters import all_company_counters, get_company_counters
+from callManager.utils.event_summary import event_list_queryset, filter_event_window, summarize_events
+from callManager.utils.qr import qr_code_base64, qr_options
+from callManager.utils.query_budget import query_budget
+from django.db import transaction
+from django.db.models import Q, Count, Value
+from django.db.models.functions import Coalesce
 from callManager.views import log_sms
 
+# start dates accepted by one clone_event request
+MAX_EVENT_CLONES = 60
+EVENTS_PAGE_SIZE = 50
+EVENTS_MAX_PAGE_SIZE = 200
+
+
+def event_list_response(request, events):
+    """Serialize `events` with their fill summary.
+
+    Without paging/window parameters the whole list is returned, as before. With
+    start/end (YYYY-MM-DD) the list is limited to events overlapping that window,
+    and limit/cursor page through it in date order.
+    """
+    params = request.query_params
+    if not any(param in params for param in ('limit', 'cursor', 'start', 'end')):
+        # legacy clients get the whole list
+        return Response(EventSerializer(summarize_events(event_list_queryset(events)), many=True).data)
+
+    try:
+        limit = min(max(int(params.get('limit', EVENTS_PAGE_SIZE)), 1), EVENTS_MAX_PAGE_SIZE)
+    except ValueError:
+        return Response({'status': 'error', 'message': 'Invalid limit'}, status=400)
+    try:
+        start = parse_date(params['start']) if params.get('start') else None
+        end = parse_date(params['end']) if params.get('end') else None
+    except ValueError:
+        start = end = None
+    if (params.get('start') and start is None) or (params.get('end') and end is None):
+        return Response({'status': 'error', 'message': 'start and end must be YYYY-MM-DD dates'}, status=400)
+    # events without a start date sort first
+    events = filter_event_window(events, start, end).annotate(
+        sort_date=Coalesce('start_date', Value(date.min))).order_by('sort_date', 'id')
+    if params.get('cursor'):
+        try:
+            sort_date, last_id = decode_cursor(params['cursor'])
+        except ValueError:
+            return Response({'status': 'error', 'message': 'Invalid cursor'}, status=400)
+        sort_date = sort_date.date()
+        events = events.filter(Q(sort_date__gt=sort_date) | Q(sort_date=sort_date, id__gt=last_id))
+
+    page = list(event_list_queryset(events)[:limit + 1])
+    has_more = len(page) > limit
+    page = summarize_events(page[:limit])
+    return Response({
+        'results': EventSerializer(page, many=True).data,
+        'next_cursor': encode_cursor(page[-1].sort_date, page[-1].id) if has_more else None,
+        'has_more': has_more,
+    })
 
 
+@query_budget(12)
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def list_events(request):
     user = request.user
-    print(f"Authenticated user: {user}")  # Debug line
-    
     if hasattr(user, 'manager') and not hasattr(user, 'administrator'):
-        manager = user.manager
-        company = manager.company
-        events = Event.objects.filter(company=company)
-        new_events = []
-        for event in events:
-            event.unfilled_count = 0
-            event.filled = False
-            for call_time in event.call_times.all():
-                for labor_requirement in call_time.labor_requirements.all():
-                    event.unfilled_count += max(0, labor_requirement.needed_labor - labor_requirement.labor_requests.filter(confirmed=True).count())
-            if event.unfilled_count == 0:
-                event.filled = True
-            new_events.append(event)
-
-
-        serializer = EventSerializer(new_events, many=True)
-        return Response(serializer.data)
-
+        return event_list_response(request, Event.objects.filter(company=user.manager.company))
     elif hasattr(user, 'administrator'):
-        events = Event.objects.all()
-        new_events = []
-        for event in events:
-            event.unfilled_count = 0
-            event.filled = False
-            for call_time in event.call_times.all():
-                for labor_requirement in call_time.labor_requirements.all():
-                    event.unfilled_count += max(0, labor_requirement.needed_labor - labor_requirement.labor_requests.filter(confirmed=True).count())
-            if event.unfilled_count == 0:
-                event.filled = True
-            new_events.append(event)
-        serializer = EventSerializer(new_events, many=True)
-        return Response(serializer.data)
-
+        return event_list_response(request, Event.objects.all())
     else:
         return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
 
+@query_budget(12)
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def steward_events(request):
     user = request.user
     if not hasattr(user, 'steward'):
         return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
-    steward = user.steward
-    events = Event.objects.filter(steward=steward).order_by('start_date')
-    new_events = []
-    for event in events:
-        event.unfilled_count = 0
-        event.filled = False
-        for call_time in event.call_times.all():
-            for labor_requirement in call_time.labor_requirements.all():
-                event.unfilled_count += max(0, labor_requirement.needed_labor - labor_requirement.labor_requests.filter(confirmed=True).count())
-        if event.unfilled_count == 0:
-            event.filled = True
-        new_events.append(event)
-    serializer = EventSerializer(new_events, many=True)
-    return Response(serializer.data)
+    return event_list_response(request, Event.objects.filter(steward=user.steward).order_by('start_date'))
 
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def list_stewards(request):
     user = request.user
@@ -129,24 +138,25 @@ def list_stewards(request):
     return Response(data)
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def upcoming_event_count(request):
     user = request.user
     if hasattr(user, 'manager') and not hasattr(user, 'administrator'):
         manager = user.manager
         company = manager.company
-        events = Event.objects.filter(company=company, end_date__gte=timezone.now().date())
-        return Response({'count': events.count()})
+        events = get_company_counters(company).upcoming_events(timezone.now().date())
+        return Response({'count': events})
     elif hasattr(user, 'administrator'):
-        events = Event.objects.filter(end_date__gte=timezone.now().date())
-        return Response({'count': events.count()})
+        today = timezone.now().date()
+        events = sum(counters.upcoming_events(today) for counters in all_company_counters())
+        return Response({'count': events})
     else:
-        return 0
+        return Response({'count': 0})
 
 @permission_classes([AllowAny])
 @api_view(['GET', 'POST', 'PATCH'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def create_event(request):
     user = request.user
@@ -159,7 +169,6 @@ def create_event(request):
         if serializer.is_valid():
             serializer.validated_data['company'] = company
             serializer.validated_data['created_by'] = manager
-            serializer.validated_data['slug'] = generate_unique_slug(Event)
             serializer.validated_data['location_profile'] = get_object_or_404(LocationProfile, id=request.data['location_profile'])
 
             serializer.save()
@@ -179,7 +188,7 @@ def create_event(request):
 
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def send_event_messages(request, slug):
     user = request.user
@@ -196,7 +205,7 @@ def send_event_messages(request, slug):
         return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
 
     queued_requests = LaborRequest.objects.filter(
-        labor_requirement__call_time__event=event,
+        event=event,
         requested=True,
         sms_sent=False
     ).select_related('worker')
@@ -241,15 +250,19 @@ def send_event_messages(request, slug):
 def confirm_requests(request, slug, event_token):
     print(f"Request reached confirm_requests view: {request.method}")
     event = get_object_or_404(Event, slug=slug)
+    try:
+        qr_format, qr_box_size = qr_options(request.query_params)
+    except ValueError as e:
+        return Response({'status': 'error', 'message': str(e)}, status=400)
     company = event.company
     if len(event_token) > 6:
         first_request = LaborRequest.objects.filter(
-            labor_requirement__call_time__event=event,
+            event=event,
             event_token=event_token,
             worker__phone_number__isnull=False).select_related('worker').first()
     else:
         first_request = LaborRequest.objects.filter(
-            labor_requirement__call_time__event=event,
+            event=event,
             token_short=event_token,
             worker__phone_number__isnull=False).select_related('worker').first()
     if not first_request:
@@ -259,7 +272,7 @@ def confirm_requests(request, slug, event_token):
     registration_token.save()
     worker_phone = worker.phone_number
     labor_requests = LaborRequest.objects.filter(
-        labor_requirement__call_time__event=event,
+        event=event,
         requested=True,
         worker__phone_number=worker_phone).select_related(
         'labor_requirement__call_time',
@@ -273,33 +286,34 @@ def confirm_requests(request, slug, event_token):
     available_call_times = labor_requests.filter(availability_response='yes', confirmed=False)
 
     if request.method == 'POST':
-        for labor_request in pending_call_times:
-            response_key = f"response_{labor_request.id}"
-            response = request.data.get(response_key)
-            labor_request.availability_response = response
-            labor_request.responded_at = timezone.now()
-            labor_request.save()
-            if response == 'yes':
-                if labor_request.is_reserved:
-                    labor_request.confirmed = True
-                    labor_request.save()
-                    notif_message = f"{worker.name} confirmed for {event.event_name} - {labor_request.labor_requirement.call_time.name} - {labor_request.labor_requirement.labor_type.name}"
-                    notify(labor_request.id, 'Confirmed', notif_message)
-                else:
-                    notif_message = f"{worker.name} Available for {event.event_name} - {labor_request.labor_requirement.call_time.name} - {labor_request.labor_requirement.labor_type.name}, Requires confirmation"
-                    notify(labor_request.id, 'Available', notif_message)
-                    if labor_request.labor_requirement.fcfs_positions > 0:
-                        confirmed_count = LaborRequest.objects.filter(
-                            labor_requirement=labor_request.labor_requirement,
-                            confirmed=True).count()
-                        if confirmed_count < labor_request.labor_requirement.fcfs_positions:
-                            labor_request.confirmed = True
-                            labor_request.save()
-                            notif_message = f"{worker.name} confirmed for {event.event_name} - {labor_request.labor_requirement.call_time.name} - {labor_request.labor_requirement.labor_type.name}"
-                            notify(labor_request.id, 'Confirmed', notif_message)
-            elif response == 'no':
-                notif_message = f"{worker.name} declined {event.event_name} - {labor_request.labor_requirement.call_time.name} - {labor_request.labor_requirement.labor_type.name}"
-                notify(labor_request.id, 'Declined', notif_message)
+        with transaction.atomic():
+            for labor_request in pending_call_times:
+                response_key = f"response_{labor_request.id}"
+                response = request.data.get(response_key)
+                labor_request.availability_response = response
+                labor_request.responded_at = timezone.now()
+                labor_request.save()
+                if response == 'yes':
+                    if labor_request.is_reserved:
+                        labor_request.confirmed = True
+                        labor_request.save()
+                        notif_message = f"{worker.name} confirmed for {event.event_name} - {labor_request.labor_requirement.call_time.name} - {labor_request.labor_requirement.labor_type.name}"
+                        notify(labor_request.id, 'Confirmed', notif_message)
+                    else:
+                        notif_message = f"{worker.name} Available for {event.event_name} - {labor_request.labor_requirement.call_time.name} - {labor_request.labor_requirement.labor_type.name}, Requires confirmation"
+                        notify(labor_request.id, 'Available', notif_message)
+                        if labor_request.labor_requirement.fcfs_positions > 0:
+                            confirmed_count = LaborRequest.objects.filter(
+                                labor_requirement=labor_request.labor_requirement,
+                                confirmed=True).count()
+                            if confirmed_count < labor_request.labor_requirement.fcfs_positions:
+                                labor_request.confirmed = True
+                                labor_request.save()
+                                notif_message = f"{worker.name} confirmed for {event.event_name} - {labor_request.labor_requirement.call_time.name} - {labor_request.labor_requirement.labor_type.name}"
+                                notify(labor_request.id, 'Confirmed', notif_message)
+                elif response == 'no':
+                    notif_message = f"{worker.name} declined {event.event_name} - {labor_request.labor_requirement.call_time.name} - {labor_request.labor_requirement.labor_type.name}"
+                    notify(labor_request.id, 'Declined', notif_message)
 
         return Response({'status': 'success'})
 
@@ -318,14 +332,7 @@ def confirm_requests(request, slug, event_token):
             defaults={'expires_at': timezone.now() + timedelta(days=1), 'qr_sent': False}
         )
         clock_in_url = frontend_url(request, f"/clock-in/{token.token}/")
-        qr = qrcode.QRCode(version=1, box_size=10, border=4)
-        qr.add_data(clock_in_url)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffer = BytesIO()
-        img.save(buffer, format="PNG")
-        buffer.seek(0)
-        qr_code_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
+        qr_code_data = qr_code_base64(clock_in_url, qr_format, qr_box_size, expires_at=token.expires_at)
 
     registration_link = "/user/register/"
 
@@ -336,6 +343,7 @@ def confirm_requests(request, slug, event_token):
         'pending_call_times': pending_serializer.data,
         'available_call_times': available_serializer.data,
         'qr_code_data': qr_code_data,
+        'qr_code_format': qr_format,
         'registration_link': registration_link,
         'registration_token': registration_token.token,
     }
@@ -343,7 +351,7 @@ def confirm_requests(request, slug, event_token):
 
 
 @api_view(['GET', 'PATCH', 'DELETE'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def event_details(request, slug):
     user = request.user
@@ -383,7 +391,7 @@ def event_details(request, slug):
     return Response(context)
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def assign_steward(request, slug):
     user = request.user
@@ -401,7 +409,36 @@ def assign_steward(request, slug):
 
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def clone_event(request, slug):
+    user = request.user
+    if not hasattr(user, 'manager'):
+        return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
+    event = get_object_or_404(Event, slug=slug, company=user.manager.company)
+    if not event.start_date:
+        return Response({'status': 'error', 'message': 'Event has no start date to shift from'}, status=400)
+    try:
+        start_dates = [datetime.strptime(day, '%Y-%m-%d').date() for day in request.data.get('start_dates') or []]
+    except (TypeError, ValueError):
+        return Response({'status': 'error', 'message': 'start_dates must be a list of YYYY-MM-DD dates'}, status=400)
+    if not start_dates:
+        return Response({'status': 'error', 'message': 'start_dates is required'}, status=400)
+    if len(start_dates) > MAX_EVENT_CLONES:
+        return Response({'status': 'error', 'message': f'At most {MAX_EVENT_CLONES} copies at once'}, status=400)
+    new_events = clone_events(
+        event, start_dates, include_requests=bool(request.data.get('include_requests')), created_by=user.manager)
+    return Response({
+        'status': 'success',
+        'events': [
+            {'slug': new_event.slug, 'event_name': new_event.event_name,
+             'start_date': new_event.start_date, 'end_date': new_event.end_date}
+            for new_event in new_events],
+    }, status=201)
+
+
+@api_view(['POST'])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def generate_signin_station(request, slug):
     user = request.user
@@ -414,6 +451,10 @@ def generate_signin_station(request, slug):
     event = get_object_or_404(Event, slug=slug, company=company)
     if hasattr(user, 'steward') and not hasattr(user, 'manager') and event.steward != user.steward:
         return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
+    try:
+        qr_format, qr_box_size = qr_options(request.query_params)
+    except ValueError as e:
+        return Response({'status': 'error', 'message': str(e)}, status=400)
 
     # Create temp user for TemporaryScanner FK
     username = f"scanner_{uuid.uuid4().hex[:8]}"
@@ -427,18 +468,11 @@ def generate_signin_station(request, slug):
 
     station_url = frontend_url(request, f"/station/{scanner.token}")
 
-    # Generate QR code
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-    qr.add_data(station_url)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-    qr_code_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    qr_code_data = qr_code_base64(station_url, qr_format, qr_box_size, expires_at=scanner.expires_at)
 
     return Response({
         'qr_code_data': qr_code_data,
+        'qr_code_format': qr_format,
         'station_url': station_url,
         'expires_at': scanner.expires_at.isoformat(),
         'event_name': event.event_name,
@@ -1,12 +1,20 @@
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
-from rest_framework.authentication import TokenAuthentication
+from api.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from callManager.models import Notifications
+from callManager.view_files.notify import notification_data, push_notification
+from api.utils import decode_cursor, encode_cursor
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+NOTIFICATIONS_PAGE_SIZE = 50
+NOTIFICATIONS_MAX_PAGE_SIZE = 200
 
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def notifications(request):
     user = request.user
@@ -14,22 +22,53 @@ def notifications(request):
         return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
     manager = user.manager
     company = manager.company
-    notifications = Notifications.objects.filter(company=company).select_related('labor_requirement').order_by('-sent_at')
-    data = [{
-        'id': n.id,
-        'response': n.response,
-        'message': n.message,
-        'sent_at': n.sent_at,
-        'read': n.read,
-        'event': n.event.event_name,
-        'call_time': n.call_time.name if n.call_time else None,
-        'labor_requirement_slug': n.labor_requirement.slug if n.labor_requirement else None,
-    } for n in notifications]
-    return Response(data)
+    notifications = Notifications.objects.filter(company=company).select_related(
+        'event', 'call_time', 'labor_requirement').order_by('-sent_at', '-id')
+    params = request.query_params
+    if not any(param in params for param in ('limit', 'cursor', 'unread', 'since', 'fields')):
+        # legacy clients get the whole list
+        data = [notification_data(n) for n in notifications]
+        return Response(data)
+
+    try:
+        limit = min(max(int(params.get('limit', NOTIFICATIONS_PAGE_SIZE)), 1), NOTIFICATIONS_MAX_PAGE_SIZE)
+    except ValueError:
+        return Response({'status': 'error', 'message': 'Invalid limit'}, status=400)
+    if params.get('unread') in ('1', 'true', 'True'):
+        notifications = notifications.filter(read=False)
+    if params.get('since'):
+        try:
+            since = parse_datetime(params['since'])
+        except ValueError:
+            since = None
+        if since is None:
+            return Response({'status': 'error', 'message': 'Invalid since'}, status=400)
+        if timezone.is_aware(since):
+            since = timezone.make_naive(since)
+        notifications = notifications.filter(sent_at__gt=since)
+    if params.get('cursor'):
+        try:
+            sent_at, last_id = decode_cursor(params['cursor'])
+        except ValueError:
+            return Response({'status': 'error', 'message': 'Invalid cursor'}, status=400)
+        notifications = notifications.filter(Q(sent_at__lt=sent_at) | Q(sent_at=sent_at, id__lt=last_id))
+    fields = [field for field in params.get('fields', '').split(',') if field]
+
+    page = list(notifications[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    results = [notification_data(n) for n in page]
+    if fields:
+        results = [{field: row[field] for field in fields if field in row} for row in results]
+    return Response({
+        'results': results,
+        'next_cursor': encode_cursor(page[-1].sent_at, page[-1].id) if has_more else None,
+        'has_more': has_more,
+    })
 
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def mark_as_read(request, notification_id):
     user = request.user
@@ -42,13 +81,14 @@ def mark_as_read(request, notification_id):
         notification = Notifications.objects.get(id=notification_id, company=company)
         notification.read = True
         notification.save()
+        push_notification(company, changed=[notification.id])
         return Response({'status': 'success'})
     except Notifications.DoesNotExist:
         return Response({'status': 'error', 'message': 'Notification not found'}, status=404)
 
 
 @api_view(['DELETE'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def delete_notification(request, notification_id):
     user = request.user
@@ -60,13 +100,14 @@ def delete_notification(request, notification_id):
     try:
         notification = Notifications.objects.get(id=notification_id, company=company)
         notification.delete()
+        push_notification(company, deleted=[notification_id])
         return Response({'status': 'success'})
     except Notifications.DoesNotExist:
         return Response({'status': 'error', 'message': 'Notification not found'}, status=404)
 
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def clear_all_notifications(request):
     user = request.user
@@ -75,12 +116,15 @@ def clear_all_notifications(request):
     manager = user.manager
     company = manager.company
 
-    Notifications.objects.filter(company=company).delete()
+    notifications = Notifications.objects.filter(company=company)
+    deleted_ids = list(notifications.values_list('id', flat=True))
+    notifications.delete()
+    push_notification(company, deleted=deleted_ids)
     return Response({'status': 'success'})
 
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def clear_read_notifications(request):
     user = request.user
@@ -89,5 +133,8 @@ def clear_read_notifications(request):
     manager = user.manager
     company = manager.company
 
-    Notifications.objects.filter(company=company, read=True).delete()
+    notifications = Notifications.objects.filter(company=company, read=True)
+    deleted_ids = list(notifications.values_list('id', flat=True))
+    notifications.delete()
+    push_notification(company, deleted=deleted_ids)
     return Response({'status': 'success'})
\ No newline at end of file
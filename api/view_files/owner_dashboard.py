@@ -2,20 +2,17 @@ import json
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
-from rest_framework.authentication import TokenAuthentication
+from api.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from callManager.models import Event, LaborRequest, LaborRequirement, ManagerInvitation, RegistrationToken, SentSMS, Steward, StewardInvitation, UserProfile, Worker
+from callManager.models import Event, LaborRequest, LaborRequirement, ManagerInvitation, RegistrationToken, Steward, StewardInvitation, UserProfile, Worker
 from api.serializers import CompanySerializer, EventSerializer
-from django.conf import settings
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
-from callManager.views import log_sms
+from callManager.utils.sms_outbox import enqueue_sms
 from api.utils import frontend_url
 
 
 @api_view(['GET', 'PATCH'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def owner_dashboard(request):
     user = request.user
@@ -52,7 +49,7 @@ def owner_dashboard(request):
 
 
 @api_view(['GET', 'POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def send_manager_invite(request):
     user = request.user
@@ -64,29 +61,17 @@ def send_manager_invite(request):
         data = json.loads(request.body)
         phone = data.get('phone')
         if phone:
-            client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN) if settings.TWILIO_ENABLED == 'enabled' else None
             invitation = ManagerInvitation.objects.create(company=company, phone=phone)
             registration_url = frontend_url(request, f"/manager/register/{invitation.token}/")
             message_body = f'You are invited to become a manager for {company.name}. Register: {registration_url}'
-            if settings.TWILIO_ENABLED == 'enabled' and client:
-                try:
-                    client.messages.create(
-                        body=message_body,
-                        from_=settings.TWILIO_PHONE_NUMBER,
-                        to=phone)
-                    log_sms(company)
-                except TwilioRestException as e:
-                    print(f"Failed to send invitation: {str(e)}")
-                return Response({'status': 'success', 'message': 'Invitation sent'}, status=200)
-            else:
-                log_sms(company)
-                print(message_body)
+            enqueue_sms(message_body, phone, company)
+            return Response({'status': 'success', 'message': 'Invitation sent'}, status=200)
         else:
             return Response({'status': 'error', 'message': 'No phone number provided'}, status=400)
 
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def send_steward_invite(request):
     user = request.user
@@ -129,20 +114,7 @@ def send_steward_invite(request):
             reg_token = RegistrationToken.objects.create(worker=worker)
             registration_url = frontend_url(request, f"/steward/register/{reg_token.token}/")
             message_body = f'You are invited to become a steward for {company.name}. Register: {registration_url}'
-            client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN) if settings.TWILIO_ENABLED == 'enabled' else None
-            if settings.TWILIO_ENABLED == 'enabled' and client:
-                try:
-                    client.messages.create(
-                        body=message_body,
-                        from_=settings.TWILIO_PHONE_NUMBER,
-                        to=phone_number)
-                    log_sms(company)
-                except TwilioRestException as e:
-                    print(f"Failed to send invitation: {str(e)}")
-                return Response({'status': 'success', 'message': 'Invitation sent'}, status=200)
-            else:
-                log_sms(company)
-                print(message_body)
-                return Response({'status': 'success', 'message': 'Invitation would be sent (SMS disabled)'}, status=200)
+            enqueue_sms(message_body, phone_number, company, worker)
+            return Response({'status': 'success', 'message': 'Invitation sent'}, status=200)
     else:
         return Response({'status': 'error', 'message': 'No phone number provided'}, status=400)
@@ -3,7 +3,7 @@ from datetime import datetime, timedelta
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
-from rest_framework.authentication import TokenAuthentication
+from api.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from twilio.rest import notify
@@ -12,62 +12,50 @@ from callManager.models import CallTime, LaborRequest, LaborRequirement, Registr
 import json
 
 from callManager.view_files.notify import notify
+from callManager.utils.conflicts import conflicts_by_worker
+from callManager.utils.counters import all_company_counters, get_company_counters
 
 from callManager.views import generate_short_token, send_message
 from api.utils import frontend_url
 
 @api_view(['GET']) 
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def pending_count(request):
     user = request.user
     if hasattr(user, 'manager') and not hasattr(user, 'administrator'):
         manager = user.manager
         company = manager.company
-        pending_requests = LaborRequest.objects.filter(
-            labor_requirement__call_time__event__company=company,
-            availability_response__isnull=True,
-            sms_sent=True,
-            labor_requirement__call_time__date__gte=timezone.now().date()
-            )
+        pending_requests = get_company_counters(company).upcoming_pending(timezone.now().date())
         return Response({'count': pending_requests})
     elif hasattr(user, 'administrator'):
-        pending_requests = LaborRequest.objects.filter(
-            availability_response__isnull=True,
-            sms_sent=True,
-            labor_requirement__call_time__date__gte=timezone.now().date()
-            ).count()
+        today = timezone.now().date()
+        pending_requests = sum(counters.upcoming_pending(today) for counters in all_company_counters())
         return Response({'count': pending_requests})
     else:
         return Response({'count': 0})
 
 
 @api_view(['GET']) 
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def declined_count(request):
     user = request.user
     if hasattr(user, 'manager') and not hasattr(user, 'administrator'):
         manager = user.manager
         company = manager.company
-        declined_requests = LaborRequest.objects.filter(
-            labor_requirement__call_time__event__company=company,
-            availability_response='no',
-            labor_requirement__call_time__date__gte=timezone.now().date()
-            ).count()
+        declined_requests = get_company_counters(company).upcoming_declined(timezone.now().date())
         return Response({'count': declined_requests})
     elif hasattr(user, 'administrator'):
-        declined_requests = LaborRequest.objects.filter(
-            availability_response='no',
-            labor_requirement__call_time__date__gte=timezone.now().date()
-            ).count()
+        today = timezone.now().date()
+        declined_requests = sum(counters.upcoming_declined(today) for counters in all_company_counters())
         return Response({'count': declined_requests})
     else:
         return Response({'count': 0})
 
 
 @api_view(['GET']) 
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def call_time_list(request, slug):
     user = request.user
@@ -213,11 +201,11 @@ def user_request_action(request, token):
 
 
 @api_view(['GET']) 
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def fill_labor_request_list(request, slug):
     user = request.user
-    labor_requirement = get_object_or_404(LaborRequirement, slug=slug)
+    labor_requirement = get_object_or_404(LaborRequirement.objects.select_related('call_time__event', 'labor_type'), slug=slug)
     call_time = labor_requirement.call_time
     event = call_time.event
     company = event.company
@@ -231,37 +219,35 @@ def fill_labor_request_list(request, slug):
     else:
         return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
 
-    call_datetime = datetime.combine(call_time.date, call_time.time)
     labor_type = [labor_requirement.labor_type]
-    workers = Worker.objects.filter(company=labor_requirement.call_time.event.company)
+    workers = Worker.objects.filter(company=company).prefetch_related('labor_types', 'alt_phones')
     workers = workers.order_by('name')
+    grouped_conflicts = conflicts_by_worker(labor_requirement)
     for worker in workers:
         worker.conflicts = []
-        for labor_request in worker.labor_requests.all():
-            if labor_request.labor_requirement == labor_requirement:
+        for labor_request in grouped_conflicts.get(worker.id, []):
+            if labor_request.labor_requirement_id == labor_requirement.id:
                 worker.requested = True
                 worker.reserved = labor_request.is_reserved
                 continue
-            request_datetime = datetime.combine(
-                labor_request.labor_requirement.call_time.date,
-                labor_request.labor_requirement.call_time.time
-            )
-            
-            if call_datetime - timedelta(hours=5) <= request_datetime <= call_datetime + timedelta(hours=5):
-                conflict_info = {
-                    'event': labor_request.labor_requirement.call_time.event.event_name,
-                    'call_time': f"{labor_request.labor_requirement.call_time.name} at {labor_request.labor_requirement.call_time.time}",
-                    'labor_type': labor_request.labor_requirement.labor_type.name,
-                    'location': labor_request.labor_requirement.call_time.event.location_profile.name,
-                    'availability_response': labor_request.availability_response,
-                    'confirmed': labor_request.confirmed,
-                    'canceled': labor_request.canceled,
-                }
-                worker.conflicts.append(conflict_info)
-    
+            conflict_call_time = labor_request.labor_requirement.call_time
+            conflict_info = {
+                'event': conflict_call_time.event.event_name,
+                'call_time': f"{conflict_call_time.name} at {conflict_call_time.time}",
+                'labor_type': labor_request.labor_requirement.labor_type.name,
+                'location': conflict_call_time.event.location_profile.name,
+                'availability_response': labor_request.availability_response,
+                'confirmed': labor_request.confirmed,
+                'canceled': labor_request.canceled,
+            }
+            worker.conflicts.append(conflict_info)
+
     #serializers
     serialized_workers = WorkerSerializer(workers, many=True)
-    serialized_labor_requests = LaborRequestSerializer(labor_requirement.labor_requests.all(), many=True)
+    labor_requests = labor_requirement.labor_requests.select_related(
+        'worker__company', 'worker__user', 'labor_requirement__call_time__event', 'labor_requirement__labor_type__company',
+    ).prefetch_related('worker__labor_types', 'time_entries')
+    serialized_labor_requests = LaborRequestSerializer(labor_requests, many=True)
     serialized_labor_requirement = LaborRequirementSerializer(labor_requirement)
     serialized_call_time = CallTimeSerializer(call_time)
     serialized_event = EventSerializer(call_time.event)
@@ -281,7 +267,7 @@ def fill_labor_request_list(request, slug):
 
 
 @api_view(['POST']) 
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def request_worker(request, slug):
     data = json.loads(request.body)
@@ -320,7 +306,7 @@ def request_worker(request, slug):
 
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def send_labor_requirement_messages(request, slug):
     user = request.user
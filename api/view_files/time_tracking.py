@@ -1,16 +1,22 @@
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.shortcuts import get_object_or_404
+from django.db import IntegrityError
 from django.db.models import Q
-from rest_framework.authentication import TokenAuthentication
+from api.authentication import CachedTokenAuthentication
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from api.serializers import TimeEntrySerializer, LaborRequestTrackingSerializer, CallTimeSerializer, LaborTypeSerializer, CompanySerializer
-from callManager.models import CallTime, LaborRequest, TimeEntry, MealBreak, LaborType, ClockInToken, TemporaryScanner
+from callManager.models import CallTime, LaborRequest, TimeEntry, MealBreak, LaborType, ClockInToken
+from callManager.utils.payroll import attach_payroll, time_entries_prefetch
+from callManager.utils.query_budget import query_budget
+from callManager.utils.station_session import get_station_session, station_scan
+from callManager.utils.station_sync import MAX_SYNC_SCANS, sync_station_scans
+from callManager.utils.time_rules import time_rules_for
 
 @api_view(['GET', 'POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def call_time_tracking(request, slug):
     user = request.user
@@ -30,8 +36,11 @@ def call_time_tracking(request, slug):
     if request.method == 'GET':
         labor_requests = LaborRequest.objects.filter(
             labor_requirement__call_time=call_time,
-            confirmed=True).select_related('worker', 'labor_requirement__labor_type')
-        lr_data_list = LaborRequestTrackingSerializer(labor_requests, many=True).data
+            confirmed=True).select_related(
+            'worker__company', 'worker__user', 'labor_requirement__labor_type', 'labor_requirement__call_time',
+            ).prefetch_related('worker__labor_types', time_entries_prefetch())
+        tracked_requests = attach_payroll(labor_requests, company.meal_penalty_trigger_time)
+        lr_data_list = LaborRequestTrackingSerializer(tracked_requests, many=True).data
         labor_types = LaborType.objects.filter(id__in=labor_requests.values_list('labor_requirement__labor_type', flat=True).distinct())
         return Response({
             'call_time': CallTimeSerializer(call_time).data,
@@ -43,23 +52,8 @@ def call_time_tracking(request, slug):
         request_id = request.data.get('request_id')
         action = request.data.get('action')
         labor_request = get_object_or_404(LaborRequest, id=request_id, labor_requirement__call_time=call_time)
-        minimum_hours = labor_request.labor_requirement.minimum_hours or call_time.minimum_hours or call_time.event.location_profile.minimum_hours or company.minimum_hours
+        rules = time_rules_for(call_time)
         worker = labor_request.worker
-        def round_time(dt, target):
-            if target == 0:
-                # round to nearest hour
-                if dt.minute >= 30:
-                    dt = dt.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-                else:
-                    dt = dt.replace(minute=0, second=0, microsecond=0)
-            else:
-                # round to nearest target
-                rounded_min = round(dt.minute / target) * target
-                if rounded_min == 60:
-                    dt = dt.replace(hour=dt.hour + 1, minute=0, second=0, microsecond=0)
-                else:
-                    dt = dt.replace(minute=rounded_min, second=0, microsecond=0)
-            return dt
 
         if action in ['sign_in', 'sign_out', 'ncns', 'call_out', 'update_start_time', 'update_end_time', 'add_meal_break', 'update_meal_break', 'delete_meal_break']:
             time_entry, created = TimeEntry.objects.get_or_create(
@@ -69,23 +63,10 @@ def call_time_tracking(request, slug):
                 defaults={'start_time': datetime.combine(call_time.date, call_time.time)})
             was_ncns = worker.nocallnoshow > 0 and labor_request.availability_response == 'no'
             if action == 'sign_in' and not time_entry.start_time:
-                start_time = datetime.combine(call_time.date, call_time.time)
-                time_entry.start_time = round_time(start_time, company.round_up_target or 30)
+                time_entry.start_time = rules.round(rules.call_datetime)
                 time_entry.save()
             elif action == 'sign_out' and time_entry.start_time and not time_entry.end_time:
-                end_time = datetime.now()
-                if time_entry.start_time + timedelta(hours=minimum_hours) > end_time:
-                    end_time = time_entry.start_time + timedelta(hours=minimum_hours)
-                minutes = end_time.minute
-                location_profile = call_time.event.location_profile
-                round_up = (location_profile.hour_round_up if location_profile else None) or company.hour_round_up or 4
-                if minutes > 30 + round_up:
-                    end_time = end_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-                elif minutes > round_up:
-                    end_time = end_time.replace(minute=30, second=0, microsecond=0)
-                else:
-                    end_time = end_time.replace(minute=0, second=0, microsecond=0)
-                time_entry.end_time = end_time
+                time_entry.end_time = rules.clock_out(datetime.now(), time_entry.start_time, labor_request.labor_requirement_id)
                 time_entry.save()
             elif action == 'ncns' and not was_ncns:
                 labor_request.confirmed = False
@@ -97,13 +78,13 @@ def call_time_tracking(request, slug):
             elif action == 'update_start_time':
                 new_time_str = request.data.get('new_time')
                 dt = datetime.fromisoformat(new_time_str)
-                rounded_dt = round_time(dt, company.round_up_target or 30)
+                rounded_dt = rules.round(dt)
                 time_entry.start_time = rounded_dt
                 time_entry.save()
             elif action == 'update_end_time':
                 new_time_str = request.data.get('new_time')
                 dt = datetime.fromisoformat(new_time_str)
-                rounded_dt = round_time(dt, company.round_up_target or 30)
+                rounded_dt = rules.round(dt)
                 time_entry.end_time = rounded_dt
                 time_entry.save()
             elif action == 'add_meal_break':
@@ -111,7 +92,7 @@ def call_time_tracking(request, slug):
                 break_time_str = request.data.get('break_time')
                 if break_time_str:
                     break_time = datetime.fromisoformat(break_time_str)
-                    break_time = round_time(break_time, company.round_up_target or 30)
+                    break_time = rules.round(break_time)
                 else:
                     break_time = datetime.now()
                 duration = timedelta(minutes=type_minutes)
@@ -126,7 +107,7 @@ def call_time_tracking(request, slug):
                 break_time_str = request.data.get('break_time')
                 duration_min = int(request.data.get('duration'))
                 break_time = datetime.fromisoformat(break_time_str)
-                break_time = round_time(break_time, company.round_up_target or 30)
+                break_time = rules.round(break_time)
                 meal_break.break_time = break_time
                 meal_break.duration = timedelta(minutes=duration_min)
                 meal_break.break_type = 'paid' if duration_min == 30 else 'unpaid'
@@ -180,7 +161,7 @@ def worker_clock_in_out_api(request, token):
         action = request.data.get('action')
         call_time = get_object_or_404(CallTime, id=call_time_id, event=event)
         labor_request = get_object_or_404(LaborRequest, worker=worker, labor_requirement__call_time=call_time, confirmed=True)
-        minimum_hours = labor_request.labor_requirement.minimum_hours or call_time.minimum_hours or event.location_profile.minimum_hours or company.minimum_hours
+        rules = time_rules_for(call_time)
         time_entry, created = TimeEntry.objects.get_or_create(
             labor_request=labor_request,
             worker=worker,
@@ -189,7 +170,7 @@ def worker_clock_in_out_api(request, token):
         )
         if action == 'clock_in':
             now = timezone.now()
-            call_datetime = datetime.combine(call_time.date, call_time.time)
+            call_datetime = rules.call_datetime
             if abs((now - call_datetime).total_seconds()) > 3600:
                 return Response({'status': 'error', 'message': 'Please contact your steward for clocking in outside the allowed time.'}, status=400)
             if not time_entry.start_time:
@@ -199,18 +180,7 @@ def worker_clock_in_out_api(request, token):
             else:
                 return Response({'status': 'error', 'message': 'Already clocked in.'}, status=400)
         elif action == 'clock_out' and time_entry.start_time and not time_entry.end_time:
-            end_time = timezone.now()
-            minutes = end_time.minute
-            round_up = event.location_profile.hour_round_up or company.hour_round_up
-            if minutes > 30 + round_up:
-                end_time = end_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-            elif minutes > round_up:
-                end_time = end_time.replace(minute=30, second=0, microsecond=0)
-            else:
-                end_time = end_time.replace(minute=0, second=0, microsecond=0)
-            if time_entry.start_time + timedelta(hours=minimum_hours) > end_time:
-                end_time = time_entry.start_time + timedelta(hours=minimum_hours)
-            time_entry.end_time = end_time
+            time_entry.end_time = rules.clock_out(timezone.now(), time_entry.start_time, labor_request.labor_requirement_id)
             time_entry.save()
             message = f"Signed out at {time_entry.end_time.strftime('%I:%M %p')}."
         else:
@@ -243,8 +213,7 @@ def _perform_qr_clock(event, worker, company):
         return (False, 'No single relevant call time found.')
     call_time = valid_call_times[0]
     labor_request = LaborRequest.objects.get(worker=worker, labor_requirement__call_time=call_time, confirmed=True)
-    location_profile = event.location_profile
-    minimum_hours = labor_request.labor_requirement.minimum_hours or call_time.minimum_hours or (location_profile.minimum_hours if location_profile else None) or company.minimum_hours
+    rules = time_rules_for(call_time)
     time_entry, created = TimeEntry.objects.get_or_create(
         labor_request=labor_request,
         worker=worker,
@@ -253,23 +222,12 @@ def _perform_qr_clock(event, worker, company):
     )
     if time_entry.start_time and not time_entry.end_time:
         # Clock out
-        end_time = timezone.now()
-        minutes = end_time.minute
-        round_up = (location_profile.hour_round_up if location_profile else None) or company.hour_round_up or 4
-        if minutes > 30 + round_up:
-            end_time = end_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-        elif minutes > round_up:
-            end_time = end_time.replace(minute=30, second=0, microsecond=0)
-        else:
-            end_time = end_time.replace(minute=0, second=0, microsecond=0)
-        if time_entry.start_time + timedelta(hours=minimum_hours) > end_time:
-            end_time = time_entry.start_time + timedelta(hours=minimum_hours)
-        time_entry.end_time = end_time
+        time_entry.end_time = rules.clock_out(timezone.now(), time_entry.start_time, labor_request.labor_requirement_id)
         time_entry.save()
         return (True, f"Signed out at {time_entry.end_time.strftime('%I:%M %p')}.")
     elif not time_entry.start_time:
         # Clock in
-        time_entry.start_time = datetime.combine(call_time.date, call_time.time)
+        time_entry.start_time = rules.call_datetime
         time_entry.save()
         return (True, f"Signed in at {time_entry.start_time.strftime('%I:%M %p')}.")
     else:
@@ -295,46 +253,41 @@ def worker_qr_clock(request, token):
 @authentication_classes([])
 @permission_classes([AllowAny])
 def validate_station(request, token):
-    scanner = TemporaryScanner.objects.filter(token=token).first()
-    if not scanner:
+    # loads the station's session, so the first scan doesn't pay for it
+    session = get_station_session(token)
+    if not session:
         return Response({'status': 'error', 'message': 'Invalid station token.'}, status=404)
-    if scanner.expires_at < timezone.now():
+    if session.expires_at < timezone.now():
         return Response({'status': 'error', 'message': 'This station has expired.'}, status=400)
     return Response({
-        'event_name': scanner.event.event_name,
-        'expires_at': scanner.expires_at.isoformat(),
+        'event_name': session.event_name,
+        'expires_at': session.expires_at.isoformat(),
     })
 
 
+@query_budget(3)
 @api_view(['POST'])
 @authentication_classes([])
 @permission_classes([AllowAny])
 def station_clock(request, token):
-    scanner = TemporaryScanner.objects.filter(token=token).first()
-    if not scanner:
-        return Response({'status': 'error', 'message': 'Invalid station token.'}, status=404)
-    if scanner.expires_at < timezone.now():
-        return Response({'status': 'error', 'message': 'This station has expired.'}, status=400)
+    status, data = station_scan(token, request.data.get('worker_token'))
+    return Response(data, status=status)
 
-    worker_token = request.data.get('worker_token')
-    if not worker_token:
-        return Response({'status': 'error', 'message': 'No worker token provided.'}, status=400)
-
-    clock_token = ClockInToken.objects.filter(token=worker_token).first()
-    if not clock_token:
-        return Response({'status': 'error', 'message': 'Invalid worker QR code.'}, status=404)
-    if clock_token.expires_at < timezone.now():
-        return Response({'status': 'error', 'message': 'Worker clock-in token has expired.'}, status=400)
-    if clock_token.event != scanner.event:
-        return Response({'status': 'error', 'message': 'This QR code is for a different event.'}, status=400)
-
-    event = scanner.event
-    worker = clock_token.worker
-    company = event.company
-
-    success, message = _perform_qr_clock(event, worker, company)
-    if success:
-        return Response({'status': 'success', 'message': message, 'worker_name': worker.name})
-    else:
-        return Response({'status': 'error', 'message': message}, status=400)
 
+@query_budget(12)
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def station_sync(request):
+    # scans a station queued while offline; see sync_station_scans
+    scans = request.data.get('scans')
+    if not isinstance(scans, list) or not scans:
+        return Response({'status': 'error', 'message': 'scans must be a non-empty list.'}, status=400)
+    if len(scans) > MAX_SYNC_SCANS:
+        return Response({'status': 'error', 'message': f'At most {MAX_SYNC_SCANS} scans can be synced at once.'}, status=400)
+    try:
+        results = sync_station_scans(scans, request.data.get('station_token'))
+    except IntegrityError:
+        # the same scans are being synced by a concurrent request; a retry gets their results
+        return Response({'status': 'error', 'message': 'These scans are already being synced. Try again shortly.'}, status=409)
+    return Response({'status': 'success', 'results': results})
@@ -5,7 +5,7 @@ from callManager.models import UserProfile, LaborRequest, Steward, Worker, Regis
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.authentication import TokenAuthentication
+from api.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import authentication_classes, permission_classes
 from api.serializers import WorkerSerializer, LaborRequestSerializer
@@ -121,7 +121,7 @@ def user_registration(request):
 
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def user_profile(request):
     user = request.user
@@ -3,29 +3,16 @@ from io import TextIOWrapper
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework.decorators import api_view, authentication_classes, permission_classes, parser_classes
-from rest_framework.authentication import TokenAuthentication
+from api.authentication import CachedTokenAuthentication
 from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from callManager.models import AltPhone, LaborRequest, LaborType, UserProfile, Worker, RegistrationToken
+from callManager.models import AltPhone, LaborRequest, LaborType, UserProfile, Worker, WorkerImportJob, RegistrationToken
+from callManager.utils.worker_import import contacts_from_json, import_job_data, parse_vcf, start_import, valid_phone_number
 from api.serializers import LaborTypeSerializer, WorkerSerializer
 
-def valid_phone_number(phone_number):
-    if not phone_number:
-        return None
-    phone_number = phone_number.replace(' ', '').replace('-', '').replace('(', '').replace(')', '').replace('.', '')
-    if phone_number.startswith('+1') and len(phone_number) == 12:
-        return phone_number
-    if len(phone_number) == 10:
-        phone_number = f"+1{phone_number}"
-    elif len(phone_number) == 11 and phone_number.startswith('1'):
-        phone_number = f"+{phone_number}"
-    elif len(phone_number) < 10:
-        return None
-    return phone_number
-
 @api_view(['GET', 'POST', 'PATCH', 'DELETE', 'PUT'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def list_workers(request):
     user = request.user
@@ -169,7 +156,7 @@ def list_workers(request):
 
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def worker_history(request, slug):
     user = request.user
@@ -177,7 +164,7 @@ def worker_history(request, slug):
         return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
     company = user.manager.company
     worker = get_object_or_404(Worker, slug=slug, company=company)
-    labor_requests = worker.labor_requests.filter(labor_requirement__call_time__event__company=company)
+    labor_requests = worker.labor_requests.filter(company=company)
     confirmed_requests = labor_requests.filter(confirmed=True)
     declined_requests = labor_requests.filter(availability_response='no')
     ncns_requests = labor_requests.filter(availability_response='ncns')
@@ -196,7 +183,7 @@ def worker_history(request, slug):
 
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser])
 def import_workers(request):
@@ -212,71 +199,12 @@ def import_workers(request):
         return Response({'status': 'error', 'message': 'File must be a .vcf file'}, status=400)
 
     vcf_file = TextIOWrapper(vcf_file_obj.file, encoding='utf-8')
-    imported = 0
-    skipped = 0
-    errors = []
-    current_name = None
-    current_phones = []
-
-    for line in vcf_file:
-        line = line.strip()
-        try:
-            if line.startswith('END:VCARD'):
-                if current_phones:
-                    primary_phone = valid_phone_number(current_phones[0]['number'])
-                    if not primary_phone:
-                        errors.append(f"Invalid phone number for {current_name or 'Unnamed'}")
-                        current_name = None
-                        current_phones = []
-                        continue
-                    worker, created = Worker.objects.get_or_create(
-                        phone_number=primary_phone,
-                        company=company,
-                        defaults={'name': current_name.strip() if current_name else 'Unnamed'},
-                    )
-                    if created:
-                        imported += 1
-                        for extra in current_phones[1:]:
-                            alt_num = valid_phone_number(extra['number'])
-                            if alt_num:
-                                AltPhone.objects.get_or_create(
-                                    worker=worker,
-                                    phone_number=alt_num,
-                                    defaults={'label': extra.get('label', '')},
-                                )
-                    else:
-                        skipped += 1
-                current_name = None
-                current_phones = []
-            elif line.startswith('FN:'):
-                current_name = line[3:].strip()
-            elif line.startswith('TEL'):
-                # Parse label from TEL params: TEL;CELL:, TEL;HOME:, TEL;TYPE=CELL:, TEL;CELL;PREF:
-                label = ''
-                header, _, number = line.partition(':')
-                params = header.split(';')[1:]  # everything after TEL
-                for param in params:
-                    p = param.upper().strip()
-                    if p in ('PREF', 'VOICE', 'ENCODING=QUOTED-PRINTABLE'):
-                        continue
-                    if p.startswith('TYPE='):
-                        label = param.split('=', 1)[1].strip()
-                    elif not label:
-                        label = param.strip()
-                if number.strip():
-                    current_phones.append({'number': number.strip(), 'label': label})
-        except Exception:
-            errors.append(f"Failed to import: {current_name or 'Unnamed'}")
-
-    return Response({
-        'imported': imported,
-        'skipped': skipped,
-        'errors': errors,
-    })
+    job = start_import(company, user, 'vcf', parse_vcf(vcf_file))
+    return Response(import_job_data(job), status=200 if job.finished_at else 202)
 
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def import_contacts_json(request):
     user = request.user
@@ -288,46 +216,16 @@ def import_contacts_json(request):
     if not contacts:
         return Response({'status': 'error', 'message': 'No contacts provided'}, status=400)
 
-    imported = 0
-    skipped = 0
-    errors = []
+    job = start_import(company, user, 'json', contacts_from_json(contacts))
+    return Response(import_job_data(job), status=200 if job.finished_at else 202)
 
-    for contact in contacts:
-        name = contact.get('name', '').strip() or 'Unnamed'
-        phone_numbers = contact.get('phone_numbers', [])
-        # Backwards compat: single phone_number field
-        if not phone_numbers and contact.get('phone_number'):
-            phone_numbers = [{'phone_number': contact['phone_number']}]
-        if not phone_numbers:
-            errors.append(f"No phone number for {name}")
-            continue
-        primary = valid_phone_number(phone_numbers[0].get('phone_number', ''))
-        if not primary:
-            errors.append(f"Invalid phone number for {name}")
-            continue
-        try:
-            worker, created = Worker.objects.get_or_create(
-                phone_number=primary,
-                company=company,
-                defaults={'name': name},
-            )
-            if created:
-                imported += 1
-                for extra in phone_numbers[1:]:
-                    alt_num = valid_phone_number(extra.get('phone_number', ''))
-                    if alt_num:
-                        AltPhone.objects.get_or_create(
-                            worker=worker,
-                            phone_number=alt_num,
-                            defaults={'label': extra.get('label', '')},
-                        )
-            else:
-                skipped += 1
-        except Exception:
-            errors.append(f"Failed to import: {name}")
 
-    return Response({
-        'imported': imported,
-        'skipped': skipped,
-        'errors': errors,
-    })
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def import_job_status(request, job_id):
+    user = request.user
+    if not hasattr(user, 'manager'):
+        return Response({'status': 'error', 'message': 'Unauthorized'}, status=401)
+    job = get_object_or_404(WorkerImportJob, id=job_id, company=user.manager.company)
+    return Response(import_job_data(job))
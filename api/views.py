@@ -7,7 +7,7 @@ from callManager.models import (
         PasswordResetToken,
         )
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
-from rest_framework.authentication import TokenAuthentication
+from api.authentication import CachedTokenAuthentication
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from django.http import JsonResponse
@@ -56,7 +56,7 @@ def login_view(request):
 
 
 @api_view(['POST'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def logout(request):
     request.user.auth_token.delete()
@@ -113,7 +113,7 @@ def reset_password(request, token):
 
 
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def user_info(request):
     user = request.user
@@ -198,7 +198,7 @@ def skills_list(request):
 
 
 @api_view(['GET', 'POST', 'DELETE', 'PATCH'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
 def location_profiles(request):
     user = request.user
@@ -6,7 +6,11 @@ from .models import (
         LaborRequirement,
         LaborType,
         Notifications,
-        SentSMS,
+        SMSUsage,
+        QueuedSMS,
+        InboundSMS,
+        CompanyCounters,
+        EventCounters,
         Steward,
         Worker,
         Manager,
@@ -181,11 +185,33 @@ class MealBreakAdmin(admin.ModelAdmin):
         return obj.duration if obj.duration else "-"
     duration.short_description = "Duration"
 
-@admin.register(SentSMS)
-class SentSMSAdmin(admin.ModelAdmin):
-    list_display = ('company', 'datetime_sent')
-    list_filter = ('datetime_sent',)
-    ordering = ('datetime_sent',)
+@admin.register(SMSUsage)
+class SMSUsageAdmin(admin.ModelAdmin):
+    list_display = ('company', 'date', 'message_count')
+    list_filter = ('company', 'date')
+    ordering = ('-date',)
+
+@admin.register(QueuedSMS)
+class QueuedSMSAdmin(admin.ModelAdmin):
+    list_display = ('to_number', 'company', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status', 'company')
+    search_fields = ('to_number', 'worker__name')
+    ordering = ('-created_at',)
+
+@admin.register(InboundSMS)
+class InboundSMSAdmin(admin.ModelAdmin):
+    list_display = ('from_number', 'message_sid', 'body', 'received_at')
+    search_fields = ('from_number', 'message_sid')
+    ordering = ('-received_at',)
+
+@admin.register(CompanyCounters)
+class CompanyCountersAdmin(admin.ModelAdmin):
+    list_display = ('company', 'pending_count', 'declined_count', 'unfilled_spots', 'updated_at')
+
+@admin.register(EventCounters)
+class EventCountersAdmin(admin.ModelAdmin):
+    list_display = ('event', 'company', 'pending_count', 'declined_count', 'unfilled_spots', 'updated_at')
+    list_filter = ('company',)
 
 @admin.register(TimeChangeConfirmation)
 class TimeChangeConfirmationAdmin(admin.ModelAdmin):
@@ -6,3 +6,7 @@ class CallmanagerConfig(AppConfig):
 
     def ready(self):
         import callManager.utils.auth_signals
+        import callManager.utils.counter_signals
+        import callManager.utils.fill_status_signals
+        import callManager.utils.station_session_signals
+        import callManager.utils.time_rules_signals
@@ -15,6 +15,18 @@ def get_manager_company_id(user):
     except (AttributeError, user.manager.RelatedObjectDoesNotExist):
         return None
 
+@database_sync_to_async
+def user_can_view_event(user, slug):
+    from callManager.models import Event
+    event = Event.objects.filter(slug=slug).select_related('steward').first()
+    if event is None:
+        return False
+    if hasattr(user, 'manager'):
+        return event.company_id == user.manager.company_id
+    if hasattr(user, 'steward'):
+        return event.steward_id == user.steward.id
+    return False
+
 class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         user = self.scope["user"]
@@ -37,9 +49,13 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     async def send_notification(self, event):
+        # carries the changed rows so clients can patch their list instead of re-fetching it
         await self.send(text_data=json.dumps({
             "type": "htmx_trigger",
-            "event": "notification-update"
+            "event": "notification-update",
+            "notifications": event.get("notifications", []),
+            "deleted": event.get("deleted", []),
+            "unread_count": event.get("unread_count"),
         }))
 
 class LaborRequestConsumer(AsyncWebsocketConsumer):
@@ -69,3 +85,28 @@ class LaborRequestConsumer(AsyncWebsocketConsumer):
             "type": "labor_request_update",
             "data": event.get("data", {})
         }))
+
+class EventConsumer(AsyncWebsocketConsumer):
+    """streams fill status for every call time of an event,
+    so the event screen needs one socket instead of polling each call. """
+    async def connect(self):
+        user = self.scope["user"]
+        self.event_slug = self.scope['url_route']['kwargs']['slug']
+
+        if user.is_anonymous or not await user_can_view_event(user, self.event_slug):
+            await self.close()
+            return
+
+        self.group_name = f"event_{self.event_slug}_updates"
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def fill_status_update(self, event):
+        await self.send(text_data=json.dumps({
+            "type": "fill_status_update",
+            "labor_requirements": event.get("labor_requirements", [])
+        }))
@@ -0,0 +1,80 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from callManager.models import AltPhone, CallTime, LaborRequest, Notifications, Worker
+
+
+def canonical_queries():
+    """(name, queryset) pairs shaped like the hot lookups in the API and HTML views.
+
+    Parameter values don't need to exist; only the plan is inspected.
+    """
+    return [
+        ('requested workers of a labor requirement',
+         LaborRequest.objects.filter(labor_requirement_id=1, requested=True)),
+        ('confirmed workers of a labor requirement',
+         LaborRequest.objects.filter(labor_requirement_id=1, confirmed=True)),
+        ('available workers of a labor requirement',
+         LaborRequest.objects.filter(labor_requirement_id=1, availability_response='yes', confirmed=False)),
+        ('queued requests for a consenting worker (sms_webhook)',
+         LaborRequest.objects.filter(worker_id__in=[1, 2], requested=True, sms_sent=False)),
+        ('request by short token',
+         LaborRequest.objects.filter(token_short='abc123')),
+        ('event requests by event token',
+         LaborRequest.objects.filter(event_id=1, event_token='0' * 36)),
+        ('pending requests of a company',
+         LaborRequest.objects.filter(company_id=1, availability_response__isnull=True)),
+        ('worker by phone number (sms_webhook)',
+         Worker.objects.filter(phone_number='+15555550100')),
+        ('alternate phone number (sms_webhook)',
+         AltPhone.objects.filter(phone_number='+15555550100')),
+        ('call times in a conflict window',
+         CallTime.objects.filter(call_unixtime__range=(0, 3600))),
+        ('unread notifications of a company',
+         Notifications.objects.filter(company_id=1, read=False).order_by('-sent_at')),
+    ]
+
+
+def sequential_scans(plan):
+    """Tables the plan reads without an index"""
+    if connection.vendor == 'postgresql':
+        return re.findall(r'Seq Scan on (\S+)', plan)
+    if connection.vendor == 'sqlite':
+        return re.findall(r'\bSCAN (\S+)$', plan, re.MULTILINE)
+    if connection.vendor == 'mysql':
+        # tabular EXPLAIN: id, select_type, table, partitions, type, ...
+        return [row.split('\t')[2] for row in plan.splitlines()[1:] if row.split('\t')[4:5] == ['ALL']]
+    return []
+
+
+class Command(BaseCommand):
+    help = 'Runs EXPLAIN on the canonical hot queries against the configured database and flags sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Print the full plan of every query'
+        )
+
+    def handle(self, *args, **options):
+        flagged = []
+        for name, queryset in canonical_queries():
+            with transaction.atomic():
+                if connection.vendor == 'postgresql':
+                    # small dev tables make seq scans look cheap; ask whether an index path exists at all
+                    with connection.cursor() as cursor:
+                        cursor.execute('SET LOCAL enable_seqscan = off')
+                plan = queryset.explain()
+            scans = sequential_scans(plan)
+            if scans:
+                flagged.append(name)
+                self.stdout.write(self.style.WARNING(f"SEQ SCAN  {name}: {', '.join(scans)}"))
+            else:
+                self.stdout.write(f"ok        {name}")
+            if options['verbose_plans'] or scans:
+                self.stdout.write(plan)
+        if flagged:
+            raise CommandError(f"{len(flagged)} query(ies) use a sequential scan")
+        self.stdout.write(self.style.SUCCESS(f"All queries use an index ({connection.vendor})"))
@@ -0,0 +1,43 @@
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from callManager.utils.sign_in_sheet import SignInSheet, fit_column_widths
+
+HEADERS = ['Name', 'Labor Type', 'Sign In', 'Sign Out', 'Meal Breaks', 'Hours', 'MP', 'Total Hours']
+LABOR_TYPES = ['Stagehand', 'Rigger', 'Carpenter', 'Electrician', 'Audio', 'Video']
+
+
+def synthetic_rows(count):
+    return [
+        [f"Worker {i}", LABOR_TYPES[i % len(LABOR_TYPES)], '08:00 AM', '05:30 PM',
+         '12:00 PM (Paid)', '8.50', f"{(i % 3) * 0.5:.2f}", '9.50']
+        for i in range(count)]
+
+
+class Command(BaseCommand):
+    help = 'Times sign-in sheet PDF rendering for synthetic call times of increasing size'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            default='250,500,1000,2000',
+            help='Comma-separated row counts to render'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['rows'].split(',')]
+        except ValueError:
+            raise CommandError(f"Invalid row counts: {options['rows']}")
+        for size in sizes:
+            rows = synthetic_rows(size)
+            start = time.perf_counter()
+            buffer = BytesIO()
+            sheet = SignInSheet(buffer, HEADERS, fit_column_widths(HEADERS, rows), title='Benchmark Co')
+            sheet.add_group('Benchmark Event: Load In at 08:00 AM', rows)
+            sheet.save()
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stdout.write(self.style.SUCCESS(
+                f"{size} rows: {sheet.page_count} pages, {len(buffer.getvalue()) // 1024} KB, "
+                f"{elapsed:.1f} ms ({elapsed / size:.3f} ms/row)"))
@@ -0,0 +1,98 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from api.view_files.time_tracking import _perform_qr_clock
+from callManager.models import (
+        CallTime,
+        ClockInToken,
+        Company,
+        Event,
+        LaborRequest,
+        LaborRequirement,
+        LaborType,
+        TemporaryScanner,
+        TimeEntry,
+        Worker,
+        )
+from callManager.utils.cloning import bulk_create_with_slugs
+from callManager.utils.query_budget import record_queries
+from callManager.utils.station_session import station_scan
+
+
+def legacy_scan(token, worker_token):
+    """The station_clock path before station sessions: every scan looks everything up"""
+    scanner = TemporaryScanner.objects.filter(token=token).first()
+    clock_token = ClockInToken.objects.filter(token=worker_token).first()
+    if clock_token.event != scanner.event:
+        return 400, {}
+    success, message = _perform_qr_clock(scanner.event, clock_token.worker, scanner.event.company)
+    return (200 if success else 400), {'message': message}
+
+
+class Command(BaseCommand):
+    help = 'Times station scans for a synthetic event, comparing per-scan lookups with station sessions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=200, help='Workers on the synthetic call')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent scanning threads')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['threads'] < 1:
+            raise CommandError('--workers and --threads must be positive')
+        company, user, scanner, tokens = self.create_event(options['workers'])
+        try:
+            for name, scan in (('legacy', legacy_scan), ('session', station_scan)):
+                TimeEntry.objects.filter(event=scanner.event).delete()
+                for phase in ('in', 'out'):
+                    self.run(f"{name} {phase}", scan, str(scanner.token), tokens, options['threads'])
+        finally:
+            company.delete()
+            user.delete()
+
+    def create_event(self, count):
+        now = timezone.now()
+        company = Company.objects.create(
+            name='Benchmark Co', phone_number='5555550100', email='bench@example.com', website='https://example.com')
+        event = Event.objects.create(event_name='Benchmark Event', event_description='', company=company, start_date=now.date())
+        call_time = CallTime.objects.create(event=event, name='Load In', date=now.date(), time=now.time().replace(second=0, microsecond=0))
+        labor_type = LaborType.objects.create(company=company, name='Stagehand')
+        requirement = LaborRequirement.objects.create(call_time=call_time, labor_type=labor_type, needed_labor=count)
+        workers = bulk_create_with_slugs(Worker, [
+            Worker(company=company, name=f"Worker {i}", phone_number=f"555{i:07d}") for i in range(count)])
+        LaborRequest.objects.bulk_create([
+            LaborRequest(worker=worker, labor_requirement=requirement, event=event, company=company,
+                         confirmed=True, availability_response='yes')
+            for worker in workers])
+        tokens = ClockInToken.objects.bulk_create([
+            ClockInToken(event=event, worker=worker, expires_at=now + timedelta(days=1)) for worker in workers])
+        user = User.objects.create_user(username=f"bench-station-{event.slug}")
+        scanner = TemporaryScanner.objects.create(event=event, user=user, expires_at=now + timedelta(hours=1))
+        return company, user, scanner, [str(token.token) for token in tokens]
+
+    def run(self, label, scan, station_token, worker_tokens, threads):
+        def timed_scan(worker_token):
+            with record_queries() as stats:
+                start = time.perf_counter()
+                status, _ = scan(station_token, worker_token)
+                elapsed = time.perf_counter() - start
+            connections.close_all()
+            return status, elapsed, stats.count
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(timed_scan, worker_tokens))
+        total = time.perf_counter() - start
+        failures = sum(1 for status, _, _ in results if status != 200)
+        latencies = sorted(elapsed * 1000 for _, elapsed, _ in results)
+        queries = sum(count for _, _, count in results) / len(results)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: {len(results) / total:.0f} scans/s, p50 {statistics.median(latencies):.1f} ms, "
+            f"p95 {p95:.1f} ms, {queries:.1f} queries/scan, {failures} failed"))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from callManager.utils.qr import delete_expired_qr_codes
+
+class Command(BaseCommand):
+    help = 'Deletes cached QR code images whose token has expired'
+
+    def handle(self, *args, **kwargs):
+        count = delete_expired_qr_codes()
+        self.stdout.write(self.style.SUCCESS(f'Successfully deleted {count} expired QR code image(s).'))
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from callManager.models import TemporaryScanner
+from callManager.utils.station_sync import delete_old_station_scans
 
 class Command(BaseCommand):
     help = 'Deletes expired TemporaryScanner instances and their associated users'
@@ -13,3 +14,5 @@ class Command(BaseCommand):
             scanner.delete()
             user.delete()
         self.stdout.write(self.style.SUCCESS(f'Successfully deleted {count} expired scanners and users.'))
+        scans = delete_old_station_scans()
+        self.stdout.write(self.style.SUCCESS(f'Successfully deleted {scans} old synced station scans.'))
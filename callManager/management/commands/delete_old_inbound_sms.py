@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from callManager.models import InboundSMS
+
+class Command(BaseCommand):
+    help = 'Deletes InboundSMS idempotency records older than the Twilio retry window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='Keep records received within this many days'
+        )
+
+    def handle(self, *args, **kwargs):
+        cutoff = timezone.now() - timedelta(days=kwargs['days'])
+        count, _ = InboundSMS.objects.filter(received_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'Successfully deleted {count} inbound SMS record(s).'))
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from callManager.utils.sms_outbox import drain_outbox, get_twilio_client
+
+class Command(BaseCommand):
+    help = 'Sends queued SMS messages through Twilio at a limited rate'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send everything that is currently due and exit instead of polling'
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=settings.SMS_OUTBOX_RATE_LIMIT,
+            help='Maximum messages per second'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.SMS_OUTBOX_BATCH_SIZE,
+            help='Number of queued messages claimed per query'
+        )
+        parser.add_argument(
+            '--idle-sleep',
+            type=float,
+            default=1.0,
+            help='Seconds to wait before polling an empty queue again'
+        )
+
+    def handle(self, *args, **kwargs):
+        client = get_twilio_client()
+        sent, unsent = drain_outbox(
+            client=client,
+            rate=kwargs['rate'],
+            batch_size=kwargs['batch_size'],
+            stop_when_empty=kwargs['once'],
+            idle_sleep=kwargs['idle_sleep'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} message(s), {unsent} failed or rescheduled"))
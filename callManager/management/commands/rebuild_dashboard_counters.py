@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from callManager.models import Company
+from callManager.utils.counters import rebuild_company_counters
+
+class Command(BaseCommand):
+    help = 'Recomputes the materialized dashboard counters from the request tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company',
+            help='Slug of a single company to rebuild'
+        )
+
+    def handle(self, *args, **options):
+        companies = Company.objects.all()
+        if options['company']:
+            companies = companies.filter(slug=options['company'])
+            if not companies.exists():
+                raise CommandError(f"No company with slug {options['company']}")
+        count = 0
+        for company_id in companies.values_list('id', flat=True):
+            rebuild_company_counters(company_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {count} company(ies)"))
@@ -0,0 +1,48 @@
+from datetime import timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from callManager.models import TimeEntry
+from callManager.utils.time_rules import load_time_rules
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = 'Raises completed time entries that end before their minimum call, e.g. after a minimum hours change'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Recheck call times from the last N days')
+        parser.add_argument('--company', help='Only recheck this company (slug)')
+        parser.add_argument('--apply', action='store_true', help='Save the changes; without it they are only counted')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be positive')
+        entries = TimeEntry.objects.filter(
+            start_time__isnull=False, end_time__isnull=False,
+            call_time__date__gte=timezone.now().date() - timedelta(days=options['days']))
+        if options['company']:
+            entries = entries.filter(company__slug=options['company'])
+        rows = entries.order_by('id').values_list(
+            'id', 'call_time_id', 'labor_request__labor_requirement_id', 'start_time', 'end_time').iterator(chunk_size=BATCH_SIZE)
+
+        checked = changed = 0
+        while batch := list(islice(rows, BATCH_SIZE)):
+            rules = load_time_rules({row[1] for row in batch})
+            updates = []
+            for entry_id, call_time_id, labor_requirement_id, start_time, end_time in batch:
+                minimum_end = rules[call_time_id].minimum_end(start_time, labor_requirement_id)
+                if end_time < minimum_end:
+                    updates.append(TimeEntry(id=entry_id, end_time=minimum_end))
+            checked += len(batch)
+            changed += len(updates)
+            if options['apply'] and updates:
+                with transaction.atomic():
+                    TimeEntry.objects.bulk_update(updates, ['end_time'])
+
+        verb = 'Raised' if options['apply'] else 'Would raise'
+        self.stdout.write(self.style.SUCCESS(f"{verb} {changed} of {checked} time entries to their minimum hours."))
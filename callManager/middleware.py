@@ -1,16 +1,23 @@
+import logging
 from urllib.parse import parse_qs
 
 from channels.db import database_sync_to_async
 from channels.middleware import BaseMiddleware
+from django.conf import settings
+from django.http import FileResponse
+
+from callManager.utils.query_budget import QueryBudgetExceeded, record_queries
+
+logger = logging.getLogger('callManager')
 
 
 @database_sync_to_async
 def get_user_from_token(token_key):
-    from rest_framework.authtoken.models import Token
-    try:
-        return Token.objects.get(key=token_key).user
-    except Token.DoesNotExist:
+    from api.authentication import resolve_token
+    user = resolve_token(token_key)
+    if user is None or not user.is_active:
         return None
+    return user
 
 
 class TokenAuthMiddleware(BaseMiddleware):
@@ -27,3 +34,57 @@ class TokenAuthMiddleware(BaseMiddleware):
                 scope["user"] = user
 
         return await super().__call__(scope, receive, send)
+
+
+class QueryBudgetMiddleware:
+    """Measure the queries each request runs and hold views to their declared budget.
+
+    In DEBUG the numbers are returned as X-Query-* response headers; otherwise each
+    request is logged as one key=value line on the callManager logger. A view over
+    its @query_budget is logged as a warning, and raises QueryBudgetExceeded when
+    QUERY_BUDGET_STRICT is set (as in tests), so N+1 regressions fail loudly.
+
+    A streaming response (e.g. the workers CSV export) runs its queries while the
+    server iterates the body, after this middleware has returned. Those aren't in the
+    headers or held to the budget; they are logged as a separate query_stats_stream
+    line once the body is exhausted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record_queries() as stats:
+            response = self.get_response(request)
+        budget = getattr(request, 'query_budget', None)
+        over_budget = budget is not None and stats.count > budget
+        line = (
+            f"query_stats method={request.method} path={request.path} status={response.status_code} "
+            f"queries={stats.count} duplicates={stats.duplicate_count} db_ms={stats.duration * 1000:.1f} budget={budget}")
+        if over_budget:
+            logger.warning(f"{line}\n{stats.report()}")
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(f"{request.method} {request.path} exceeded its query budget of {budget}: {stats.report()}")
+        elif settings.QUERY_STATS_LOG:
+            logger.info(line)
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(stats.count)
+            response['X-Query-Duplicates'] = str(stats.duplicate_count)
+            response['X-DB-Time-Ms'] = f"{stats.duration * 1000:.1f}"
+            if budget is not None:
+                response['X-Query-Budget'] = str(budget)
+        # file downloads don't query; wrapping them would lose the server's sendfile path
+        if response.streaming and not response.is_async and not isinstance(response, FileResponse):
+            response.streaming_content = self.measure_stream(request, response.streaming_content)
+        return response
+
+    def measure_stream(self, request, content):
+        with record_queries() as stats:
+            yield from content
+        if settings.QUERY_STATS_LOG:
+            logger.info(
+                f"query_stats_stream method={request.method} path={request.path} "
+                f"queries={stats.count} duplicates={stats.duplicate_count} db_ms={stats.duration * 1000:.1f}")
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = getattr(view_func, 'query_budget', None)
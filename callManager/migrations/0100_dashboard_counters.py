@@ -0,0 +1,45 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('callManager', '0099_queuedsms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyCounters',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('declined_count', models.PositiveIntegerField(default=0)),
+                ('unfilled_spots', models.PositiveIntegerField(default=0)),
+                ('pending_by_date', models.JSONField(default=dict, help_text='Pending requests with SMS sent, by call date')),
+                ('declined_by_date', models.JSONField(default=dict, help_text='Declined requests by call date')),
+                ('events_by_end_date', models.JSONField(default=dict, help_text='Events by end date')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='counters', to='callManager.company')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EventCounters',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('declined_count', models.PositiveIntegerField(default=0)),
+                ('unfilled_requirements', models.PositiveIntegerField(default=0)),
+                ('unfilled_spots', models.PositiveIntegerField(default=0)),
+                ('labor_needs_text', models.TextField(default='All calls filled')),
+                ('pending_by_date', models.JSONField(default=dict)),
+                ('declined_by_date', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='event_counters', to='callManager.company')),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='counters', to='callManager.event')),
+            ],
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:26
+
+import django.db.models.deletion
+from datetime import datetime, time
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def compact_sent_sms(apps, schema_editor):
+    """Roll SentSMS (one row per segment) up into one SMSUsage row per company per day"""
+    SentSMS = apps.get_model('callManager', 'SentSMS')
+    SMSUsage = apps.get_model('callManager', 'SMSUsage')
+    rows = SentSMS.objects.annotate(day=TruncDate('datetime_sent')).values(
+        'company_id', 'day').annotate(count=Count('id')).order_by()
+    SMSUsage.objects.bulk_create(
+        (SMSUsage(company_id=row['company_id'], date=row['day'], message_count=row['count']) for row in rows),
+        batch_size=1000)
+
+
+def expand_sms_usage(apps, schema_editor):
+    SentSMS = apps.get_model('callManager', 'SentSMS')
+    SMSUsage = apps.get_model('callManager', 'SMSUsage')
+    # datetime_sent is auto_now_add, so the rows are created first and dated after.
+    # bulk_create doesn't return pks on every backend (MySQL), so each company's new
+    # rows are found again by company and a creation time after `started`.
+    started = timezone.now()
+    company_ids = SMSUsage.objects.order_by('company_id').values_list('company_id', flat=True).distinct()
+    for company_id in company_ids:
+        usages = list(SMSUsage.objects.filter(company_id=company_id).order_by('date'))
+        SentSMS.objects.bulk_create(
+            (SentSMS(company_id=company_id) for usage in usages for _ in range(usage.message_count)), batch_size=1000)
+        ids = list(SentSMS.objects.filter(company_id=company_id, datetime_sent__gte=started).order_by('id').values_list(
+            'id', flat=True))
+        offset = 0
+        for usage in usages:
+            SentSMS.objects.filter(id__in=ids[offset:offset + usage.message_count]).update(
+                datetime_sent=datetime.combine(usage.date, time(12)))
+            offset += usage.message_count
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('callManager', '0100_dashboard_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SMSUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('message_count', models.PositiveIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sms_usage', to='callManager.company')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='smsusage',
+            constraint=models.UniqueConstraint(fields=('company', 'date'), name='smsusage_company_date_uniq'),
+        ),
+        migrations.RunPython(compact_sent_sms, expand_sms_usage),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:26
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('callManager', '0101_smsusage'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='SentSMS',
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('callManager', '0102_delete_sentsms'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notifications',
+            index=models.Index(fields=['company', 'read', 'sent_at'], name='notif_company_read_sent_idx'),
+        ),
+    ]
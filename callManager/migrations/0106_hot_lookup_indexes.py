@@ -0,0 +1,47 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('callManager', '0105_reportexport'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calltime',
+            index=models.Index(fields=['call_unixtime'], name='calltime_unixtime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='laborrequest',
+            index=models.Index(fields=['labor_requirement', 'requested'], name='laborreq_lr_requested_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='laborrequest',
+            index=models.Index(fields=['labor_requirement', 'confirmed'], name='laborreq_lr_confirmed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='laborrequest',
+            index=models.Index(fields=['labor_requirement', 'availability_response'], name='laborreq_lr_response_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='laborrequest',
+            index=models.Index(fields=['worker', 'requested', 'sms_sent'], name='laborreq_worker_req_sms_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='laborrequest',
+            index=models.Index(condition=models.Q(('token_short__isnull', False)), fields=['token_short'], name='laborreq_token_short_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='laborrequest',
+            index=models.Index(condition=models.Q(('event_token__isnull', False)), fields=['event_token'], name='laborreq_event_token_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worker',
+            index=models.Index(fields=['phone_number'], name='worker_phone_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_scope(apps, schema_editor):
+    """Fill the denormalized event/company columns with one UPDATE per table"""
+    LaborRequest = apps.get_model('callManager', 'LaborRequest')
+    LaborRequirement = apps.get_model('callManager', 'LaborRequirement')
+    TimeEntry = apps.get_model('callManager', 'TimeEntry')
+    CallTime = apps.get_model('callManager', 'CallTime')
+    requirements = LaborRequirement.objects.filter(id=OuterRef('labor_requirement_id'))
+    LaborRequest.objects.update(
+        event_id=Subquery(requirements.values('call_time__event_id')[:1]),
+        company_id=Subquery(requirements.values('call_time__event__company_id')[:1]))
+    call_times = CallTime.objects.filter(id=OuterRef('call_time_id'))
+    TimeEntry.objects.update(
+        event_id=Subquery(call_times.values('event_id')[:1]),
+        company_id=Subquery(call_times.values('event__company_id')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('callManager', '0106_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='laborrequest',
+            name='company',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='labor_requests', to='callManager.company'),
+        ),
+        migrations.AddField(
+            model_name='laborrequest',
+            name='event',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='labor_requests', to='callManager.event'),
+        ),
+        migrations.AddField(
+            model_name='timeentry',
+            name='company',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='time_entries', to='callManager.company'),
+        ),
+        migrations.AddField(
+            model_name='timeentry',
+            name='event',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='time_entries', to='callManager.event'),
+        ),
+        migrations.AddIndex(
+            model_name='laborrequest',
+            index=models.Index(fields=['company', 'availability_response'], name='laborreq_company_response_idx'),
+        ),
+        migrations.RunPython(backfill_scope, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+def e164(phone):
+    """callManager.models.e164 as of this migration; migrations must not import app code"""
+    phone = phone.replace('-', '')
+    phone = phone.replace(' ', '')
+    phone = phone.replace('(', '')
+    phone = phone.replace(')', '')
+    phone = phone.replace('.', '')
+    if phone.startswith('+1'):
+        phone = phone[2:]
+    if len(phone) == 10 and phone.isdigit():
+        return f"+1{phone}"
+    elif len(phone) == 11 and phone.isdigit():
+        return f"+{phone}"
+    elif len(phone) == 12 and phone.startswith('+'):
+        return phone
+    return phone
+
+
+def normalize_alt_phones(apps, schema_editor):
+    """AltPhone numbers were stored as typed; store them like Worker.phone_number"""
+    AltPhone = apps.get_model('callManager', 'AltPhone')
+    changed = []
+    for alt_phone in AltPhone.objects.only('id', 'phone_number').iterator():
+        normalized = e164(alt_phone.phone_number)
+        if normalized != alt_phone.phone_number:
+            alt_phone.phone_number = normalized
+            changed.append(alt_phone)
+    AltPhone.objects.bulk_update(changed, ['phone_number'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('callManager', '0107_denormalize_request_scope'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboundSMS',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_sid', models.CharField(max_length=64, unique=True)),
+                ('from_number', models.CharField(max_length=20)),
+                ('body', models.TextField(blank=True)),
+                ('response', models.TextField(blank=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='altphone',
+            index=models.Index(fields=['phone_number'], name='altphone_phone_idx'),
+        ),
+        migrations.RunPython(normalize_alt_phones, migrations.RunPython.noop),
+    ]
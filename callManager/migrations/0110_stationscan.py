@@ -0,0 +1,27 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('callManager', '0109_company_timezone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StationScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scan_id', models.UUIDField(unique=True)),
+                ('scanned_at', models.DateTimeField(blank=True, null=True)),
+                ('success', models.BooleanField(default=False)),
+                ('message', models.CharField(max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='station_scans', to='callManager.event')),
+                ('worker', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='station_scans', to='callManager.worker')),
+            ],
+        ),
+    ]
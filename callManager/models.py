@@ -1,5 +1,7 @@
+import secrets
 import string
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import Q
 from django.contrib.auth.models import User
 from phonenumber_field.modelfields import PhoneNumberField
 import uuid
@@ -11,13 +13,44 @@ from django.utils import timezone
 def get_expiry_time():
     return timezone.now() + timedelta(minutes=5)
 
-def generate_unique_slug(model_class, length=7):
-    """Generate a unique slug for a model instance."""
-    # a-z A-Z 0-9
-    while True:
-        slug = ''.join(random.choice(string.ascii_letters + string.digits) for _ in range(length))
-        if not model_class.objects.filter(slug=slug).exists():
-            return slug
+SLUG_ALPHABET = string.ascii_letters + string.digits
+SLUG_RETRIES = 5
+
+def random_slug(length=7, alphabet=SLUG_ALPHABET):
+    return ''.join(secrets.choice(alphabet) for _ in range(length))
+
+def unique_random_slugs(count, length=7, alphabet=SLUG_ALPHABET):
+    """`count` distinct random slugs for bulk_create paths; the unique index catches the rare clash with stored rows"""
+    slugs = set()
+    while len(slugs) < count:
+        slugs.add(random_slug(length, alphabet))
+    return list(slugs)
+
+class RandomSlugMixin:
+    """Assigns a random `slug` on save, without probing the table first.
+
+    The keyspace is large and `slug` is unique, so the insert itself is the check:
+    on the rare IntegrityError caused by a taken slug, a fresh one is drawn and the
+    save is retried.
+    """
+    slug_length = 7
+    slug_alphabet = SLUG_ALPHABET
+
+    def save(self, *args, **kwargs):
+        if self.slug:
+            return super().save(*args, **kwargs)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'slug'}
+        for attempt in range(SLUG_RETRIES):
+            self.slug = random_slug(self.slug_length, self.slug_alphabet)
+            try:
+                with transaction.atomic(using=kwargs.get('using') or router.db_for_write(type(self), instance=self)):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == SLUG_RETRIES - 1 or not type(self)._default_manager.filter(slug=self.slug).exists():
+                    self.slug = None
+                    raise
+
 def generate_random_integer():
     return random.randint(100000, 999999)
 
@@ -27,7 +60,7 @@ class Administrator(models.Model):
         return f"{self.user.get_full_name() or self.user.username} (Administrator)"
 
 # Company model (e.g., "ABC Production Co.")
-class Company(models.Model):
+class Company(RandomSlugMixin, models.Model):
     ROUNDUP_CHOICES = [
         (30, '30 minutes'),
         (0, '1 Hour'),
@@ -48,6 +81,7 @@ class Company(models.Model):
     minimum_hours = models.PositiveIntegerField(default=4, help_text="Minimum hours for a call time")
     slug = models.CharField(max_length=7, unique=True, blank=True, null=True)
     meal_penalty_diff = models.DecimalField(max_digits=4, decimal_places=2, default=1.50, help_text="Meal penalty multiplier")
+    timezone = models.CharField(max_length=100, default='America/New_York', choices=[(tz, tz) for tz in pytz.common_timezones], help_text="Timezone call times are scheduled in")
 
     def natural_key(self):
         return (self.slug,)
@@ -56,11 +90,19 @@ class Company(models.Model):
     def get_by_natural_key(cls, slug):
         return cls.objects.get(slug=slug)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_timezone = instance.__dict__.get('timezone')
+        return instance
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = generate_unique_slug(Company)
+        timezone_changed = self.pk and self.timezone != getattr(self, '_loaded_timezone', self.timezone)
         super().save(*args, **kwargs)
+        self._loaded_timezone = self.timezone
+        if timezone_changed:
+            # the same wall-clock call times are now different instants
+            recompute_call_unixtimes(CallTime.objects.filter(event__company=self), self.timezone)
 
     def __str__(self):
         return self.name
@@ -106,12 +148,61 @@ class StewardInvitation(models.Model):
     def __str__(self):
         return f"Steward Invitation for {self.company.name} ({self.token})"
 
-class SentSMS(models.Model):
-    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='sent_sms')
-    datetime_sent = models.DateTimeField(auto_now_add=True)
+class SMSUsage(models.Model):
+    """SMS segments sent by a company on one day; incremented by callManager.views.log_sms"""
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='sms_usage')
+    date = models.DateField()
+    message_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'date'], name='smsusage_company_date_uniq'),
+        ]
 
     def __str__(self):
-        return f"SMS Messages - {self.company.name} on {self.datetime_sent}"
+        return f"SMS Messages - {self.company.name} on {self.date}: {self.message_count}"
+
+class InboundSMS(models.Model):
+    """Twilio MessageSids already answered by sms_webhook, so a retried delivery is replayed instead of reprocessed"""
+    message_sid = models.CharField(max_length=64, unique=True)
+    from_number = models.CharField(max_length=20)
+    body = models.TextField(blank=True)
+    response = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"SMS from {self.from_number} ({self.message_sid})"
+
+class QueuedSMS(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='queued_sms', null=True, blank=True)
+    worker = models.ForeignKey('Worker', on_delete=models.SET_NULL, related_name='queued_sms', null=True, blank=True)
+    to_number = models.CharField(max_length=20)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    twilio_sid = models.CharField(max_length=64, null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='queuedsms_status_next_idx'),
+        ]
+
+    def segment_count(self):
+        """Number of 144 character segments billed for this message"""
+        return max(1, -(-len(self.body) // 144))
+
+    def __str__(self):
+        return f"SMS to {self.to_number} ({self.status})"
 
 # Manager profile (tied to a company)
 class Manager(models.Model):
@@ -142,7 +233,7 @@ class LaborType(models.Model):
         return cls.objects.get(company__slug=company_slug, name=name)
 
 # Event model for concerts or entertainment gigs
-class Event(models.Model):
+class Event(RandomSlugMixin, models.Model):
     event_name = models.CharField(max_length=200)
     start_date = models.DateField(null=True, blank=True )  # New start date
     end_date = models.DateField(null=True, blank=True )    # New end date
@@ -165,17 +256,24 @@ class Event(models.Model):
     def get_by_natural_key(cls, slug):
         return cls.objects.get(slug=slug)
 
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = generate_unique_slug(Event)
-        super().save(*args, **kwargs)
-
 
     def __str__(self):
         return self.event_name
 
 
-class CallTime(models.Model):
+def call_unixtime_for(date, time, tz_name):
+    """Unix time of a wall-clock call date and time in the company's timezone"""
+    return int(pytz.timezone(tz_name).localize(datetime.combine(date, time)).timestamp())
+
+
+def recompute_call_unixtimes(call_times, tz_name):
+    call_times = list(call_times.only('id', 'date', 'time', 'call_unixtime'))
+    for call_time in call_times:
+        call_time.call_unixtime = call_unixtime_for(call_time.date, call_time.time, tz_name)
+    CallTime.objects.bulk_update(call_times, ['call_unixtime'], batch_size=500)
+
+
+class CallTime(RandomSlugMixin, models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='call_times')
     date = models.DateField(null=True, blank=True)
     name = models.CharField(max_length=200)
@@ -189,14 +287,24 @@ class CallTime(models.Model):
     message = models.TextField(null=True, blank=True)
     time_has_changed = models.BooleanField(null=True, blank=True)
 
-    def update_call_unixtime(self):
-        datetime_obj = datetime.combine(self.date, self.time)
-        self.call_unixtime = int(datetime_obj.timestamp())
-        self.save(update_fields=['call_unixtime'])
+    class Meta:
+        indexes = [
+            models.Index(fields=['call_unixtime'], name='calltime_unixtime_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # snapshot of the schedule as loaded, so saves know what changed without re-reading the row
+        instance._loaded_date = instance.__dict__.get('date')
+        instance._loaded_time = instance.__dict__.get('time')
+        return instance
 
     def save(self, *args, **kwargs):
-        datetime_obj = datetime.combine(self.date, self.time)
-        self.call_unixtime = int(datetime_obj.timestamp())
+        changed_fields = set()
+        if not self.pk or self.has_changed() or not hasattr(self, '_loaded_time'):
+            self.call_unixtime = call_unixtime_for(self.date, self.time, self.event.company.timezone)
+            changed_fields.add('call_unixtime')
         if not self.pk and self.minimum_hours is None:
             # Set default minimum_hours from event's location profile or company
             if self.event.location_profile and self.event.location_profile.minimum_hours is not None:
@@ -208,19 +316,22 @@ class CallTime(models.Model):
             self.original_time = self.time
         elif self.has_changed():  # Existing instance with changes
             if not self.original_date:
-                self.original_date = CallTime.objects.get(pk=self.pk).date
+                self.original_date = self._loaded_date
+                changed_fields.add('original_date')
             if not self.original_time:
-                self.original_time = CallTime.objects.get(pk=self.pk).time
+                self.original_time = self._loaded_time
+                changed_fields.add('original_time')
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], *changed_fields}
         super().save(*args, **kwargs)
-        if not self.slug:
-            self.slug = generate_unique_slug(CallTime)
-            super().save(update_fields=['slug'])
+        self._loaded_date = self.date
+        self._loaded_time = self.time
 
     def has_changed(self):
-        if not self.pk:
+        """Whether date or time differ from what was loaded from the database"""
+        if not self.pk or not hasattr(self, '_loaded_time'):
             return False
-        original = CallTime.objects.get(pk=self.pk)
-        return self.date != original.date or self.time != original.time
+        return self.date != self._loaded_date or self.time != self._loaded_time
 
     def __str__(self):
         return f"{self.name} at {self.time} ({self.event})"
@@ -232,7 +343,13 @@ class CallTime(models.Model):
     def get_by_natural_key(cls, slug):
         return cls.objects.get(slug=slug)
 
-class LaborRequirement(models.Model):
+
+def call_time_scope(call_time_id):
+    """(event_id, company_id) of a call time, for the denormalized LaborRequest/TimeEntry columns"""
+    return CallTime.objects.filter(id=call_time_id).values_list('event_id', 'event__company_id').first() or (None, None)
+
+
+class LaborRequirement(RandomSlugMixin, models.Model):
     call_time = models.ForeignKey(CallTime, on_delete=models.CASCADE, related_name='labor_requirements', null=True, blank=True)
     labor_type = models.ForeignKey(LaborType, on_delete=models.CASCADE)
     needed_labor = models.IntegerField()
@@ -243,8 +360,6 @@ class LaborRequirement(models.Model):
     def save(self, *args, **kwargs):
         if not self.pk and self.minimum_hours is None and self.call_time:
             self.minimum_hours = self.call_time.minimum_hours
-        if not self.slug:
-            self.slug = generate_unique_slug(LaborRequirement)
         if self.fcfs_positions > self.needed_labor:
             self.fcfs_positions = self.needed_labor
         super().save(*args, **kwargs)
@@ -285,11 +400,60 @@ class LaborRequest(models.Model):
     reminder_sent = models.BooleanField(default=False)
     canceled = models.BooleanField(default=False)
     ncns = models.BooleanField(default=False)
+    # denormalized from labor_requirement.call_time.event so company and event scoping skip the joins
+    event = models.ForeignKey('Event', on_delete=models.CASCADE, related_name='labor_requests', null=True, blank=True, editable=False)
+    company = models.ForeignKey('Company', on_delete=models.CASCADE, related_name='labor_requests', null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'availability_response'], name='laborreq_company_response_idx'),
+            models.Index(fields=['labor_requirement', 'requested'], name='laborreq_lr_requested_idx'),
+            models.Index(fields=['labor_requirement', 'confirmed'], name='laborreq_lr_confirmed_idx'),
+            models.Index(fields=['labor_requirement', 'availability_response'], name='laborreq_lr_response_idx'),
+            models.Index(fields=['worker', 'requested', 'sms_sent'], name='laborreq_worker_req_sms_idx'),
+            models.Index(fields=['token_short'], name='laborreq_token_short_idx', condition=Q(token_short__isnull=False)),
+            models.Index(fields=['event_token'], name='laborreq_event_token_idx', condition=Q(event_token__isnull=False)),
+        ]
 
     def __str__(self):
         worker_name = self.worker.name if self.worker.name else "Unnamed Worker"
         return f"Request: {worker_name} - {self.labor_requirement.labor_type.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_labor_requirement_id = instance.__dict__.get('labor_requirement_id')
+        return instance
+
+    def assign_scope(self):
+        """Copy event and company down from the labor requirement, without a query when they are loaded"""
+        labor_requirement = self._state.fields_cache.get('labor_requirement')
+        call_time = None
+        if labor_requirement is not None and labor_requirement.id == self.labor_requirement_id:
+            call_time = labor_requirement._state.fields_cache.get('call_time')
+        if call_time is not None and 'event' in call_time._state.fields_cache:
+            self.event_id, self.company_id = call_time.event_id, call_time.event.company_id
+        else:
+            self.event_id, self.company_id = LaborRequirement.objects.filter(id=self.labor_requirement_id).values_list(
+                'call_time__event_id', 'call_time__event__company_id').first() or (None, None)
+
+    def save(self, *args, **kwargs):
+        if self.event_id is None or self.company_id is None or \
+                self.labor_requirement_id != getattr(self, '_loaded_labor_requirement_id', self.labor_requirement_id):
+            self.assign_scope()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'event', 'company'}
+        super().save(*args, **kwargs)
+        self._loaded_labor_requirement_id = self.labor_requirement_id
+
+    @property
+    def time_entry(self):
+        """First time entry, read from prefetched time_entries when available"""
+        if 'time_entries' in getattr(self, '_prefetched_objects_cache', {}):
+            time_entries = self.time_entries.all()
+            return time_entries[0] if time_entries else None
+        return self.time_entries.first()
+
 
 class TimeChangeConfirmation(models.Model):
     token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
@@ -304,7 +468,30 @@ class TimeChangeConfirmation(models.Model):
         return f"Time change confirmation for {self.labor_request}"
     
 
-class Worker(models.Model):
+def e164(phone):
+    """Normalize a North American number to +1XXXXXXXXXX; anything else is returned stripped of punctuation"""
+    phone = phone.replace('-', '')
+    phone = phone.replace(' ', '')
+    phone = phone.replace('(', '')
+    phone = phone.replace(')', '')
+    phone = phone.replace('.', '')
+    if phone.startswith('+1'):
+        phone = phone[2:]  # Remove +1 prefix
+    if len(phone) == 10 and phone.isdigit():
+        return f"+1{phone}"
+    elif len(phone) == 11 and phone.isdigit():
+        return f"+{phone}"
+    elif len(phone) == 12 and phone.startswith('+'):
+        return phone
+    return phone
+
+
+WORKER_SLUG_ALPHABET = string.ascii_lowercase + string.digits
+
+
+class Worker(RandomSlugMixin, models.Model):
+    slug_length = 10
+    slug_alphabet = WORKER_SLUG_ALPHABET
     user = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='workers')
     phone_number = models.CharField(max_length=15)  # No unique constraint
     name = models.CharField(max_length=200, blank=True)
@@ -320,6 +507,10 @@ class Worker(models.Model):
     notes = models.TextField(blank=True, null=True)
     is_steward = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['phone_number'], name='worker_phone_idx'),
+        ]
 
     def add_company(self, company):
         if not self.company:
@@ -327,20 +518,7 @@ class Worker(models.Model):
             self.save()
 
     def full_phone_number(self):
-        phone = self.phone_number.replace('-', '')
-        phone = phone.replace(' ', '')
-        phone = phone.replace('(', '')
-        phone = phone.replace(')', '')
-        phone = phone.replace('.', '')
-        if phone.startswith('+1'):
-            phone = phone[2:]  # Remove +1 prefix
-        if len(phone) == 10 and phone.isdigit():
-            return f"+1{phone}"
-        elif len(phone) == 11 and phone.isdigit():
-            return f"+{phone}"
-        elif len(phone) == 12 and phone.startswith('+'):
-            return phone
-        return phone
+        return e164(self.phone_number)
 
     def formatted_phone_number(self):
         phone = self.phone_number.replace('-', '').replace('(', '').replace(')', '').replace(' ', '')
@@ -361,12 +539,6 @@ class Worker(models.Model):
         return cls.objects.get(slug=slug)
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            while True:
-                slug = ''.join(random.choices(string.ascii_lowercase + string.digits, k=10))
-                if not Worker.objects.filter(slug=slug).exists():
-                    self.slug = slug
-                    break
         self.phone_number = self.full_phone_number()
 
         super().save(*args, **kwargs)
@@ -399,6 +571,9 @@ class TimeEntry(models.Model):
     end_time = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # denormalized from call_time.event, like LaborRequest
+    event = models.ForeignKey('Event', on_delete=models.CASCADE, related_name='time_entries', null=True, blank=True, editable=False)
+    company = models.ForeignKey('Company', on_delete=models.CASCADE, related_name='time_entries', null=True, blank=True, editable=False)
 
     class Meta:
         unique_together = ('labor_request', 'worker', 'call_time')
@@ -406,83 +581,42 @@ class TimeEntry(models.Model):
     def __str__(self):
         return f"{self.worker.name} - {self.call_time.name} ({self.start_time} to {self.end_time})"
 
-    @property
-    def normal_hours(self):
-        if not (self.start_time and self.end_time):
-            return 0
-        normal_hours = 0
-        current_time = self.start_time
-        trigger_duration = self.labor_request.labor_requirement.call_time.event.company.meal_penalty_trigger_time
-        breaks = list(self.meal_breaks.order_by('break_time'))
-        unpaid_breaks = self.meal_breaks.filter(break_type='unpaid').count()
-
-        for i, meal_break in enumerate(breaks):
-            break_start = meal_break.break_time
-            break_end = break_start + timedelta(minutes=30) if meal_break.break_type == 'paid' else break_start + timedelta(hours=1)
-            trigger_time = current_time + timedelta(hours=trigger_duration)
-
-            if break_start > trigger_time:
-                normal_hours += (trigger_time - current_time).total_seconds() / 3600
-                current_time = trigger_time
-            else:
-                normal_hours += (break_start - current_time).total_seconds() / 3600
-                current_time = break_start
-
-            if meal_break.break_type == 'paid':
-                paid_duration = (break_end - break_start).total_seconds() / 3600
-                normal_hours += paid_duration
-
-            current_time = break_end
-            if current_time >= self.end_time:
-                break
-
-        if current_time < self.end_time:
-            trigger_time = current_time + timedelta(hours=trigger_duration)
-            end_normal = min(trigger_time, self.end_time)
-            normal_hours += (end_normal - current_time).total_seconds() / 3600
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_call_time_id = instance.__dict__.get('call_time_id')
+        return instance
 
-        #normal_hours -= unpaid_breaks
-        return max(0, normal_hours)
+    def save(self, *args, **kwargs):
+        if self.event_id is None or self.company_id is None or \
+                self.call_time_id != getattr(self, '_loaded_call_time_id', self.call_time_id):
+            self.event_id, self.company_id = call_time_scope(self.call_time_id)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'event', 'company'}
+        super().save(*args, **kwargs)
+        self._loaded_call_time_id = self.call_time_id
 
-    @property
-    def meal_penalty_hours(self):
+    def payroll_hours(self):
+        """Normal, meal penalty and total hours. Uses prefetched meal breaks when available."""
+        from callManager.utils.payroll import NO_HOURS, calculate_hours
+        if getattr(self, '_payroll_hours', None) is not None:
+            return self._payroll_hours
         if not (self.start_time and self.end_time):
-            return 0
-        penalty_hours = 0
-        current_time = self.start_time
+            return NO_HOURS
         trigger_duration = self.labor_request.labor_requirement.call_time.event.company.meal_penalty_trigger_time
-        breaks = list(self.meal_breaks.order_by('break_time'))
-
-        for i, meal_break in enumerate(breaks):
-            break_start = meal_break.break_time
-            break_end = break_start + timedelta(minutes=30) if meal_break.break_type == 'paid' else break_start + timedelta(hours=1)
-            trigger_time = current_time + timedelta(hours=trigger_duration)
-
-            if trigger_time < break_start:
-                penalty_end = min(break_start, self.end_time)
-                if penalty_end > trigger_time:
-                    penalty_hours += (penalty_end - trigger_time).total_seconds() / 3600
-            current_time = break_end
-
-            if current_time >= self.end_time:
-                break
+        return calculate_hours(self.start_time, self.end_time, self.meal_breaks.all(), trigger_duration)
 
-        if current_time < self.end_time:
-            trigger_time = current_time + timedelta(hours=trigger_duration)
-            if self.end_time > trigger_time:
-                penalty_hours += (self.end_time - trigger_time).total_seconds() / 3600
+    @property
+    def normal_hours(self):
+        return self.payroll_hours().normal_hours
 
-        return max(0, penalty_hours)
+    @property
+    def meal_penalty_hours(self):
+        return self.payroll_hours().meal_penalty_hours
 
     @property
     def total_hours_worked(self):
-        if not (self.start_time and self.end_time):
-            return 0
-        delta = self.end_time - self.start_time
-        total_hours = delta.total_seconds() / 3600
-        unpaid_breaks = self.meal_breaks.filter(break_type='unpaid').count()
-        total_hours -= unpaid_breaks
-        return max(0, total_hours)
+        return self.payroll_hours().total_hours_worked
 
 class MealBreak(models.Model):
     BREAK_TYPES = [
@@ -508,6 +642,20 @@ class TemporaryScanner(models.Model):
         return f"Temporary Scanner for {self.event.event_name} ({self.token})"
 
 
+class StationScan(models.Model):
+    """A scan synced from a station's offline queue, kept so a resent scan returns its result instead of punching again"""
+    scan_id = models.UUIDField(unique=True)
+    event = models.ForeignKey('Event', on_delete=models.CASCADE, related_name='station_scans', null=True, blank=True)
+    worker = models.ForeignKey('Worker', on_delete=models.SET_NULL, related_name='station_scans', null=True, blank=True)
+    scanned_at = models.DateTimeField(null=True, blank=True)
+    success = models.BooleanField(default=False)
+    message = models.CharField(max_length=200)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Station scan {self.scan_id}: {self.message}"
+
+
 class LocationProfile(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='location_profiles')
     name = models.CharField(max_length=200)
@@ -566,16 +714,17 @@ class Notifications(models.Model):
     sent_at = models.DateTimeField(auto_now_add=True)
     read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'read', 'sent_at'], name='notif_company_read_sent_idx'),
+        ]
+
 
-class UserProfile(models.Model):
+class UserProfile(RandomSlugMixin, models.Model):
     user = models.OneToOneField('auth.User', on_delete=models.CASCADE, related_name='profile')
     phone_number = models.CharField(max_length=20, blank=True, null=True)
     slug = models.CharField(max_length=10, unique=True, editable=False, null=True, blank=True)
 
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = generate_unique_slug(UserProfile)
-        super().save(*args, **kwargs)
     def __str__(self):
         return f"Profile for {self.user.username}"
 
@@ -630,6 +779,16 @@ class AltPhone(models.Model):
     phone_number = models.CharField(max_length=20)
     label = models.CharField(max_length=100, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['phone_number'], name='altphone_phone_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # stored like Worker.phone_number so inbound texts match either table with an index lookup
+        self.phone_number = e164(self.phone_number)
+        super().save(*args, **kwargs)
+
     def formatted_phone_number(self):
         phone = self.phone_number.replace('-', '').replace('(', '').replace(')', '').replace(' ', '')
         if phone.startswith('+1'):
@@ -643,3 +802,108 @@ class ScheduledReminder(models.Model):
     time_to_send = models.DateTimeField()
     def __str__(self):
         return f"Reminder for {self.call_time} at {self.time_to_send}"
+
+
+class CompanyCounters(models.Model):
+    """Dashboard totals for a company, kept current by callManager.utils.counter_signals.
+
+    The *_by_date fields map ISO dates to counts so "upcoming" figures can be
+    read from this single row.
+    """
+    company = models.OneToOneField(Company, on_delete=models.CASCADE, related_name='counters')
+    pending_count = models.PositiveIntegerField(default=0)
+    declined_count = models.PositiveIntegerField(default=0)
+    unfilled_spots = models.PositiveIntegerField(default=0)
+    pending_by_date = models.JSONField(default=dict, help_text="Pending requests with SMS sent, by call date")
+    declined_by_date = models.JSONField(default=dict, help_text="Declined requests by call date")
+    events_by_end_date = models.JSONField(default=dict, help_text="Events by end date")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @staticmethod
+    def sum_from(counts, day):
+        start = day.isoformat()
+        return sum(count for key, count in counts.items() if key >= start)
+
+    def upcoming_pending(self, today):
+        return self.sum_from(self.pending_by_date, today)
+
+    def upcoming_declined(self, today):
+        return self.sum_from(self.declined_by_date, today)
+
+    def upcoming_events(self, today):
+        return self.sum_from(self.events_by_end_date, today)
+
+    def __str__(self):
+        return f"Counters for {self.company.name}"
+
+
+class EventCounters(models.Model):
+    """Per-event fill status backing the dashboards; see CompanyCounters"""
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name='counters')
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='event_counters')
+    end_date = models.DateField(null=True, blank=True)
+    pending_count = models.PositiveIntegerField(default=0)
+    declined_count = models.PositiveIntegerField(default=0)
+    unfilled_requirements = models.PositiveIntegerField(default=0)
+    unfilled_spots = models.PositiveIntegerField(default=0)
+    labor_needs_text = models.TextField(default="All calls filled")
+    pending_by_date = models.JSONField(default=dict)
+    declined_by_date = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Counters for {self.event.event_name}"
+
+
+class WorkerImportJob(models.Model):
+    """Progress of a contact import run by callManager.utils.worker_import"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    SOURCE_CHOICES = [
+        ('vcf', 'VCF'),
+        ('json', 'JSON'),
+    ]
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='worker_imports')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    imported = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, help_text="[{'row': n, 'name': ..., 'message': ...}]")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_source_display()} import for {self.company.name} ({self.status})"
+
+
+class ReportExport(models.Model):
+    """A report rendered in the background, downloadable once done"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    REPORT_CHOICES = [
+        ('workers_pdf', 'Workers Report PDF'),
+    ]
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='report_exports')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    report = models.CharField(max_length=20, choices=REPORT_CHOICES)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    row_count = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='report_exports/', null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_report_display()} for {self.company.name} ({self.status})"
@@ -113,6 +113,8 @@ urlpatterns = [
     path('sms-usage/', reports.sms_usage_report, name='sms_usage_report'),
     path('callman-admin/sms-usage/', reports.admin_sms_usage_report, name='admin_sms_usage_report'),
     path('event-workers-report/', reports.event_workers_report, name='event_workers_report'),
+    path('report-exports/<int:export_id>/', reports.report_export_status, name='report_export_status'),
+    path('report-exports/<int:export_id>/download/', reports.report_export_download, name='report_export_download'),
     
     #invites
     path('steward/invite/', invites.steward_invite, name='steward_invite'),
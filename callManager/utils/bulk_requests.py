@@ -0,0 +1,104 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from callManager.models import LaborRequest, LaborRequirement, Notifications, Worker
+from callManager.utils.counters import schedule_event_refresh
+from callManager.utils.fill_status import schedule_fill_status_for
+from callManager.utils.station_session import invalidate_station_rosters
+from callManager.view_files.notify import push_notification
+
+# action -> (fields written, Notifications.response, verb used in the notification)
+BULK_ACTIONS = {
+    'confirm': ({'availability_response': 'yes', 'canceled': False, 'confirmed': True}, 'Confirmed', 'confirmed'),
+    'decline': ({'availability_response': 'no', 'confirmed': False}, 'Declined', 'declined'),
+    'cancel': ({'availability_response': 'no', 'confirmed': False, 'canceled': True}, 'Canceled', 'canceled'),
+}
+
+
+def remaining_capacity(labor_requirement_ids):
+    """{labor_requirement_id: open confirmed slots}, for requirements locked by the caller"""
+    requirements = LaborRequirement.objects.filter(id__in=labor_requirement_ids).annotate(
+        confirmed_count=Count('labor_requests', filter=Q(labor_requests__confirmed=True)))
+    return {lr.id: max(lr.needed_labor - lr.confirmed_count, 0) for lr in requirements}
+
+
+def apply_bulk_action(company, action, labor_request_ids):
+    """Confirm, decline or cancel many labor requests of `company` at once.
+
+    Requests are loaded in one query scoped to the company, so ids of other
+    companies are reported as not found. Confirmations take the affected
+    requirements' rows FOR UPDATE and are granted in id order while the
+    requirement has open slots; the rest are reported as full, and requests
+    already confirmed are reported as such. Accepted rows are written with a
+    single update(), followed by one notification and one fill status delta per
+    requirement. Returns (updated ids, errors).
+    """
+    fields, response, verb = BULK_ACTIONS[action]
+    errors = []
+    with transaction.atomic():
+        labor_requests = list(LaborRequest.objects.filter(id__in=labor_request_ids, company=company).only(
+            'id', 'labor_requirement_id', 'worker_id', 'event_id', 'confirmed', 'canceled').order_by('id'))
+        found = {labor_request.id for labor_request in labor_requests}
+        errors.extend({'id': request_id, 'error': 'Not found'} for request_id in labor_request_ids if request_id not in found)
+
+        if action == 'confirm':
+            requirement_ids = sorted({labor_request.labor_requirement_id for labor_request in labor_requests})
+            # lock in id order, so concurrent bulk confirms can't both take the last slot or deadlock
+            list(LaborRequirement.objects.select_for_update().filter(id__in=requirement_ids).order_by('id').values_list('id'))
+            capacity = remaining_capacity(requirement_ids)
+            accepted = []
+            for labor_request in labor_requests:
+                if labor_request.confirmed:
+                    errors.append({'id': labor_request.id, 'error': 'Already confirmed'})
+                    continue
+                if capacity[labor_request.labor_requirement_id] > 0:
+                    capacity[labor_request.labor_requirement_id] -= 1
+                    accepted.append(labor_request)
+                else:
+                    errors.append({'id': labor_request.id, 'error': 'Requirement is full'})
+        elif action == 'cancel':
+            # skip rows that are already canceled, so the worker's cancel count isn't bumped twice
+            accepted = [labor_request for labor_request in labor_requests if not labor_request.canceled]
+        else:
+            accepted = labor_requests
+        if not accepted:
+            return [], errors
+
+        updated_ids = [labor_request.id for labor_request in accepted]
+        LaborRequest.objects.filter(id__in=updated_ids).update(**fields)
+        if action == 'cancel':
+            cancellations = Counter(labor_request.worker_id for labor_request in accepted)
+            for count in set(cancellations.values()):
+                Worker.objects.filter(id__in=[worker_id for worker_id, n in cancellations.items() if n == count]).update(
+                    canceled_requests=F('canceled_requests') + count)
+
+        by_requirement = {}
+        for labor_request in accepted:
+            by_requirement.setdefault(labor_request.labor_requirement_id, []).append(labor_request)
+        notifications = []
+        for labor_requirement in LaborRequirement.objects.filter(id__in=by_requirement).select_related(
+                'call_time__event', 'labor_type').order_by('id'):
+            requests = by_requirement[labor_requirement.id]
+            call_time = labor_requirement.call_time
+            workers = f"{len(requests)} worker{'s' if len(requests) != 1 else ''}"
+            notifications.append(Notifications(
+                company=company,
+                event=call_time.event,
+                call_time=call_time,
+                labor_requirement=labor_requirement,
+                labor_request_id=requests[0].id,
+                message=f"{workers} {verb} for {call_time.event.event_name} - {call_time.name} - {labor_requirement.labor_type.name}",
+                response=response,
+            ))
+        Notifications.objects.bulk_create(notifications)
+        push_notification(company, changed=[notification.id for notification in notifications if notification.id])
+
+        # update() sends no post_save, so counters, fill status and station rosters are scheduled here
+        event_ids = {labor_request.event_id for labor_request in accepted}
+        for event_id in event_ids:
+            schedule_event_refresh(event_id)
+        schedule_fill_status_for(updated_ids)
+        invalidate_station_rosters(event_ids)
+    return updated_ids, errors
@@ -0,0 +1,148 @@
+from django.db import IntegrityError, transaction
+
+from callManager.models import (
+        SLUG_RETRIES,
+        CallTime,
+        Company,
+        Event,
+        LaborRequest,
+        LaborRequirement,
+        call_unixtime_for,
+        unique_random_slugs,
+        )
+from callManager.utils.counters import schedule_event_refresh
+from callManager.utils.fill_status import schedule_fill_status_for_requirements
+from callManager.utils.short_tokens import generate_short_tokens
+
+BULK_BATCH_SIZE = 500
+# Event fields carried over to a cloned event; dates and slug are set by the clone
+EVENT_CLONE_FIELDS = [
+    'event_name', 'is_single_day', 'event_description', 'location_profile_id', 'company_id', 'steward_id',
+    'minimum_hours', 'meal_penalty_trigger_time', 'hour_round_up',
+]
+
+
+def bulk_create_with_slugs(model, objs):
+    """bulk_create slugged rows, retrying with fresh slugs if one was taken, and make sure each has its pk"""
+    for attempt in range(SLUG_RETRIES):
+        for obj, slug in zip(objs, unique_random_slugs(len(objs), model.slug_length, model.slug_alphabet)):
+            obj.slug = slug
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(objs, batch_size=BULK_BATCH_SIZE)
+            break
+        except IntegrityError:
+            if attempt == SLUG_RETRIES - 1:
+                raise
+            for obj in objs:
+                obj.pk = None
+    if objs and objs[0].pk is None:
+        # backends without RETURNING (MySQL) don't set pks on bulk_create; slugs are unique, so look them up
+        ids = dict(model.objects.filter(slug__in=[obj.slug for obj in objs]).values_list('slug', 'id'))
+        for obj in objs:
+            obj.pk = ids[obj.slug]
+    return objs
+
+
+def clone_call_times(copies, include_requests=True):
+    """Copy call times with their labor requirements and, optionally, their labor requests.
+
+    `copies` is a list of (source call time, target event, overrides) where overrides
+    sets any of name/date/time/minimum_hours/message on the copy. Copied requests
+    start over as requested-but-unsent, keeping worker and reservation. Everything is
+    written with bulk_create, so the number of queries doesn't grow with the number of
+    copies, requirements or requests. Returns the new call times in `copies` order.
+    """
+    source_ids = {source.id for source, _, _ in copies}
+    requirements_by_call_time = {}
+    for labor_requirement in LaborRequirement.objects.filter(call_time_id__in=source_ids).order_by('id'):
+        requirements_by_call_time.setdefault(labor_requirement.call_time_id, []).append(labor_requirement)
+    requests_by_requirement = {}
+    if include_requests:
+        for labor_request in LaborRequest.objects.filter(labor_requirement__call_time_id__in=source_ids).only(
+                'id', 'labor_requirement_id', 'worker_id', 'is_reserved').order_by('id'):
+            requests_by_requirement.setdefault(labor_request.labor_requirement_id, []).append(labor_request)
+
+    timezones = dict(Company.objects.filter(
+        id__in={event.company_id for _, event, _ in copies}).values_list('id', 'timezone'))
+
+    with transaction.atomic():
+        new_call_times = []
+        for source, event, overrides in copies:
+            call_time = CallTime(
+                event=event,
+                name=overrides.get('name', source.name),
+                date=overrides.get('date', source.date),
+                time=overrides.get('time', source.time),
+                minimum_hours=source.minimum_hours if overrides.get('minimum_hours') is None else overrides['minimum_hours'],
+                message=overrides.get('message', source.message),
+            )
+            call_time.original_date = call_time.date
+            call_time.original_time = call_time.time
+            call_time.call_unixtime = call_unixtime_for(call_time.date, call_time.time, timezones[event.company_id])
+            new_call_times.append(call_time)
+        bulk_create_with_slugs(CallTime, new_call_times)
+
+        new_requirements = []
+        sources = []
+        for (source, _, _), call_time in zip(copies, new_call_times):
+            for labor_requirement in requirements_by_call_time.get(source.id, []):
+                new_requirements.append(LaborRequirement(
+                    call_time=call_time,
+                    labor_type_id=labor_requirement.labor_type_id,
+                    needed_labor=labor_requirement.needed_labor,
+                    minimum_hours=labor_requirement.minimum_hours,
+                    fcfs_positions=min(labor_requirement.fcfs_positions, labor_requirement.needed_labor),
+                ))
+                sources.append(labor_requirement)
+        bulk_create_with_slugs(LaborRequirement, new_requirements)
+
+        new_requests = []
+        for source_requirement, labor_requirement in zip(sources, new_requirements):
+            call_time = labor_requirement.call_time
+            for labor_request in requests_by_requirement.get(source_requirement.id, []):
+                new_requests.append(LaborRequest(
+                    labor_requirement=labor_requirement,
+                    worker_id=labor_request.worker_id,
+                    event_id=call_time.event_id,
+                    company_id=call_time.event.company_id,
+                    requested=True,
+                    sms_sent=False,
+                    is_reserved=labor_request.is_reserved,
+                ))
+        for labor_request, token in zip(new_requests, generate_short_tokens(len(new_requests))):
+            labor_request.token_short = token
+        LaborRequest.objects.bulk_create(new_requests, batch_size=BULK_BATCH_SIZE)
+
+        # bulk_create skips the post_save handlers that keep counters and fill status current
+        for event_id in {call_time.event_id for call_time in new_call_times}:
+            schedule_event_refresh(event_id)
+        schedule_fill_status_for_requirements([labor_requirement.id for labor_requirement in new_requirements])
+    return new_call_times
+
+
+def clone_events(event, start_dates, include_requests=False, created_by=None):
+    """Copy an event with its whole call time subtree once per start date, shifting every date.
+
+    Returns the new events in `start_dates` order.
+    """
+    call_times = list(event.call_times.order_by('date', 'time', 'id'))
+    with transaction.atomic():
+        new_events = []
+        for start_date in start_dates:
+            shift = start_date - event.start_date
+            new_event = Event(
+                **{field: getattr(event, field) for field in EVENT_CLONE_FIELDS},
+                start_date=start_date,
+                end_date=event.end_date + shift if event.end_date else None,
+                created_by_id=created_by.id if created_by else event.created_by_id,
+            )
+            new_events.append(new_event)
+        bulk_create_with_slugs(Event, new_events)
+        clone_call_times([
+            (call_time, new_event, {'date': call_time.date + (new_event.start_date - event.start_date)})
+            for new_event in new_events
+            for call_time in call_times], include_requests=include_requests)
+        for new_event in new_events:
+            schedule_event_refresh(new_event.id)
+    return new_events
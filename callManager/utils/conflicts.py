@@ -0,0 +1,67 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from callManager.models import LaborRequest
+
+CONFLICT_WINDOW = timedelta(hours=5)
+
+
+def conflicting_requests(labor_requirement, workers=None, requested_only=False, window=CONFLICT_WINDOW):
+    """Labor requests of the company whose call falls within `window` of the requirement's call.
+
+    Uses CallTime.call_unixtime as a range so the whole company is checked in one query.
+    The requirement's own requests are included; callers decide how to treat them.
+    """
+    call_time = labor_requirement.call_time
+    seconds = int(window.total_seconds())
+    queryset = LaborRequest.objects.filter(
+        worker__company_id=call_time.event.company_id,
+        labor_requirement__call_time__call_unixtime__range=(call_time.call_unixtime - seconds, call_time.call_unixtime + seconds),
+    ).select_related(
+        'labor_requirement__call_time__event__location_profile',
+        'labor_requirement__labor_type',
+    ).order_by('labor_requirement__call_time__call_unixtime', 'id')
+    if workers is not None:
+        queryset = queryset.filter(worker__in=workers)
+    if requested_only:
+        queryset = queryset.filter(requested=True)
+    return queryset
+
+
+def conflicts_by_worker(labor_requirement, workers=None, requested_only=False, window=CONFLICT_WINDOW):
+    """Same as conflicting_requests, grouped into {worker_id: [labor_request, ...]}"""
+    grouped = defaultdict(list)
+    for labor_request in conflicting_requests(labor_requirement, workers, requested_only, window):
+        grouped[labor_request.worker_id].append(labor_request)
+    return grouped
+
+
+def request_status(labor_request):
+    if labor_request.confirmed:
+        return 'Confirmed'
+    if labor_request.availability_response == 'yes':
+        return 'Available'
+    if labor_request.availability_response == 'no':
+        return 'Declined'
+    return 'Pending'
+
+
+def worker_conflicts_context(grouped):
+    """Shape grouped conflicts the way the fill list templates expect them"""
+    worker_conflicts = {}
+    for worker_id, labor_requests in grouped.items():
+        worker_data = {'conflicts': [], 'is_confirmed': False}
+        for labor_request in labor_requests:
+            call_time = labor_request.labor_requirement.call_time
+            worker_data['conflicts'].append({
+                'event': call_time.event.event_name,
+                'call_time': f"{call_time.name} at {call_time.time}",
+                'labor_type': labor_request.labor_requirement.labor_type.name,
+                'status': request_status(labor_request),
+                'call_time_id': call_time.id,
+                'labor_type_id': labor_request.labor_requirement.labor_type.id,
+            })
+            if labor_request.confirmed:
+                worker_data['is_confirmed'] = True
+        worker_conflicts[worker_id] = worker_data
+    return worker_conflicts
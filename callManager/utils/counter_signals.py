@@ -0,0 +1,55 @@
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from callManager.models import CallTime, Event, LaborRequest, LaborRequirement
+from callManager.utils.counters import (
+        begin_request,
+        finish_request,
+        remove_event_counters,
+        schedule_event_refresh,
+        )
+
+
+@receiver(request_started)
+def request_began(sender, **kwargs):
+    begin_request()
+
+
+@receiver(request_finished)
+def request_ended(sender, **kwargs):
+    # event refreshes scheduled during the request run once each, after the response
+    finish_request()
+
+
+@receiver(post_save, sender=LaborRequest)
+@receiver(post_delete, sender=LaborRequest)
+def labor_request_changed(sender, instance, **kwargs):
+    # event_id is denormalized onto the request when it is saved
+    schedule_event_refresh(instance.event_id)
+
+
+@receiver(post_save, sender=LaborRequirement)
+@receiver(post_delete, sender=LaborRequirement)
+def labor_requirement_changed(sender, instance, **kwargs):
+    if LaborRequirement.call_time.is_cached(instance):
+        event_id = instance.call_time.event_id
+    else:
+        event_id = CallTime.objects.filter(id=instance.call_time_id).values_list('event_id', flat=True).first()
+    schedule_event_refresh(event_id)
+
+
+@receiver(post_save, sender=CallTime)
+@receiver(post_delete, sender=CallTime)
+def call_time_changed(sender, instance, **kwargs):
+    schedule_event_refresh(instance.event_id)
+
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance, **kwargs):
+    schedule_event_refresh(instance.id)
+
+
+@receiver(pre_delete, sender=Event)
+def event_deleted(sender, instance, **kwargs):
+    remove_event_counters(instance.id)
@@ -0,0 +1,234 @@
+import logging
+import threading
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from callManager.models import (
+        Company,
+        CompanyCounters,
+        Event,
+        EventCounters,
+        LaborRequest,
+        LaborRequirement,
+        )
+
+logger = logging.getLogger('callManager')
+
+_pending = threading.local()
+
+
+def compute_event_values(event_id, end_date):
+    """Counters for one event, straight from the request tables"""
+    requirements = LaborRequirement.objects.filter(
+        call_time__event_id=event_id).select_related('labor_type').annotate(
+        confirmed_count=Count('labor_requests', filter=Q(labor_requests__confirmed=True))).order_by('id')
+    unfilled_requirements = [lr for lr in requirements if lr.confirmed_count < lr.needed_labor]
+    unfilled_count = len(unfilled_requirements)
+    unfilled_spots = sum(lr.needed_labor - lr.confirmed_count for lr in unfilled_requirements)
+    if unfilled_count > 3:
+        labor_needs_text = f"{unfilled_count} unfilled, {unfilled_spots} total labor needed"
+    elif unfilled_count > 0:
+        labor_needs_text = ", ".join(
+            f"{lr.labor_type.name}: {lr.needed_labor - lr.confirmed_count} needed"
+            for lr in unfilled_requirements)
+    else:
+        labor_needs_text = "All calls filled"
+
+    values = {
+        'end_date': end_date,
+        'pending_count': 0,
+        'declined_count': 0,
+        'unfilled_requirements': unfilled_count,
+        'unfilled_spots': unfilled_spots,
+        'labor_needs_text': labor_needs_text,
+        'pending_by_date': {},
+        'declined_by_date': {},
+    }
+    rows = LaborRequest.objects.filter(
+        event_id=event_id).filter(
+        Q(availability_response__isnull=True) | Q(availability_response='no')).values(
+        'labor_requirement__call_time__date', 'availability_response', 'sms_sent').annotate(
+        count=Count('id'))
+    for row in rows:
+        day = row['labor_requirement__call_time__date']
+        key = day.isoformat() if day else None
+        if row['availability_response'] is None:
+            values['pending_count'] += row['count']
+            if key and row['sms_sent']:
+                values['pending_by_date'][key] = values['pending_by_date'].get(key, 0) + row['count']
+        else:
+            values['declined_count'] += row['count']
+            if key:
+                values['declined_by_date'][key] = values['declined_by_date'].get(key, 0) + row['count']
+    return values
+
+
+def event_values(event_counters):
+    return {
+        'end_date': event_counters.end_date,
+        'pending_count': event_counters.pending_count,
+        'declined_count': event_counters.declined_count,
+        'unfilled_requirements': event_counters.unfilled_requirements,
+        'unfilled_spots': event_counters.unfilled_spots,
+        'labor_needs_text': event_counters.labor_needs_text,
+        'pending_by_date': event_counters.pending_by_date,
+        'declined_by_date': event_counters.declined_by_date,
+    }
+
+
+def merge_counts(total, old, new):
+    merged = dict(total)
+    for key in set(old) | set(new):
+        count = merged.get(key, 0) + new.get(key, 0) - old.get(key, 0)
+        if count > 0:
+            merged[key] = count
+        else:
+            merged.pop(key, None)
+    return merged
+
+
+def apply_event_delta(company_counters, old, new):
+    for field in ('pending_count', 'declined_count', 'unfilled_spots'):
+        setattr(company_counters, field, max(0, getattr(company_counters, field) + new[field] - old[field]))
+    for field in ('pending_by_date', 'declined_by_date'):
+        setattr(company_counters, field, merge_counts(getattr(company_counters, field), old[field], new[field]))
+    old_end = {old['end_date'].isoformat(): 1} if old['end_date'] else {}
+    new_end = {new['end_date'].isoformat(): 1} if new['end_date'] else {}
+    company_counters.events_by_end_date = merge_counts(company_counters.events_by_end_date, old_end, new_end)
+
+
+def rebuild_company_counters(company_id):
+    """Recompute every counter for a company from scratch"""
+    with transaction.atomic():
+        company_counters, _ = CompanyCounters.objects.select_for_update().get_or_create(company_id=company_id)
+        empty = CompanyCounters(company_id=company_id)
+        for field in ('pending_count', 'declined_count', 'unfilled_spots', 'pending_by_date', 'declined_by_date', 'events_by_end_date'):
+            setattr(company_counters, field, getattr(empty, field))
+        EventCounters.objects.filter(company_id=company_id).delete()
+        zero = event_values(EventCounters())
+        event_rows = []
+        for event_id, end_date in Event.objects.filter(company_id=company_id).values_list('id', 'end_date'):
+            values = compute_event_values(event_id, end_date)
+            apply_event_delta(company_counters, zero, values)
+            event_rows.append(EventCounters(event_id=event_id, company_id=company_id, **values))
+        EventCounters.objects.bulk_create(event_rows)
+        company_counters.save()
+    return company_counters
+
+
+def locked_company_counters(company_id):
+    """Lock the company row. Callers rebuild the company when the row was just created."""
+    company_counters, created = CompanyCounters.objects.select_for_update().get_or_create(company_id=company_id)
+    return company_counters, created
+
+
+def refresh_event_counters(event_id):
+    event = Event.objects.filter(id=event_id).values('company_id', 'end_date').first()
+    if event is None:
+        return
+    with transaction.atomic():
+        company_counters, created = locked_company_counters(event['company_id'])
+        if created:
+            rebuild_company_counters(event['company_id'])
+            return
+        event_counters, _ = EventCounters.objects.select_for_update().get_or_create(
+            event_id=event_id, defaults={'company_id': event['company_id']})
+        old = event_values(event_counters)
+        new = compute_event_values(event_id, event['end_date'])
+        apply_event_delta(company_counters, old, new)
+        for field, value in new.items():
+            setattr(event_counters, field, value)
+        event_counters.save()
+        company_counters.save()
+
+
+def remove_event_counters(event_id):
+    """Take a deleted event out of the company totals"""
+    company_id = EventCounters.objects.filter(event_id=event_id).values_list('company_id', flat=True).first()
+    if company_id is None:
+        return
+    with transaction.atomic():
+        company_counters = CompanyCounters.objects.select_for_update().filter(company_id=company_id).first()
+        event_counters = EventCounters.objects.select_for_update().filter(event_id=event_id).first()
+        if company_counters is None or event_counters is None:
+            return
+        apply_event_delta(company_counters, event_values(event_counters), event_values(EventCounters()))
+        company_counters.save()
+        event_counters.delete()
+
+
+def _pending_event_ids():
+    if not hasattr(_pending, 'event_ids'):
+        _pending.event_ids = set()
+    return _pending.event_ids
+
+
+def _flush_pending():
+    event_ids = _pending_event_ids()
+    _pending.event_ids = set()
+    for event_id in event_ids:
+        try:
+            refresh_event_counters(event_id)
+        except Exception:
+            # counters are derived data; rebuild_dashboard_counters repairs a missed refresh
+            logger.exception(f"Failed to refresh counters for event {event_id}")
+
+
+def begin_request():
+    _pending.in_request = True
+
+
+def finish_request():
+    _pending.in_request = False
+    _flush_pending()
+
+
+def schedule_event_refresh(event_id):
+    """Refresh an event's counters once per request, or once per transaction outside one.
+
+    During a request the refresh runs when the request finishes, after the response
+    is sent, so a view saving many labor requests recomputes each event once and
+    takes the company counters lock once instead of per save.
+    """
+    if event_id is None:
+        return
+    _pending_event_ids().add(event_id)
+    if getattr(_pending, 'in_request', False):
+        return
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _flush_pending()
+        return
+    if not any(func is _flush_pending for _, func, _ in connection.run_on_commit):
+        transaction.on_commit(_flush_pending)
+
+
+def get_company_counters(company):
+    counters = CompanyCounters.objects.filter(company=company).first()
+    if counters is None:
+        counters = rebuild_company_counters(company.id)
+    return counters
+
+
+def all_company_counters():
+    """Counters rows for every company, building any that are missing"""
+    for company_id in Company.objects.filter(counters__isnull=True).values_list('id', flat=True):
+        rebuild_company_counters(company_id)
+    return CompanyCounters.objects.all()
+
+
+def labor_needs_by_event(events):
+    """{event_id: {...}} for the dashboard event lists"""
+    labor_needs = {}
+    for counters in EventCounters.objects.filter(event__in=events):
+        labor_needs[counters.event_id] = {
+            'unfilled_count': counters.unfilled_requirements,
+            'total_unfilled_spots': counters.unfilled_spots,
+            'labor_needs_text': counters.labor_needs_text}
+    for event in events:
+        labor_needs.setdefault(event.id, {
+            'unfilled_count': 0,
+            'total_unfilled_spots': 0,
+            'labor_needs_text': "All calls filled"})
+    return labor_needs
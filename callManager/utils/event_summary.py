@@ -0,0 +1,55 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from callManager.models import LaborRequest, LaborRequirement
+
+# relations EventSerializer (depth=3) walks for every event
+EVENT_LIST_SELECT_RELATED = [
+    'company', 'location_profile__company', 'created_by__user', 'created_by__company', 'steward__user', 'steward__company',
+]
+EVENT_LIST_PREFETCH_RELATED = [
+    'created_by__user__groups', 'created_by__user__user_permissions', 'steward__user__groups', 'steward__user__user_permissions',
+]
+
+
+def event_list_queryset(events):
+    """`events` with everything the list serializer reads loaded up front"""
+    return events.select_related(*EVENT_LIST_SELECT_RELATED).prefetch_related(*EVENT_LIST_PREFETCH_RELATED)
+
+
+def filter_event_window(events, start=None, end=None):
+    """Events whose dates overlap [start, end]; either bound may be None"""
+    if start:
+        events = events.filter(Q(end_date__gte=start) | Q(end_date__isnull=True, start_date__gte=start))
+    if end:
+        events = events.filter(start_date__lte=end)
+    return events
+
+
+def unfilled_counts(event_ids):
+    """{event_id: labor still needed} in one grouped query.
+
+    Each requirement contributes max(needed_labor - confirmed, 0), so overfilled
+    requirements don't hide unfilled ones; confirmed counts come from a correlated
+    subquery on laborreq_lr_confirmed_idx.
+    """
+    confirmed = LaborRequest.objects.filter(
+        labor_requirement=OuterRef('pk'), confirmed=True).order_by().values(
+        'labor_requirement').annotate(count=Count('id')).values('count')
+    rows = LaborRequirement.objects.filter(call_time__event_id__in=event_ids).annotate(
+        confirmed_count=Coalesce(Subquery(confirmed, output_field=IntegerField()), Value(0)),
+        ).values('call_time__event_id').annotate(
+        unfilled=Sum(Greatest(F('needed_labor') - F('confirmed_count'), Value(0)))).order_by()
+    counts = dict.fromkeys(event_ids, 0)
+    counts.update((row['call_time__event_id'], row['unfilled']) for row in rows)
+    return counts
+
+
+def summarize_events(events):
+    """Set unfilled_count and filled on each event of `events`, returned as a list"""
+    events = list(events)
+    counts = unfilled_counts([event.id for event in events])
+    for event in events:
+        event.unfilled_count = counts[event.id]
+        event.filled = event.unfilled_count == 0
+    return events
@@ -0,0 +1,155 @@
+import logging
+import threading
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from callManager.models import LaborRequest, LaborRequirement
+from callManager.utils.conflicts import request_status
+
+logger = logging.getLogger('callManager')
+
+_pending_changes = {}
+_pending_lock = threading.Lock()
+
+
+def labor_requirement_group(slug):
+    return f"labor_request_{slug}_updates"
+
+
+def event_group(slug):
+    return f"event_{slug}_updates"
+
+
+def fill_counts(labor_requirement_ids):
+    """{labor_requirement_id: {'pending', 'confirmed', 'available', 'declined'}} in one query"""
+    rows = LaborRequest.objects.filter(labor_requirement_id__in=labor_requirement_ids).values(
+        'labor_requirement_id').annotate(
+        pending_count=Count('id', filter=Q(availability_response__isnull=True)),
+        confirmed_count=Count('id', filter=Q(confirmed=True)),
+        available_count=Count('id', filter=Q(availability_response='yes', confirmed=False)),
+        declined_count=Count('id', filter=Q(availability_response='no')),
+        ).order_by()
+    counts = {
+        labor_requirement_id: {'pending': 0, 'confirmed': 0, 'available': 0, 'declined': 0}
+        for labor_requirement_id in labor_requirement_ids}
+    for row in rows:
+        counts[row['labor_requirement_id']] = {
+            'pending': row['pending_count'],
+            'confirmed': row['confirmed_count'],
+            'available': row['available_count'],
+            'declined': row['declined_count'],
+        }
+    return counts
+
+
+def fill_status_messages(changes):
+    """Build the per-requirement and per-event payloads for {labor_requirement_id: {labor_request_id: worker_id}}"""
+    labor_requirements = LaborRequirement.objects.filter(id__in=changes).select_related(
+        'call_time__event', 'labor_type')
+    counts = fill_counts(list(changes))
+    request_ids = [request_id for changed in changes.values() for request_id in changed]
+    labor_requests = {
+        labor_request.id: labor_request
+        for labor_request in LaborRequest.objects.filter(id__in=request_ids).select_related('worker')}
+
+    requirement_messages = []
+    event_messages = {}
+    for labor_requirement in labor_requirements:
+        changed = []
+        for request_id, worker_id in changes[labor_requirement.id].items():
+            labor_request = labor_requests.get(request_id)
+            changed.append({
+                'labor_request_id': request_id,
+                'worker_id': worker_id,
+                'worker_name': labor_request.worker.name if labor_request else None,
+                'status': request_status(labor_request) if labor_request else 'Removed',
+            })
+        call_time = labor_requirement.call_time
+        data = {
+            'labor_requirement': labor_requirement.slug,
+            'call_time': call_time.slug,
+            'job': labor_requirement.labor_type.name,
+            'needed_labor': labor_requirement.needed_labor,
+            **counts[labor_requirement.id],
+            'changed': changed,
+        }
+        requirement_messages.append((labor_requirement_group(labor_requirement.slug), data))
+        event_messages.setdefault(event_group(call_time.event.slug), []).append(data)
+    return requirement_messages, list(event_messages.items())
+
+
+def publish_fill_status(changes):
+    """Send fill-state deltas for the changed labor requests to their requirement and event groups"""
+    if not changes:
+        return
+    try:
+        requirement_messages, event_messages = fill_status_messages(changes)
+        channel_layer = get_channel_layer()
+        for group, data in requirement_messages:
+            async_to_sync(channel_layer.group_send)(group, {"type": "labor_request_update", "data": data})
+        for group, labor_requirements in event_messages:
+            async_to_sync(channel_layer.group_send)(
+                group, {"type": "fill_status_update", "labor_requirements": labor_requirements})
+    except Exception:
+        # a missing channel layer must not break the request that changed the data
+        logger.exception("Failed to publish fill status")
+
+
+def schedule_fill_status_changes(changes):
+    """Publish {labor_requirement_id: {labor_request_id: worker_id}} after commit.
+
+    Changes are coalesced across requests for NOTIFICATION_PUSH_DELAY seconds, like
+    notification pushes, so a burst of saves sends one message per requirement and
+    event rather than one per save.
+    """
+    transaction.on_commit(lambda: queue_fill_status(changes))
+
+
+def queue_fill_status(changes):
+    with _pending_lock:
+        first = not _pending_changes
+        for labor_requirement_id, changed in changes.items():
+            _pending_changes.setdefault(labor_requirement_id, {}).update(changed)
+    if not first:
+        return
+    if settings.NOTIFICATION_PUSH_DELAY <= 0:
+        flush_fill_status(close_connection=False)
+        return
+    timer = threading.Timer(settings.NOTIFICATION_PUSH_DELAY, flush_fill_status)
+    timer.daemon = True
+    timer.start()
+
+
+def flush_fill_status(close_connection=True):
+    with _pending_lock:
+        changes = dict(_pending_changes)
+        _pending_changes.clear()
+    try:
+        publish_fill_status(changes)
+    finally:
+        # the timer thread has its own connection, don't leave it open
+        if close_connection:
+            connection.close()
+
+
+def schedule_fill_status(labor_request):
+    schedule_fill_status_changes({labor_request.labor_requirement_id: {labor_request.id: labor_request.worker_id}})
+
+
+def schedule_fill_status_for(labor_request_ids):
+    """For update()/bulk_create paths, which don't send post_save"""
+    changes = {}
+    for labor_request_id, labor_requirement_id, worker_id in LaborRequest.objects.filter(
+            id__in=labor_request_ids).values_list('id', 'labor_requirement_id', 'worker_id'):
+        changes.setdefault(labor_requirement_id, {})[labor_request_id] = worker_id
+    if changes:
+        schedule_fill_status_changes(changes)
+
+
+def schedule_fill_status_for_requirements(labor_requirement_ids):
+    """Publish the counts of whole requirements (e.g. freshly cloned ones) without per-request changes"""
+    schedule_fill_status_changes({labor_requirement_id: {} for labor_requirement_id in labor_requirement_ids})
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from callManager.models import LaborRequest
+from callManager.utils.fill_status import schedule_fill_status
+
+
+@receiver(post_save, sender=LaborRequest)
+@receiver(post_delete, sender=LaborRequest)
+def labor_request_fill_changed(sender, instance, **kwargs):
+    schedule_fill_status(instance)
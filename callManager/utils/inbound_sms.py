@@ -0,0 +1,31 @@
+from django.db import IntegrityError, transaction
+
+from callManager.models import AltPhone, InboundSMS, Worker, e164
+
+
+def workers_for_phone(phone_number):
+    """Workers whose primary or alternate number is `phone_number`, as a list.
+
+    Both sides are answered from their phone_number index; the id union keeps the
+    OR from turning into a scan of the worker table.
+    """
+    number = e164(phone_number or '')
+    worker_ids = Worker.objects.filter(phone_number=number).values_list('id', flat=True).union(
+        AltPhone.objects.filter(phone_number=number).values_list('worker_id', flat=True))
+    return list(Worker.objects.filter(id__in=list(worker_ids)).order_by('id'))
+
+
+def claim_inbound_sms(message_sid, from_number, body):
+    """Record a Twilio MessageSid before it is processed.
+
+    Returns (inbound_sms, duplicate). `duplicate` is True when the sid was already
+    claimed, i.e. Twilio is retrying a delivery we answered (or are answering).
+    Messages without a sid are not tracked and return (None, False).
+    """
+    if not message_sid:
+        return None, False
+    try:
+        with transaction.atomic():
+            return InboundSMS.objects.create(message_sid=message_sid, from_number=from_number or '', body=body), False
+    except IntegrityError:
+        return InboundSMS.objects.filter(message_sid=message_sid).first(), True
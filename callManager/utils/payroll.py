@@ -0,0 +1,85 @@
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db.models import Prefetch
+
+from callManager.models import TimeEntry
+
+PayrollHours = namedtuple('PayrollHours', ['normal_hours', 'meal_penalty_hours', 'total_hours_worked'])
+NO_HOURS = PayrollHours(0, 0, 0)
+
+
+def break_length(meal_break):
+    return timedelta(minutes=30) if meal_break.break_type == 'paid' else timedelta(hours=1)
+
+
+def calculate_hours(start_time, end_time, meal_breaks, trigger_hours):
+    """Normal, meal penalty and total hours for one shift. Pure math, no queries."""
+    if not (start_time and end_time):
+        return NO_HOURS
+    breaks = sorted(meal_breaks, key=lambda meal_break: meal_break.break_time)
+    trigger_duration = timedelta(hours=trigger_hours)
+
+    normal_hours = 0
+    current_time = start_time
+    for meal_break in breaks:
+        break_start = meal_break.break_time
+        break_end = break_start + break_length(meal_break)
+        trigger_time = current_time + trigger_duration
+        if break_start > trigger_time:
+            normal_hours += (trigger_time - current_time).total_seconds() / 3600
+        else:
+            normal_hours += (break_start - current_time).total_seconds() / 3600
+        if meal_break.break_type == 'paid':
+            normal_hours += (break_end - break_start).total_seconds() / 3600
+        current_time = break_end
+        if current_time >= end_time:
+            break
+    if current_time < end_time:
+        end_normal = min(current_time + trigger_duration, end_time)
+        normal_hours += (end_normal - current_time).total_seconds() / 3600
+
+    penalty_hours = 0
+    current_time = start_time
+    for meal_break in breaks:
+        break_start = meal_break.break_time
+        trigger_time = current_time + trigger_duration
+        if trigger_time < break_start:
+            penalty_end = min(break_start, end_time)
+            if penalty_end > trigger_time:
+                penalty_hours += (penalty_end - trigger_time).total_seconds() / 3600
+        current_time = break_start + break_length(meal_break)
+        if current_time >= end_time:
+            break
+    if current_time < end_time:
+        trigger_time = current_time + trigger_duration
+        if end_time > trigger_time:
+            penalty_hours += (end_time - trigger_time).total_seconds() / 3600
+
+    unpaid_breaks = sum(1 for meal_break in breaks if meal_break.break_type == 'unpaid')
+    total_hours = (end_time - start_time).total_seconds() / 3600 - unpaid_breaks
+
+    return PayrollHours(max(0, normal_hours), max(0, penalty_hours), max(0, total_hours))
+
+
+def time_entries_prefetch():
+    """Prefetch for LaborRequest querysets so time_entry and its meal breaks cost no extra queries"""
+    return Prefetch('time_entries', queryset=TimeEntry.objects.order_by('id').prefetch_related('meal_breaks'))
+
+
+def attach_payroll(labor_requests, trigger_hours):
+    """Compute hours for every time entry of the (prefetched) labor requests in one pass.
+
+    Returns the labor requests as a list; each entry's TimeEntry.payroll_hours() then
+    answers from memory.
+    """
+    labor_requests = list(labor_requests)
+    for labor_request in labor_requests:
+        for time_entry in labor_request.time_entries.all():
+            time_entry._payroll_hours = calculate_hours(
+                time_entry.start_time,
+                time_entry.end_time,
+                time_entry.meal_breaks.all(),
+                trigger_hours,
+            )
+    return labor_requests
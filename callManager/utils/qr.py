@@ -0,0 +1,149 @@
+import base64
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+
+import qrcode
+import qrcode.image.svg
+from django.conf import settings
+
+QR_FORMATS = ('png', 'svg')
+QR_MIN_BOX_SIZE = 2
+QR_MAX_BOX_SIZE = 20
+
+_memory = OrderedDict()  # cache key -> (image bytes, expires at as a unix time)
+_memory_lock = threading.Lock()
+
+
+def render_qr(data, fmt='png', box_size=10, border=4):
+    """Render `data` as a QR code image, PNG or SVG bytes"""
+    qr = qrcode.QRCode(version=1, box_size=box_size, border=border)
+    qr.add_data(data)
+    qr.make(fit=True)
+    buffer = BytesIO()
+    if fmt == 'svg':
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _cache_key(data, fmt, box_size, border):
+    return hashlib.sha256(f"{fmt}|{box_size}|{border}|{data}".encode()).hexdigest()
+
+
+def _disk_path(key, fmt):
+    return os.path.join(settings.QR_CACHE_DIR, key[:2], f"{key}.{fmt}")
+
+
+def _memory_get(key, now):
+    with _memory_lock:
+        entry = _memory.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del _memory[key]
+            return None
+        _memory.move_to_end(key)
+        return entry[0]
+
+
+def _memory_put(key, image, expires):
+    with _memory_lock:
+        _memory[key] = (image, expires)
+        _memory.move_to_end(key)
+        while len(_memory) > settings.QR_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+def _disk_get(path, now):
+    try:
+        expires = os.path.getmtime(path)
+        if expires <= now:
+            os.remove(path)
+            return None
+        with open(path, 'rb') as f:
+            return f.read(), expires
+    except OSError:
+        return None
+
+
+def _disk_put(path, image, expires):
+    """Write atomically; the file's mtime is its expiry"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(image)
+        os.utime(tmp, (expires, expires))
+        os.replace(tmp, path)
+    except OSError:
+        # the disk cache is an optimization; a read-only or full disk just means re-rendering
+        pass
+
+
+def qr_code(data, fmt='png', box_size=10, border=4, expires_at=None):
+    """QR code image bytes for `data`, rendered at most once per cache lifetime.
+
+    Images are kept in a per-process LRU and, so that all workers share them, in
+    QR_CACHE_DIR. They expire with the token they encode (`expires_at`, e.g.
+    ClockInToken.expires_at) or after QR_CACHE_TTL seconds.
+    """
+    if fmt not in QR_FORMATS:
+        raise ValueError(f"Unsupported QR format: {fmt}")
+    now = time.time()
+    expires = expires_at.timestamp() if expires_at else now + settings.QR_CACHE_TTL
+    key = _cache_key(data, fmt, box_size, border)
+    image = _memory_get(key, now)
+    if image is not None:
+        return image
+    path = _disk_path(key, fmt)
+    cached = _disk_get(path, now)
+    if cached is not None:
+        image, expires = cached
+    else:
+        if expires <= now:
+            # already expired tokens still get an image, just not a cached one
+            return render_qr(data, fmt, box_size, border)
+        image = render_qr(data, fmt, box_size, border)
+        _disk_put(path, image, expires)
+    _memory_put(key, image, expires)
+    return image
+
+
+def qr_code_base64(data, fmt='png', box_size=10, border=4, expires_at=None):
+    """qr_code() base64-encoded, for data: URIs in templates and JSON"""
+    return base64.b64encode(qr_code(data, fmt, box_size, border, expires_at)).decode('utf-8')
+
+
+def qr_options(params):
+    """(fmt, box_size) from qr_format/qr_box_size request parameters; raises ValueError when invalid"""
+    fmt = params.get('qr_format', 'png')
+    if fmt not in QR_FORMATS:
+        raise ValueError(f"qr_format must be one of {', '.join(QR_FORMATS)}")
+    try:
+        box_size = int(params.get('qr_box_size', 10))
+    except (TypeError, ValueError):
+        raise ValueError("qr_box_size must be an integer")
+    if not QR_MIN_BOX_SIZE <= box_size <= QR_MAX_BOX_SIZE:
+        raise ValueError(f"qr_box_size must be between {QR_MIN_BOX_SIZE} and {QR_MAX_BOX_SIZE}")
+    return fmt, box_size
+
+
+def delete_expired_qr_codes():
+    """Remove expired images from QR_CACHE_DIR; returns how many were deleted"""
+    now = time.time()
+    deleted = 0
+    for root, _, files in os.walk(settings.QR_CACHE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                if os.path.getmtime(path) <= now:
+                    os.remove(path)
+                    deleted += 1
+            except OSError:
+                pass
+    return deleted
@@ -0,0 +1,79 @@
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    """Counts queries, their total time and how often each SQL statement repeats.
+
+    Installed as a database execute wrapper, so it works without DEBUG. The SQL
+    seen by the wrapper still has its parameter placeholders, which makes it the
+    fingerprint: the same statement run many times with different ids is the
+    signature of an N+1 loop.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[sql] += 1
+
+    @property
+    def duplicates(self):
+        """{sql: times run} for statements that ran more than once, most repeated first"""
+        return {sql: n for sql, n in self.fingerprints.most_common() if n > 1}
+
+    @property
+    def duplicate_count(self):
+        """Queries that repeated an earlier statement"""
+        return sum(n - 1 for n in self.duplicates.values())
+
+    def report(self, limit=5):
+        lines = [f"{self.count} queries ({self.duplicate_count} duplicates) in {self.duration * 1000:.1f} ms"]
+        for sql, n in list(self.duplicates.items())[:limit]:
+            lines.append(f"  {n}x {sql[:200]}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def record_queries():
+    """Record the queries run on every database connection inside the block"""
+    stats = QueryStats()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        yield stats
+
+
+@contextmanager
+def assert_max_queries(max_queries):
+    """For tests: fail when the block runs more than `max_queries` queries, listing the repeated ones"""
+    with record_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(f"Query budget of {max_queries} exceeded: {stats.report()}")
+
+
+def query_budget(max_queries):
+    """Declare how many queries a view may run; enforced by QueryBudgetMiddleware.
+
+    Put it above @api_view so the budget ends up on the callable the URLconf resolves.
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
@@ -0,0 +1,43 @@
+import threading
+
+from callManager.models import LaborRequest, unique_random_slugs
+
+SHORT_TOKEN_LENGTH = 6
+# unused tokens kept per process, so most allocations cost no query at all
+SHORT_TOKEN_POOL_SIZE = 64
+# candidates checked per query when refilling
+SHORT_TOKEN_BATCH = 500
+
+_pool = []
+_pool_lock = threading.Lock()
+
+
+def _refill(needed):
+    """Add at least `needed` tokens that no LaborRequest uses to the pool, one query per batch"""
+    while needed > 0:
+        candidates = set(unique_random_slugs(min(needed + SHORT_TOKEN_POOL_SIZE, SHORT_TOKEN_BATCH), SHORT_TOKEN_LENGTH))
+        candidates -= set(_pool)
+        taken = set(LaborRequest.objects.filter(token_short__in=candidates).values_list('token_short', flat=True))
+        fresh = candidates - taken
+        _pool.extend(fresh)
+        needed -= len(fresh)
+
+
+def generate_short_tokens(count):
+    """`count` distinct short tokens not used by any LaborRequest.
+
+    token_short is shared by the requests of one confirmation link, so it can't carry a
+    unique index; instead tokens are checked against the table in batches and handed
+    out from a per-process pool. The 62**6 keyspace makes a clash between processes
+    drawing the same token negligible.
+    """
+    with _pool_lock:
+        if len(_pool) < count:
+            _refill(count - len(_pool))
+        tokens = _pool[:count]
+        del _pool[:count]
+    return tokens
+
+
+def generate_short_token():
+    return generate_short_tokens(1)[0]
@@ -0,0 +1,144 @@
+from functools import lru_cache
+from itertools import islice
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+PAGE_SIZE = landscape(letter)
+MARGIN = 0.5 * inch
+FONT = 'Helvetica'
+BOLD_FONT = 'Helvetica-Bold'
+FONT_SIZE = 10
+TITLE_SIZE = 18
+HEADING_SIZE = 14
+ROW_HEIGHT = 0.3 * inch
+HEADER_ROW_HEIGHT = 0.35 * inch
+CELL_PADDING = 10  # horizontal padding in points on each side of a cell
+SIGNATURE_HEIGHT = 1.0 * inch
+
+
+@lru_cache(maxsize=16384)
+def text_width(text, font_name=FONT, font_size=FONT_SIZE):
+    """stringWidth, memoized: sheet cells repeat the same names, times and labor types"""
+    return stringWidth(text, font_name, font_size)
+
+
+def fit_column_widths(columns, rows, available_width=PAGE_SIZE[0] - 2 * MARGIN, padding=CELL_PADDING):
+    """Widest cell per column plus padding, scaled down to the page when too wide"""
+    max_widths = [text_width(str(column)) for column in columns]
+    for row in rows:
+        for i, cell in enumerate(row):
+            max_widths[i] = max(max_widths[i], text_width(str(cell)))
+    total_width = sum(max_widths) + 2 * padding * len(max_widths)
+    if total_width > available_width:
+        scale_factor = available_width / total_width
+        max_widths = [w * scale_factor for w in max_widths]
+    return [w + 2 * padding for w in max_widths]
+
+
+class SignInSheet:
+    """Paged table PDF drawn directly on a canvas.
+
+    Rows are consumed one page at a time from any iterable, so the cost is linear
+    in the number of rows and no table flowables are kept around. Every page repeats
+    the title, the group heading and the column header.
+    """
+
+    def __init__(self, output, columns, col_widths, title=None, signature=False):
+        self.canvas = canvas.Canvas(output, pagesize=PAGE_SIZE, pageCompression=1)
+        self.columns = [str(column) for column in columns]
+        self.col_widths = col_widths
+        self.title = title
+        self.signature = signature
+        self.page_count = 0
+
+    def rows_per_page(self, heading):
+        used = MARGIN * 2 + HEADER_ROW_HEIGHT
+        if self.title:
+            used += TITLE_SIZE * 1.6
+        if heading:
+            used += HEADING_SIZE * 1.6
+        if self.signature:
+            used += SIGNATURE_HEIGHT
+        return max(1, int((PAGE_SIZE[1] - used) // ROW_HEIGHT))
+
+    def add_group(self, heading, rows):
+        """Draw `rows` on as many pages as they need, starting on a new page"""
+        rows = iter(rows)
+        per_page = self.rows_per_page(heading)
+        while True:
+            page_rows = list(islice(rows, per_page))
+            if not page_rows:
+                return
+            self.draw_page(heading, page_rows)
+
+    def draw_page(self, heading, rows):
+        c = self.canvas
+        y = PAGE_SIZE[1] - MARGIN
+        if self.title:
+            y -= TITLE_SIZE
+            c.setFont(BOLD_FONT, TITLE_SIZE)
+            c.drawString(MARGIN, y, self.title)
+            y -= TITLE_SIZE * 0.6
+        if heading:
+            y -= HEADING_SIZE
+            c.setFont(BOLD_FONT, HEADING_SIZE)
+            c.drawString(MARGIN, y, heading)
+            y -= HEADING_SIZE * 0.6
+        y = self.draw_table(y, rows)
+        if self.signature:
+            c.setFont(FONT, FONT_SIZE)
+            c.drawString(MARGIN, y - 0.5 * inch, "Signature: _______________________________")
+        c.showPage()
+        self.page_count += 1
+
+    def draw_table(self, top, rows):
+        c = self.canvas
+        table_width = sum(self.col_widths)
+        body_height = ROW_HEIGHT * len(rows)
+        bottom = top - HEADER_ROW_HEIGHT - body_height
+
+        c.setFillColor(colors.grey)
+        c.rect(MARGIN, top - HEADER_ROW_HEIGHT, table_width, HEADER_ROW_HEIGHT, stroke=0, fill=1)
+        if rows:
+            c.setFillColor(colors.beige)
+            c.rect(MARGIN, bottom, table_width, body_height, stroke=0, fill=1)
+
+        c.setFillColor(colors.whitesmoke)
+        c.setFont(BOLD_FONT, FONT_SIZE)
+        self.draw_cells(self.columns, top - HEADER_ROW_HEIGHT / 2 - 0.35 * FONT_SIZE)
+        c.setFillColor(colors.black)
+        c.setFont(FONT, FONT_SIZE)
+        row_top = top - HEADER_ROW_HEIGHT
+        for row in rows:
+            self.draw_cells([str(cell) for cell in row], row_top - ROW_HEIGHT / 2 - 0.35 * FONT_SIZE)
+            row_top -= ROW_HEIGHT
+
+        c.setStrokeColor(colors.black)
+        c.setLineWidth(1)
+        lines = [(MARGIN, top, MARGIN + table_width, top)]
+        y = top - HEADER_ROW_HEIGHT
+        for _ in range(len(rows) + 1):
+            lines.append((MARGIN, y, MARGIN + table_width, y))
+            y -= ROW_HEIGHT
+        x = MARGIN
+        lines.append((x, top, x, bottom))
+        for width in self.col_widths:
+            x += width
+            lines.append((x, top, x, bottom))
+        c.lines(lines)
+        return bottom
+
+    def draw_cells(self, cells, baseline):
+        x = MARGIN
+        for cell, width in zip(cells, self.col_widths):
+            self.canvas.drawString(x + CELL_PADDING, baseline, cell)
+            x += width
+
+    def save(self):
+        if not self.page_count:
+            self.draw_page(None, [])
+        self.canvas.save()
@@ -0,0 +1,131 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+
+from callManager.models import QueuedSMS
+
+logger = logging.getLogger('callManager')
+
+# a crashed worker leaves rows in 'sending'; they are picked up again once the lease runs out.
+# drain_outbox paces a batch at the rate limit, so its lease is the time the batch takes to
+# send plus this margin for slow Twilio responses.
+SENDING_LEASE = timedelta(minutes=5)
+RETRY_BASE_SECONDS = 15
+RETRY_MAX_SECONDS = 900
+
+
+def enqueue_sms(body, to_number, company=None, worker=None):
+    """Queue an SMS for the outbox worker instead of calling Twilio inline"""
+    return QueuedSMS.objects.create(
+        company=company,
+        worker=worker,
+        to_number=str(to_number),
+        body=body,
+    )
+
+
+def get_twilio_client():
+    """One Twilio client per worker process, backed by a pooled requests session"""
+    if settings.TWILIO_ENABLED != 'enabled':
+        return None
+    http_client = TwilioHttpClient(pool_connections=True)
+    return Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, http_client=http_client)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def is_retryable(error):
+    """Rate limiting and server side errors are worth another attempt, bad numbers are not"""
+    return error.status == 429 or (error.status or 0) >= 500
+
+
+def claim_batch(batch_size, lease=SENDING_LEASE):
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            QueuedSMS.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['queued', 'sending'], next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        QueuedSMS.objects.filter(id__in=ids).update(status='sending', next_attempt_at=now + lease)
+    return list(QueuedSMS.objects.filter(id__in=ids).select_related('company').order_by('id'))
+
+
+def deliver(sms, client):
+    """Send one queued message and write its status back. Returns True when it was sent."""
+    from callManager.views import log_sms
+
+    sms.attempts += 1
+    retry = False
+    try:
+        if client:
+            result = client.messages.create(
+                body=sms.body,
+                from_=settings.TWILIO_PHONE_NUMBER,
+                to=sms.to_number
+            )
+            sms.twilio_sid = result.sid
+        else:
+            print(sms.body)
+    except TwilioRestException as e:
+        sms.error = str(e)
+        retry = is_retryable(e)
+    except Exception as e:
+        # connection errors and the like, the message itself is fine
+        sms.error = str(e)
+        retry = True
+    else:
+        sms.status = 'sent'
+        sms.sent_at = timezone.now()
+        sms.error = None
+        sms.save(update_fields=['status', 'attempts', 'twilio_sid', 'sent_at', 'error'])
+        log_sms(sms.company, sms.segment_count())
+        return True
+
+    if retry and sms.attempts < settings.SMS_OUTBOX_MAX_ATTEMPTS:
+        sms.status = 'queued'
+        sms.next_attempt_at = timezone.now() + retry_delay(sms.attempts)
+    else:
+        sms.status = 'failed'
+        logger.warning(f"SMS {sms.id} to {sms.to_number} failed after {sms.attempts} attempt(s): {sms.error}")
+    sms.save(update_fields=['status', 'attempts', 'next_attempt_at', 'error'])
+    return False
+
+
+def drain_outbox(client=None, rate=None, batch_size=None, stop_when_empty=True, idle_sleep=1.0):
+    """Deliver queued messages at no more than `rate` messages per second"""
+    rate = rate or settings.SMS_OUTBOX_RATE_LIMIT
+    batch_size = batch_size or settings.SMS_OUTBOX_BATCH_SIZE
+    interval = 1.0 / rate if rate > 0 else 0
+    lease = SENDING_LEASE + timedelta(seconds=batch_size * interval)
+    next_send = time.monotonic()
+    sent = unsent = 0
+    while True:
+        batch = claim_batch(batch_size, lease)
+        if not batch:
+            if stop_when_empty:
+                return sent, unsent
+            time.sleep(idle_sleep)
+            continue
+        for sms in batch:
+            wait = next_send - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            next_send = max(next_send, time.monotonic()) + interval
+            if deliver(sms, client):
+                sent += 1
+            else:
+                unsent += 1
@@ -0,0 +1,57 @@
+from collections import defaultdict
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from callManager.models import SMSUsage
+
+
+def record_sms_usage(company, count=1, day=None):
+    """Add `count` segments to the company's ledger row for `day` (today by default)"""
+    day = day or timezone.now().date()
+    updated = SMSUsage.objects.filter(company=company, date=day).update(message_count=F('message_count') + count)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            SMSUsage.objects.create(company=company, date=day, message_count=count)
+    except IntegrityError:
+        # another sender created today's row first
+        SMSUsage.objects.filter(company=company, date=day).update(message_count=F('message_count') + count)
+
+
+def sms_sent_since(day, company=None):
+    """Segments sent from `day` onwards, for one company or all of them"""
+    usage = SMSUsage.objects.filter(date__gte=day)
+    if company is not None:
+        usage = usage.filter(company=company)
+    return usage.aggregate(total=Sum('message_count'))['total'] or 0
+
+
+def usage_report_data(usage, keyed_by_company=False):
+    """Daily rows, monthly totals and per-month chart data for the usage reports, from one query"""
+    daily_counts = [
+        {'company__name': row['company__name'], 'date': row['date'], 'count': row['message_count']}
+        for row in usage.values('company__name', 'date', 'message_count').order_by('company__name', '-date')
+    ]
+    monthly_totals = {}
+    monthly_daily_data = defaultdict(list)
+    for entry in daily_counts:
+        month = date(entry['date'].year, entry['date'].month, 1)
+        if keyed_by_company:
+            key = f"{entry['company__name']}_{month.strftime('%Y-%m')}"
+        else:
+            key = month.strftime('%Y-%m')
+        if key not in monthly_totals:
+            monthly_totals[key] = {
+                'company__name': entry['company__name'],
+                'month': month,
+                'count': 0,
+                'chart_key': key}
+        monthly_totals[key]['count'] += entry['count']
+        monthly_daily_data[key].append({'date': entry['date'].strftime('%Y-%m-%d'), 'count': entry['count']})
+    for days in monthly_daily_data.values():
+        days.reverse()
+    return daily_counts, list(monthly_totals.values()), dict(monthly_daily_data)
@@ -0,0 +1,232 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from callManager.models import CallTime, ClockInToken, LaborRequest, TemporaryScanner, TimeEntry
+from callManager.utils.time_rules import TIME_RULES_TTL, load_time_rules
+
+# A station's roster is trusted for STATION_SESSION_TTL seconds per process, then
+# reloaded; a scan the roster can't place reloads it early, at most once every
+# STATION_RELOAD_INTERVAL seconds. Changes to the event's labor requests and call
+# times bump its roster generation in the cache, and every scan checks it, so an
+# unconfirmed or removed worker is dropped from all processes at once. Who is
+# clocked in is never cached: every scan reads the worker's time entries from the
+# database, locked, so processes can't disagree about it.
+STATION_SESSION_TTL = 60
+STATION_RELOAD_INTERVAL = 5
+STATION_SESSION_SIZE = 64
+ROSTER_GENERATION_KEY = 'station_roster:generation:{}'
+
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def roster_generation(event_id):
+    return cache.get_or_set(ROSTER_GENERATION_KEY.format(event_id), 1, None)
+
+
+def invalidate_station_rosters(event_ids):
+    """Have the events' stations reload their rosters once the current transaction commits"""
+    keys = [ROSTER_GENERATION_KEY.format(event_id) for event_id in set(event_ids) if event_id]
+
+    def bump():
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                # no generation yet, so no station has loaded this roster
+                pass
+    transaction.on_commit(bump)
+
+
+def locked_entry_states(event_id, worker_ids):
+    """{worker_id: {call_time_id: (start_time, end_time)}} of the workers' time entries at
+    the event, locked FOR UPDATE until the surrounding transaction ends"""
+    states = {worker_id: {} for worker_id in worker_ids}
+    for worker_id, call_time_id, start_time, end_time in TimeEntry.objects.select_for_update().filter(
+            event_id=event_id, worker_id__in=worker_ids).values_list('worker_id', 'call_time_id', 'start_time', 'end_time'):
+        states[worker_id][call_time_id] = (start_time, end_time)
+    return states
+
+
+class StationSession:
+    """A sign-in station's event, preloaded so scans resolve without queries.
+
+    Holds the event's clock-in tokens, confirmed assignments and the time rules of
+    its call times. Each scan then costs one locked read of the worker's time
+    entries and a single TimeEntry upsert.
+    """
+
+    def __init__(self, scanner):
+        event = scanner.event
+        self.token = str(scanner.token)
+        self.expires_at = scanner.expires_at
+        self.event_id = event.id
+        self.event_name = event.event_name
+        self.company_id = event.company_id
+        self.loaded_at = time.monotonic()
+        # read before the roster, so a change made while it loads still counts as newer
+        self.roster_generation = roster_generation(event.id)
+
+        self.clock_tokens = {
+            str(token): (worker_id, expires_at)
+            for token, worker_id, expires_at in ClockInToken.objects.filter(
+                event_id=event.id, worker__isnull=False).values_list('token', 'worker_id', 'expires_at')}
+        self.call_time_ids = list(CallTime.objects.filter(event_id=event.id, date__isnull=False).values_list('id', flat=True))
+        self._rules = load_time_rules(self.call_time_ids)
+        self.rules_loaded_at = self.loaded_at
+        # worker_id -> {call_time_id: (labor_request_id, labor_requirement_id)}
+        self.assignments = {}
+        self.worker_names = {}
+        for labor_request_id, worker_id, worker_name, call_time_id, labor_requirement_id in LaborRequest.objects.filter(
+                event_id=event.id, confirmed=True).order_by('id').values_list(
+                'id', 'worker_id', 'worker__name', 'labor_requirement__call_time_id', 'labor_requirement_id'):
+            if call_time_id not in self._rules:
+                continue
+            self.assignments.setdefault(worker_id, {}).setdefault(call_time_id, (labor_request_id, labor_requirement_id))
+            self.worker_names[worker_id] = worker_name
+
+    @property
+    def age(self):
+        return time.monotonic() - self.loaded_at
+
+    @property
+    def roster_changed(self):
+        return cache.get(ROSTER_GENERATION_KEY.format(self.event_id)) != self.roster_generation
+
+    @property
+    def rules(self):
+        """{call_time_id: TimeRules}, refreshed from the rules cache every TIME_RULES_TTL seconds"""
+        if time.monotonic() - self.rules_loaded_at > TIME_RULES_TTL:
+            self._rules = load_time_rules(self.call_time_ids)
+            self.rules_loaded_at = time.monotonic()
+        return self._rules
+
+    def resolve(self, worker_id, state, now):
+        """Apply a scan made at `now` to the worker's entry `state`, updating it in place.
+
+        Returns (success, message, call_time_id, field written); nothing is saved.
+        """
+        rules = self.rules
+        valid_call_times = []
+        for call_time_id in self.assignments.get(worker_id, {}):
+            start_time, end_time = state.get(call_time_id, (None, None))
+            if (start_time and end_time) or call_time_id not in rules:
+                continue
+            call_datetime = rules[call_time_id].call_datetime
+            if now - timedelta(hours=1) <= call_datetime <= now + timedelta(hours=1) or start_time:
+                valid_call_times.append(call_time_id)
+        if len(valid_call_times) != 1:
+            return (False, 'No single relevant call time found.', None, None)
+        call_time_id = valid_call_times[0]
+        labor_requirement_id = self.assignments[worker_id][call_time_id][1]
+        start_time, end_time = state.get(call_time_id, (None, None))
+        if start_time and not end_time:
+            end_time = rules[call_time_id].clock_out(now, start_time, labor_requirement_id)
+            state[call_time_id] = (start_time, end_time)
+            return (True, f"Signed out at {end_time.strftime('%I:%M %p')}.", call_time_id, 'end_time')
+        if not start_time:
+            start_time = rules[call_time_id].call_datetime
+            state[call_time_id] = (start_time, end_time)
+            return (True, f"Signed in at {start_time.strftime('%I:%M %p')}.", call_time_id, 'start_time')
+        return (False, 'Invalid time entry state.', None, None)
+
+    def scan(self, worker_id):
+        """Clock the worker in or out of their one current call time. Returns (success, message)."""
+        with transaction.atomic():
+            # the lock serializes two stations scanning the same worker at once
+            state = locked_entry_states(self.event_id, [worker_id])[worker_id]
+            success, message, call_time_id, field = self.resolve(worker_id, state, timezone.now())
+            if success:
+                self.save_entries([(worker_id, call_time_id, *state[call_time_id])], [field, 'updated_at'])
+        return (success, message)
+
+    def save_entries(self, entries, update_fields):
+        """Insert (worker_id, call_time_id, start_time, end_time) time entries, or update just
+        `update_fields` of the existing ones, in one statement"""
+        TimeEntry.objects.bulk_create([TimeEntry(
+            labor_request_id=self.assignments[worker_id][call_time_id][0],
+            worker_id=worker_id,
+            call_time_id=call_time_id,
+            event_id=self.event_id,
+            company_id=self.company_id,
+            start_time=start_time,
+            end_time=end_time,
+        ) for worker_id, call_time_id, start_time, end_time in entries],
+            update_conflicts=True, unique_fields=['labor_request', 'worker', 'call_time'], update_fields=update_fields)
+
+
+def load_station_session(token):
+    scanner = TemporaryScanner.objects.select_related('event').filter(token=token).first()
+    if scanner is None:
+        return None
+    session = StationSession(scanner)
+    with _sessions_lock:
+        _sessions[session.token] = session
+        _sessions.move_to_end(session.token)
+        while len(_sessions) > STATION_SESSION_SIZE:
+            _sessions.popitem(last=False)
+    return session
+
+
+def get_station_session(token, refresh=False):
+    """The station's session from this process, (re)loaded when missing, stale, its roster
+    changed or `refresh`ed"""
+    with _sessions_lock:
+        session = _sessions.get(str(token))
+    if (session is None or session.age > STATION_SESSION_TTL or session.roster_changed
+            or (refresh and session.age > STATION_RELOAD_INTERVAL)):
+        session = load_station_session(token)
+    return session
+
+
+def find_station_worker(token, session, worker_token, now):
+    """Place a worker token scanned at `now` on the station's roster.
+
+    Returns (session, worker_id, error); the session may have been reloaded, and
+    error is a (status code, message) pair when the token can't be used here.
+    """
+    try:
+        worker_token = str(uuid.UUID(str(worker_token)))
+    except ValueError:
+        return session, None, (404, 'Invalid worker QR code.')
+    clock_token = session.clock_tokens.get(worker_token)
+    if clock_token is None or clock_token[0] not in session.assignments:
+        # issued or confirmed after the roster was loaded?
+        session = get_station_session(token, refresh=True) or session
+        clock_token = session.clock_tokens.get(worker_token)
+    if clock_token is None:
+        expires_at = ClockInToken.objects.filter(token=worker_token).values_list('expires_at', flat=True).first()
+        if expires_at is None:
+            return session, None, (404, 'Invalid worker QR code.')
+        if expires_at < now:
+            return session, None, (400, 'Worker clock-in token has expired.')
+        return session, None, (400, 'This QR code is for a different event.')
+    worker_id, expires_at = clock_token
+    if expires_at < now:
+        return session, None, (400, 'Worker clock-in token has expired.')
+    return session, worker_id, None
+
+
+def station_scan(token, worker_token):
+    """Resolve a station scan of `worker_token`. Returns (status code, response data)."""
+    session = get_station_session(token)
+    if session is None:
+        return 404, {'status': 'error', 'message': 'Invalid station token.'}
+    if session.expires_at < timezone.now():
+        return 400, {'status': 'error', 'message': 'This station has expired.'}
+    if not worker_token:
+        return 400, {'status': 'error', 'message': 'No worker token provided.'}
+    session, worker_id, error = find_station_worker(token, session, worker_token, timezone.now())
+    if error:
+        return error[0], {'status': 'error', 'message': error[1]}
+    success, message = session.scan(worker_id)
+    if success:
+        return 200, {'status': 'success', 'message': message, 'worker_name': session.worker_names[worker_id]}
+    return 400, {'status': 'error', 'message': message}
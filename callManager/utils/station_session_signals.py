@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from callManager.models import CallTime, LaborRequest
+from callManager.utils.station_session import invalidate_station_rosters
+
+
+@receiver(post_save, sender=LaborRequest)
+@receiver(post_delete, sender=LaborRequest)
+@receiver(post_save, sender=CallTime)
+@receiver(post_delete, sender=CallTime)
+def station_roster_changed(sender, instance, **kwargs):
+    invalidate_station_rosters([instance.event_id])
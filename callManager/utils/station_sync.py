@@ -0,0 +1,141 @@
+import uuid
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from callManager.models import StationScan
+from callManager.utils.station_session import find_station_worker, get_station_session, locked_entry_states
+
+MAX_SYNC_SCANS = 500
+# device clocks may run a little ahead of the server's
+SCAN_CLOCK_SKEW = timedelta(minutes=5)
+# how long synced scans are remembered for replays; delete_expired_scanners prunes older ones
+STATION_SCAN_RETENTION = timedelta(days=30)
+
+
+def parse_scanned_at(value):
+    """A device's ISO 8601 scan time as a naive server-local datetime, or None"""
+    try:
+        scanned_at = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    if timezone.is_aware(scanned_at):
+        scanned_at = timezone.make_naive(scanned_at)
+    return scanned_at
+
+
+def scan_result(record, worker_name=None, duplicate=False):
+    result = {'scan_id': str(record.scan_id), 'status': 'success' if record.success else 'error', 'message': record.message}
+    if worker_name:
+        result['worker_name'] = worker_name
+    if duplicate:
+        result['duplicate'] = True
+    return result
+
+
+def _station_session(token, sessions):
+    try:
+        token = str(uuid.UUID(str(token)))
+    except ValueError:
+        return None, None
+    if token not in sessions:
+        sessions[token] = get_station_session(token)
+    return token, sessions[token]
+
+
+def sync_station_scans(scans, station_token=None):
+    """Apply a station's queued scans in order, in one transaction.
+
+    Each scan is a dict of scan_id (generated by the device), worker_token,
+    scanned_at (device time, ISO 8601) and optionally station_token, which defaults
+    to `station_token`. Scans are judged at their device time by the same rules as
+    live scans. Results are stored by scan_id, so a batch resent after a dropped
+    response gets its original results back instead of punching twice. Returns one
+    result dict per scan, in order.
+    """
+    now = timezone.now()
+    results = [None] * len(scans)
+    scan_ids = {}
+    for index, scan in enumerate(scans):
+        scan_id = scan.get('scan_id') if isinstance(scan, dict) else None
+        try:
+            scan_ids[index] = uuid.UUID(str(scan_id))
+        except ValueError:
+            results[index] = {'scan_id': scan_id, 'status': 'error', 'message': 'Invalid scan_id.'}
+
+    with transaction.atomic():
+        recorded = {record.scan_id: record for record in StationScan.objects.filter(
+            scan_id__in=scan_ids.values()).select_related('worker')}
+        sessions = {}
+        records = {}
+        first_index = {}
+        placed = []  # (index, record, session, worker_id), in scan order
+        repeats = []
+        for index, scan_id in scan_ids.items():
+            if scan_id in recorded:
+                previous = recorded[scan_id]
+                results[index] = scan_result(previous, previous.worker.name if previous.worker else None, duplicate=True)
+                continue
+            if scan_id in records:
+                repeats.append((index, scan_id))
+                continue
+            first_index[scan_id] = index
+            scan = scans[index]
+            record = records[scan_id] = StationScan(scan_id=scan_id, scanned_at=parse_scanned_at(scan.get('scanned_at')))
+            token, session = _station_session(scan.get('station_token') or station_token, sessions)
+            error = None
+            if record.scanned_at is None:
+                error = 'Invalid scan time.'
+            elif record.scanned_at > now + SCAN_CLOCK_SKEW:
+                error = 'Scan time is in the future.'
+            elif session is None:
+                error = 'Invalid station token.'
+            elif record.scanned_at > session.expires_at:
+                error = 'This station has expired.'
+            elif not scan.get('worker_token'):
+                error = 'No worker token provided.'
+            else:
+                session, worker_id, failure = find_station_worker(token, session, scan['worker_token'], record.scanned_at)
+                sessions[token] = session
+                if failure:
+                    error = failure[1]
+            if session is not None:
+                record.event_id = session.event_id
+            if error:
+                record.message = error
+                results[index] = scan_result(record)
+            else:
+                record.worker_id = worker_id
+                placed.append((index, record, session, worker_id))
+
+        # entry state comes from the database, locked, as for live scans
+        workers_by_event = {}
+        for _, _, session, worker_id in placed:
+            workers_by_event.setdefault(session.event_id, set()).add(worker_id)
+        states = {}
+        for event_id, worker_ids in workers_by_event.items():
+            states.update({
+                (event_id, worker_id): state for worker_id, state in locked_entry_states(event_id, worker_ids).items()})
+
+        changed = {}  # station token -> (session, {(worker_id, call_time_id)})
+        for index, record, session, worker_id in placed:
+            record.success, record.message, call_time_id, _ = session.resolve(
+                worker_id, states[(session.event_id, worker_id)], record.scanned_at)
+            if record.success:
+                changed.setdefault(session.token, (session, set()))[1].add((worker_id, call_time_id))
+            results[index] = scan_result(record, session.worker_names[worker_id])
+        for session, entries in changed.values():
+            session.save_entries([
+                (worker_id, call_time_id, *states[(session.event_id, worker_id)][call_time_id])
+                for worker_id, call_time_id in entries], ['start_time', 'end_time', 'updated_at'])
+        StationScan.objects.bulk_create(records.values())
+        for index, scan_id in repeats:
+            results[index] = {**results[first_index[scan_id]], 'duplicate': True}
+    return results
+
+
+def delete_old_station_scans():
+    """Forget synced scans past STATION_SCAN_RETENTION; returns how many were deleted"""
+    deleted, _ = StationScan.objects.filter(created_at__lt=timezone.now() - STATION_SCAN_RETENTION).delete()
+    return deleted
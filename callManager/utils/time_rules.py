@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+
+from callManager.models import CallTime, LaborRequirement
+
+DEFAULT_HOUR_ROUND_UP = 4
+DEFAULT_ROUND_UP_TARGET = 30
+SHEET_HOUR_ROUND_UP = 5
+# rules are dropped from the shared cache (Redis, see CACHES) when their call time,
+# requirements, event, location profile or company change. The short TTL bounds how
+# long any other copy can be stale: a per-process cache (CACHE_URL=locmem://) or the
+# rules a station session holds.
+TIME_RULES_TTL = 5
+GENERATION_KEY = 'time_rules:generation'
+
+
+def first_set(*values):
+    """The first value that isn't None; a 0 is a setting, not a blank"""
+    return next((value for value in values if value is not None), None)
+
+
+def round_to_target(dt, target):
+    """Round to the nearest `target` minutes, or to the nearest hour when target is 0"""
+    base = dt.replace(minute=0, second=0, microsecond=0)
+    if not target:
+        return base + timedelta(hours=1) if dt.minute >= 30 else base
+    return base + timedelta(minutes=round(dt.minute / target) * target)
+
+
+def round_clock_out(dt, hour_round_up):
+    """Round down to the hour or half hour, or up to the next one once `hour_round_up` minutes past it"""
+    base = dt.replace(minute=0, second=0, microsecond=0)
+    if dt.minute > 30 + hour_round_up:
+        return base + timedelta(hours=1)
+    if dt.minute > hour_round_up:
+        return base + timedelta(minutes=30)
+    return base
+
+
+class TimeRules:
+    """The time-tracking settings in effect for one call time, resolved once.
+
+    Minimum hours fall back from the labor requirement to the call time, the
+    event's location profile and the company; the clock-out grace period from the
+    location profile to the company. Clock-outs are rounded first and then raised
+    to the minimum call, except on the manager's sign-out sheet, see
+    sheet_clock_out().
+    """
+
+    def __init__(self, call_time_id, call_datetime, minimum_hours, requirement_minimum_hours, hour_round_up, round_up_target):
+        self.call_time_id = call_time_id
+        self.call_datetime = call_datetime
+        self.minimum_hours = minimum_hours
+        self.requirement_minimum_hours = requirement_minimum_hours
+        self.hour_round_up = hour_round_up
+        self.round_up_target = round_up_target
+
+    @classmethod
+    def for_call_time(cls, call_time, requirement_minimum_hours):
+        """Rules for a call time loaded with its event's company and location profile"""
+        event = call_time.event
+        company = event.company
+        location_profile = event.location_profile
+        return cls(
+            call_time_id=call_time.id,
+            call_datetime=datetime.combine(call_time.date, call_time.time) if call_time.date else None,
+            minimum_hours=first_set(
+                call_time.minimum_hours, location_profile.minimum_hours if location_profile else None, company.minimum_hours) or 0,
+            requirement_minimum_hours=requirement_minimum_hours,
+            hour_round_up=first_set(
+                location_profile.hour_round_up if location_profile else None, company.hour_round_up, DEFAULT_HOUR_ROUND_UP),
+            round_up_target=first_set(company.round_up_target, DEFAULT_ROUND_UP_TARGET),
+        )
+
+    def minimum_hours_for(self, labor_requirement_id=None):
+        return self.requirement_minimum_hours.get(labor_requirement_id, self.minimum_hours)
+
+    def minimum_end(self, start_time, labor_requirement_id=None):
+        return start_time + timedelta(hours=self.minimum_hours_for(labor_requirement_id))
+
+    def clock_out(self, now, start_time, labor_requirement_id=None):
+        """The end time recorded for a clock-out at `now`"""
+        return max(round_clock_out(now, self.hour_round_up), self.minimum_end(start_time, labor_requirement_id))
+
+    def sheet_clock_out(self, now, start_time, labor_requirement_id=None):
+        """The end time the manager's sign-out sheet records for a clock-out at `now`.
+
+        The sheet has always raised the clock-out to the minimum call before rounding,
+        at fixed 5/35 minute marks, so a minimum end off the half hour is rounded too.
+        """
+        return round_clock_out(max(now, self.minimum_end(start_time, labor_requirement_id)), SHEET_HOUR_ROUND_UP)
+
+    def clock_out_many(self, entries):
+        """clock_out() over (now, start_time, labor_requirement_id) triples"""
+        return [self.clock_out(now, start_time, labor_requirement_id) for now, start_time, labor_requirement_id in entries]
+
+    def round(self, dt):
+        """Round a manager-entered time to the company's round-up target"""
+        return round_to_target(dt, self.round_up_target)
+
+    def round_many(self, datetimes):
+        return [round_to_target(dt, self.round_up_target) for dt in datetimes]
+
+    def round_break(self, dt):
+        """Round a meal break taken at `dt` like a clock-out"""
+        return round_clock_out(dt, self.hour_round_up)
+
+
+def _rules_key(generation, call_time_id):
+    return f"time_rules:{generation}:{call_time_id}"
+
+
+def load_time_rules(call_time_ids):
+    """{call_time_id: TimeRules}, from the cache where possible; misses are loaded in two queries"""
+    call_time_ids = list(call_time_ids)
+    if not call_time_ids:
+        return {}
+    generation = cache.get_or_set(GENERATION_KEY, 1, None)
+    keys = {call_time_id: _rules_key(generation, call_time_id) for call_time_id in call_time_ids}
+    cached = cache.get_many(keys.values())
+    rules = {call_time_id: cached[key] for call_time_id, key in keys.items() if key in cached}
+    missing = [call_time_id for call_time_id in call_time_ids if call_time_id not in rules]
+    if missing:
+        requirement_minimums = {}
+        for call_time_id, requirement_id, minimum_hours in LaborRequirement.objects.filter(
+                call_time_id__in=missing, minimum_hours__isnull=False).values_list('call_time_id', 'id', 'minimum_hours'):
+            requirement_minimums.setdefault(call_time_id, {})[requirement_id] = minimum_hours
+        loaded = {
+            call_time.id: TimeRules.for_call_time(call_time, requirement_minimums.get(call_time.id, {}))
+            for call_time in CallTime.objects.filter(id__in=missing).select_related('event__company', 'event__location_profile')}
+        cache.set_many({keys[call_time_id]: call_time_rules for call_time_id, call_time_rules in loaded.items()}, TIME_RULES_TTL)
+        rules.update(loaded)
+    return rules
+
+
+def time_rules_for(call_time):
+    return load_time_rules([call_time.id])[call_time.id]
+
+
+def invalidate_time_rules(call_time_ids):
+    generation = cache.get(GENERATION_KEY)
+    if generation:
+        cache.delete_many([_rules_key(generation, call_time_id) for call_time_id in call_time_ids])
+
+
+def invalidate_all_time_rules():
+    """Company and location profile settings reach every call time; move to a fresh key generation"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # no generation yet, so nothing is cached
+        pass
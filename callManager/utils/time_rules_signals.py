@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from callManager.models import CallTime, Company, Event, LaborRequirement, LocationProfile
+from callManager.utils.time_rules import invalidate_all_time_rules, invalidate_time_rules
+
+
+@receiver(post_save, sender=CallTime)
+@receiver(post_delete, sender=CallTime)
+def call_time_rules_changed(sender, instance, **kwargs):
+    invalidate_time_rules([instance.id])
+
+
+@receiver(post_save, sender=LaborRequirement)
+@receiver(post_delete, sender=LaborRequirement)
+def labor_requirement_rules_changed(sender, instance, **kwargs):
+    invalidate_time_rules([instance.call_time_id])
+
+
+@receiver(post_save, sender=Event)
+def event_rules_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_time_rules(CallTime.objects.filter(event=instance).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+@receiver(post_save, sender=LocationProfile)
+@receiver(post_delete, sender=LocationProfile)
+def settings_rules_changed(sender, instance, **kwargs):
+    invalidate_all_time_rules()
@@ -0,0 +1,180 @@
+import logging
+import threading
+
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from callManager.models import AltPhone, Worker, WorkerImportJob, e164, unique_random_slugs
+
+logger = logging.getLogger('callManager')
+
+# contacts per bulk_create round trip; imports up to this size run inside the request
+IMPORT_CHUNK_SIZE = 500
+SLUG_RETRIES = 3
+
+
+def valid_phone_number(phone_number):
+    if not phone_number:
+        return None
+    phone_number = phone_number.replace(' ', '').replace('-', '').replace('(', '').replace(')', '').replace('.', '')
+    if phone_number.startswith('+1') and len(phone_number) == 12:
+        return phone_number
+    if len(phone_number) == 10:
+        phone_number = f"+1{phone_number}"
+    elif len(phone_number) == 11 and phone_number.startswith('1'):
+        phone_number = f"+{phone_number}"
+    elif len(phone_number) < 10:
+        return None
+    return phone_number
+
+
+def parse_vcf(lines):
+    """Yield {'name', 'phones': [{'number', 'label'}]} for each card in a .vcf stream"""
+    current_name = None
+    current_phones = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith('END:VCARD'):
+            yield {'name': current_name, 'phones': current_phones}
+            current_name = None
+            current_phones = []
+        elif line.startswith('FN:'):
+            current_name = line[3:].strip()
+        elif line.startswith('TEL'):
+            # Parse label from TEL params: TEL;CELL:, TEL;HOME:, TEL;TYPE=CELL:, TEL;CELL;PREF:
+            label = ''
+            header, _, number = line.partition(':')
+            params = header.split(';')[1:]  # everything after TEL
+            for param in params:
+                p = param.upper().strip()
+                if p in ('PREF', 'VOICE', 'ENCODING=QUOTED-PRINTABLE'):
+                    continue
+                if p.startswith('TYPE='):
+                    label = param.split('=', 1)[1].strip()
+                elif not label:
+                    label = param.strip()
+            if number.strip():
+                current_phones.append({'number': number.strip(), 'label': label})
+
+
+def contacts_from_json(contacts):
+    """Normalize the mobile app's contact list to the parse_vcf shape"""
+    for contact in contacts:
+        phone_numbers = contact.get('phone_numbers', [])
+        # Backwards compat: single phone_number field
+        if not phone_numbers and contact.get('phone_number'):
+            phone_numbers = [{'phone_number': contact['phone_number']}]
+        yield {
+            'name': contact.get('name', ''),
+            'phones': [
+                {'number': phone.get('phone_number', ''), 'label': phone.get('label', '')}
+                for phone in phone_numbers],
+        }
+
+
+def save_chunk(workers, alt_phones):
+    """bulk_create one chunk of workers and their alt phones, retrying with fresh slugs if one was taken"""
+    for attempt in range(SLUG_RETRIES):
+        for worker, slug in zip(workers, unique_random_slugs(len(workers), Worker.slug_length, Worker.slug_alphabet)):
+            worker.slug = slug
+        try:
+            with transaction.atomic():
+                Worker.objects.bulk_create(workers)
+                AltPhone.objects.bulk_create([
+                    AltPhone(worker=worker, phone_number=number, label=label)
+                    for worker, phones in zip(workers, alt_phones)
+                    for number, label in phones])
+            return
+        except IntegrityError:
+            if attempt == SLUG_RETRIES - 1:
+                raise
+            for worker in workers:
+                worker.pk = None
+
+
+def run_import(job, contacts, chunk_size=IMPORT_CHUNK_SIZE):
+    """Import `contacts` into the job's company in chunks, recording progress and per-row errors on the job"""
+    job.status = 'running'
+    job.total = len(contacts)
+    job.save(update_fields=['status', 'total'])
+    errors = []
+    try:
+        existing_phones = set(Worker.objects.filter(company_id=job.company_id).values_list('phone_number', flat=True))
+        for start in range(0, len(contacts), chunk_size):
+            workers = []
+            alt_phones = []
+            for row, contact in enumerate(contacts[start:start + chunk_size], start=start + 1):
+                name = (contact['name'] or '').strip() or 'Unnamed'
+                if not contact['phones']:
+                    errors.append({'row': row, 'name': name, 'message': 'No phone number'})
+                    continue
+                primary = valid_phone_number(contact['phones'][0]['number'])
+                if primary:
+                    primary = e164(primary)
+                if not primary or len(primary) > Worker._meta.get_field('phone_number').max_length:
+                    errors.append({'row': row, 'name': name, 'message': 'Invalid phone number'})
+                    continue
+                if primary in existing_phones:
+                    job.skipped += 1
+                    continue
+                existing_phones.add(primary)
+                extras = []
+                for extra in contact['phones'][1:]:
+                    number = valid_phone_number(extra['number'])
+                    number = number and e164(number)
+                    if number and number != primary and number not in [n for n, _ in extras] \
+                            and len(number) <= AltPhone._meta.get_field('phone_number').max_length:
+                        extras.append((number, extra.get('label', '')))
+                workers.append(Worker(company_id=job.company_id, phone_number=primary, name=name))
+                alt_phones.append(extras)
+            save_chunk(workers, alt_phones)
+            job.imported += len(workers)
+            job.processed = min(start + chunk_size, len(contacts))
+            job.errors = errors
+            job.save(update_fields=['processed', 'imported', 'skipped', 'errors'])
+        job.status = 'done'
+    except Exception as e:
+        logger.exception(f"Worker import {job.id} failed")
+        errors.append({'row': None, 'name': None, 'message': str(e)})
+        job.status = 'failed'
+    job.errors = errors
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'errors', 'finished_at'])
+    return job
+
+
+def run_import_in_thread(job_id, contacts):
+    try:
+        run_import(WorkerImportJob.objects.get(id=job_id), contacts)
+    finally:
+        connection.close()
+
+
+def start_import(company, user, source, contacts):
+    """Create a WorkerImportJob and run it.
+
+    Small imports finish before this returns; larger ones run in a background
+    thread and are followed by polling the job. Returns the job.
+    """
+    contacts = list(contacts)
+    job = WorkerImportJob.objects.create(company=company, created_by=user, source=source, total=len(contacts))
+    if len(contacts) <= IMPORT_CHUNK_SIZE:
+        return run_import(job, contacts)
+    transaction.on_commit(lambda: threading.Thread(
+        target=run_import_in_thread, args=(job.id, contacts), daemon=True).start())
+    return job
+
+
+def import_job_data(job):
+    return {
+        'job_id': job.id,
+        'status': job.status,
+        'total': job.total,
+        'processed': job.processed,
+        'imported': job.imported,
+        'skipped': job.skipped,
+        'errors': [
+            f"Row {error['row']}: {error['message']} for {error['name']}" if error['row'] else error['message']
+            for error in job.errors],
+        'row_errors': job.errors,
+    }
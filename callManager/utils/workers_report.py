@@ -0,0 +1,119 @@
+import csv
+import logging
+import tempfile
+import threading
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.files import File
+from django.db import connection, transaction
+from django.utils import timezone
+
+from callManager.models import LaborRequest, ReportExport
+from callManager.utils.payroll import attach_payroll, time_entries_prefetch
+from callManager.utils.sign_in_sheet import SignInSheet
+
+logger = logging.getLogger('callManager')
+
+WORKERS_REPORT_COLUMNS = ['Event', 'Call Time', 'Worker', 'Labor Type', 'Sign In', 'Sign Out', 'Meal Breaks', 'Total Hours']
+WORKERS_REPORT_FIELDS = ['event', 'call_time', 'worker', 'labor_type', 'sign_in', 'sign_out', 'meal_breaks', 'total_hours']
+WORKERS_REPORT_COL_WIDTHS = [130, 180, 130, 90, 70, 70, 70, 70]  # fits the 10 inch landscape page
+# rows fetched per round trip (plus one prefetch query each for time entries and meal breaks)
+REPORT_CHUNK_SIZE = 500
+# PDFs with more rows than this are rendered by a background ReportExport
+INLINE_PDF_ROWS = 500
+
+
+def workers_report_requests(company, event_ids):
+    """Confirmed requests of the company's selected events, in report order"""
+    return LaborRequest.objects.filter(
+        event__in=event_ids,
+        company=company,
+        confirmed=True
+    ).select_related(
+        'worker', 'labor_requirement__labor_type', 'labor_requirement__call_time__event'
+    ).prefetch_related(time_entries_prefetch()).order_by(
+        'event__start_date',
+        'event_id',
+        'labor_requirement__call_time__date',
+        'labor_requirement__call_time__time',
+        'labor_requirement__call_time_id',
+        'id')
+
+
+def iter_workers_report_rows(company, event_ids, chunk_size=REPORT_CHUNK_SIZE):
+    """Yield report rows for the whole range, holding at most one chunk of requests in memory"""
+    labor_requests = workers_report_requests(company, event_ids).iterator(chunk_size=chunk_size)
+    for req in labor_requests:
+        attach_payroll([req], company.meal_penalty_trigger_time)
+        call_time = req.labor_requirement.call_time
+        time_entry = req.time_entry
+        yield {
+            'event': call_time.event.event_name,
+            'call_time': f"{call_time.name} ({call_time.date} at {call_time.time.strftime('%I:%M %p')})",
+            'worker': req.worker.name or "Unnamed Worker",
+            'labor_type': req.labor_requirement.labor_type.name,
+            'sign_in': time_entry.start_time.strftime('%I:%M %p') if time_entry and time_entry.start_time else '-',
+            'sign_out': time_entry.end_time.strftime('%I:%M %p') if time_entry and time_entry.end_time else '-',
+            'meal_breaks': len(time_entry.meal_breaks.all()) if time_entry else '-',
+            'total_hours': f"{time_entry.total_hours_worked:.2f}" if time_entry else '-'
+        }
+
+
+class Echo:
+    """File-like object for csv.writer that hands each line back instead of buffering it"""
+    def write(self, value):
+        return value
+
+
+def stream_workers_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(WORKERS_REPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow([row[field] for field in WORKERS_REPORT_FIELDS])
+
+
+def build_workers_pdf(company, rows, output):
+    """Render the workers report PDF to `output` (a path or a file-like object).
+
+    `rows` arrive in event order, so each event's pages are drawn as its rows stream in.
+    """
+    sheet = SignInSheet(output, WORKERS_REPORT_COLUMNS, WORKERS_REPORT_COL_WIDTHS,
+                        title=f"Workers Report for {company.name}", signature=True)
+    for event_name, event_rows in groupby(rows, key=itemgetter('event')):
+        sheet.add_group(f"Event: {event_name}", ([row[field] for field in WORKERS_REPORT_FIELDS] for row in event_rows))
+    sheet.save()
+
+
+def render_workers_pdf_export(export_id):
+    """Background target: render a workers_pdf ReportExport to a temp file and attach it"""
+    try:
+        export = ReportExport.objects.select_related('company').get(id=export_id)
+        export.status = 'running'
+        export.save(update_fields=['status'])
+        try:
+            with tempfile.TemporaryFile() as output:
+                build_workers_pdf(export.company, iter_workers_report_rows(export.company, export.params['event_ids']), output)
+                output.seek(0)
+                export.file.save(f"workers_report_{export.company.slug}_{export.id}.pdf", File(output), save=False)
+            export.status = 'done'
+        except Exception as e:
+            logger.exception(f"Report export {export.id} failed")
+            export.status = 'failed'
+            export.error = str(e)
+        export.finished_at = timezone.now()
+        export.save(update_fields=['status', 'file', 'error', 'finished_at'])
+    finally:
+        connection.close()
+
+
+def start_workers_pdf_export(company, user, event_ids, row_count):
+    export = ReportExport.objects.create(
+        company=company,
+        created_by=user,
+        report='workers_pdf',
+        params={'event_ids': [int(event_id) for event_id in event_ids]},
+        row_count=row_count)
+    transaction.on_commit(lambda: threading.Thread(
+        target=render_workers_pdf_export, args=(export.id,), daemon=True).start())
+    return export
@@ -15,21 +15,20 @@ from callManager.forms import (
         CallTimeForm,
         LaborRequirementForm,
         )
-from callManager.views import generate_short_token, log_sms, send_message
+from callManager.views import send_message
+from callManager.utils.cloning import clone_call_times
+from callManager.utils.sms_outbox import enqueue_sms
+from callManager.utils.payroll import attach_payroll, time_entries_prefetch
+from callManager.utils.time_rules import time_rules_for
 # Django imports
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from datetime import datetime, time, timedelta
-from django.conf import settings
 from django.http import HttpResponse
 from django.utils import timezone
 from django.urls import reverse
 from django.contrib import messages
 
-# Twilio imports
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
-
 import logging
 
 # Create a logger instance
@@ -105,7 +104,7 @@ def add_labor_to_call(request, slug):
 def edit_call_time(request, slug):
     manager = request.user.manager
     company = manager.company
-    call_time = get_object_or_404(CallTime, slug=slug, event__company=manager.company)
+    call_time = get_object_or_404(CallTime.objects.select_related('event__company'), slug=slug, event__company=manager.company)
     if request.method == "POST":
         form = CallTimeForm(request.POST, instance=call_time, event=call_time.event)
         if form.is_valid():
@@ -116,8 +115,6 @@ def edit_call_time(request, slug):
                     confirmed=True,
                 ).select_related('worker')
                 if confirmed_requests:
-                    client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN) if settings.TWILIO_ENABLED == 'enabled' else None
-                    sms_errors = []
                     for req in confirmed_requests:
                         worker = req.worker
                         if worker.sms_consent and not worker.stop_sms and worker.phone_number:
@@ -134,23 +131,8 @@ def edit_call_time(request, slug):
                                 f"Now: {updated_call_time.date.strftime('%B %d')} at {updated_call_time.time.strftime('%I:%M %p')}. "
                                 f"Confirm: {confirm_url}"
                             )
-                            if settings.TWILIO_ENABLED == 'enabled' and client:
-                                try:
-                                    client.messages.create(
-                                        body=message_body,
-                                        from_=settings.TWILIO_PHONE_NUMBER,
-                                        to=str(worker.phone_number))
-                                except TwilioRestException as e:
-                                    sms_errors.append(f"Failed to notify {worker.name}: {str(e)}")
-                                finally:
-                                    log_sms(company)
-                            else:
-                                log_sms(company)
-                                print(message_body)
-                    if sms_errors:
-                        messages.warning(request, f"Some notifications failed: {', '.join(sms_errors)}")
-                    else:
-                        messages.success(request, "Call time updated and workers notified.")
+                            enqueue_sms(message_body, worker.phone_number, company, worker)
+                    messages.success(request, "Call time updated and workers notified.")
             updated_call_time.save()
             return redirect('event_detail', slug=call_time.event.slug)
     else:
@@ -188,7 +170,6 @@ def call_time_request_list(request, slug):
     if labor_type_filter != 'All':
         labor_requests = labor_requests.filter(labor_requirement__labor_type__id=labor_type_filter)
     if request.method == "POST":
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN) if settings.TWILIO_ENABLED == 'enabled' else None
         if 'request_id' in request.POST:
             request_id = request.POST.get('request_id')
             action = request.POST.get('action')
@@ -199,7 +180,6 @@ def call_time_request_list(request, slug):
                 if action == 'confirm':
                     call_time = labor_request.labor_requirement.call_time
                     if worker.sms_consent and not worker.stop_sms and worker.phone_number:
-                        sms_errors = []
                         if labor_request.sms_sent:
                             message_body = (
                                     f"confirmed {labor_request.labor_requirement.labor_type}"
@@ -213,25 +193,7 @@ def call_time_request_list(request, slug):
                                     f"for {event.event_name} - {call_time.name} at {call_time.time.strftime('%I:%M %p')} on {call_time.date.strftime('%B %d')}\n"
                                     f"Details in the link: {confirmation_url}"
                             )
-                        msglen = len(message_body)
-                        if settings.TWILIO_ENABLED == 'enabled' and client:
-                            try:
-                                client.messages.create(
-                                    body=message_body,
-                                    from_=settings.TWILIO_PHONE_NUMBER,
-                                    to=str(worker.phone_number))
-                            except TwilioRestException as e:
-                                sms_errors.append(f"Failed to notify {worker.name}: {str(e)}")
-                            finally:
-                                log_sms(company)
-                        else:
-                            charges = 1
-                            while msglen > 144:
-                                charges += 1
-                                msglen -= 144
-                            log_sms(company)
-                            print(message_body)
-                            print(charges, msglen)
+                        enqueue_sms(message_body, worker.phone_number, company, worker)
                         labor_request.confirmed = True
                         labor_request.save()
                 if action == 'ncns':
@@ -294,7 +256,7 @@ def call_time_tracking(request, slug):
         request_id = request.POST.get('request_id')
         action = request.POST.get('action')
         labor_request = get_object_or_404(LaborRequest, id=request_id, labor_requirement__call_time=call_time)
-        minimum_hours = labor_request.labor_requirement.minimum_hours or call_time.minimum_hours or call_time.event.location_profile.minimum_hours or company.minimum_hours
+        rules = time_rules_for(call_time)
         worker = labor_request.worker
         if action in [ 'sign_out', 'ncns', 'call_out', 'update_start_time', 'update_end_time', 'add_meal_break', 'update_meal_break']:
             time_entry, created = TimeEntry.objects.get_or_create(
@@ -309,17 +271,7 @@ def call_time_tracking(request, slug):
 #                time_entry.save()
 #                messages.success(request, f"Signed in {worker.name}")
             if action == 'sign_out' and time_entry.start_time and not time_entry.end_time:
-                end_time = datetime.now()
-                if time_entry.start_time + timedelta(hours=minimum_hours) > end_time:
-                    end_time = time_entry.start_time + timedelta(hours=minimum_hours)
-                minutes = end_time.minute
-                if minutes > 35:
-                    end_time = end_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-                elif minutes > 5:
-                    end_time = end_time.replace(minute=30, second=0, microsecond=0)
-                else:
-                    end_time = end_time.replace(minute=0, second=0, microsecond=0)
-                time_entry.end_time = end_time
+                time_entry.end_time = rules.sheet_clock_out(datetime.now(), time_entry.start_time, labor_request.labor_requirement_id)
                 time_entry.save()
                 messages.success(request, f"Signed out {worker.name}")
             elif action == 'ncns' and not was_ncns:
@@ -423,7 +375,7 @@ def call_time_tracking(request, slug):
                 return HttpResponse(" ")
         if not request.headers.get('HX-Request'):
             return redirect('call_time_tracking', slug=slug)
-    confirmed_requests = labor_requests
+    confirmed_requests = attach_payroll(labor_requests.prefetch_related(time_entries_prefetch()), company.meal_penalty_trigger_time)
     ncns_requests = LaborRequest.objects.filter(
         labor_requirement__call_time=call_time,
         confirmed=False,
@@ -431,6 +383,7 @@ def call_time_tracking(request, slug):
         worker__nocallnoshow__gt=0).select_related('worker', 'labor_requirement__labor_type')
     if labor_type_filter != 'All':
         ncns_requests = ncns_requests.filter(labor_requirement__labor_type__id=labor_type_filter)
+    ncns_requests = ncns_requests.prefetch_related(time_entries_prefetch())
     labor_types = LaborType.objects.filter(laborrequirement__call_time=call_time).distinct()
     hours = range(24)
     minutes = ['00', '30']
@@ -468,9 +421,7 @@ def htmx_time_sheet_row(request, id):
     worker = labor_request.worker
     call_time = labor_request.labor_requirement.call_time
     labor_requirement = labor_request.labor_requirement
-    minimum_hours = labor_requirement.minimum_hours
-    round_up = call_time.event.location_profile.hour_round_up or company.hour_round_up
-    company = call_time.event.company
+    rules = time_rules_for(call_time)
     start_time = call_time.time
     date = call_time.date
     time_entry, created = TimeEntry.objects.get_or_create(
@@ -489,27 +440,11 @@ def htmx_time_sheet_row(request, id):
             if not time_entry.start_time:
                 time_entry.start_time = datetime.combine(date, start_time)
                 time_entry.save()
-            end_time = datetime.now()
-            if time_entry.start_time + timedelta(hours=minimum_hours) > end_time:
-                end_time = time_entry.start_time + timedelta(hours=minimum_hours)
-            minutes = end_time.minute
-            if minutes > 30 + round_up:
-                end_time = end_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-            elif minutes > round_up:
-                end_time = end_time.replace(minute=30, second=0, microsecond=0)
-            else:
-                end_time = end_time.replace(minute=0, second=0, microsecond=0)
-            time_entry.end_time = end_time
+            time_entry.end_time = rules.clock_out(datetime.now(), time_entry.start_time, labor_requirement.id)
             time_entry.save()
             messages.success(request, f"Signed out at {time_entry.end_time.strftime('%I:%M %p')}.")
         elif action == 'add_meal_break':
-            break_start = datetime.now()
-            if break_start.minute > 30 + round_up:
-                break_start = break_start.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-            elif break_start.minute > round_up:
-                break_start = break_start.replace(minute=30, second=0, microsecond=0)
-            else:
-                break_start = break_start.replace(minute=0, second=0, microsecond=0)
+            break_start = rules.round_break(datetime.now())
             break_type = request.POST.get('break_type', 'paid')
             duration = timedelta(hours=1) if break_type == 'unpaid' else timedelta(minutes=30)
             meal_break = MealBreak.objects.create(
@@ -521,13 +456,7 @@ def htmx_time_sheet_row(request, id):
         elif action == 'update_meal_break':
             meal_break_id = request.POST.get('meal_break_id')
             meal_break = get_object_or_404(MealBreak, id=meal_break_id, time_entry=time_entry)
-            break_time = datetime.now()
-            if break_time.minute > 30 + round_up:
-                break_time = break_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-            elif break_time.minute > round_up:
-                break_time = break_time.replace(minute=30, second=0, microsecond=0)
-            else:
-                break_time = break_time.replace(minute=0, second=0, microsecond=0)
+            break_time = rules.round_break(datetime.now())
             meal_break.break_time = break_time
             meal_break.save()
             messages.success(request, f"Updated meal break for {labor_request.worker.name}")
@@ -561,31 +490,7 @@ def copy_call_time(request, slug):
     if request.method == "POST":
         form = CallTimeForm(request.POST, event=event)
         if form.is_valid():
-            new_call_time = form.save(commit=False)
-            new_call_time.event = event
-            new_call_time.slug = None  # Generate new slug
-            new_call_time.original_date = new_call_time.date
-            new_call_time.original_time = new_call_time.time
-            new_call_time.save()
-            # Copy labor requirements
-            for labor_requirement in call_time.labor_requirements.all():
-                new_labor_requirement = LaborRequirement.objects.create(
-                    call_time=new_call_time,
-                    labor_type=labor_requirement.labor_type,
-                    needed_labor=labor_requirement.needed_labor,
-                    minimum_hours=labor_requirement.minimum_hours,
-                    fcfs_positions=labor_requirement.fcfs_positions
-                )
-                # Copy labor requests as "requested" without response data
-                for labor_request in labor_requirement.labor_requests.all():
-                    LaborRequest.objects.create(
-                        worker=labor_request.worker,
-                        labor_requirement=new_labor_requirement,
-                        token_short=generate_short_token(), 
-                        requested=True,
-                        sms_sent=False,
-                        is_reserved=labor_request.is_reserved
-                    )
+            clone_call_times([(call_time, event, form.cleaned_data)])
             messages.success(request, f"Call time '{call_time.name}' copied successfully.")
             return redirect('event_detail', slug=event.slug)
     else:
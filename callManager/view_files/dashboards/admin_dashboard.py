@@ -3,7 +3,6 @@ from callManager.models import (
         LaborRequest,
         Event,
         LaborRequirement,
-        SentSMS,
         OwnerInvitation,
         )
 # Django imports
@@ -11,18 +10,17 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q, Count
 from datetime import datetime, timedelta
-from django.conf import settings
 from django.utils import timezone
 from django.urls import reverse
 from django.contrib import messages
 
-# Twilio imports
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
+from callManager.utils.counters import all_company_counters, labor_needs_by_event
+from callManager.utils.sms_usage import sms_sent_since
 
 import logging
+import re
 
-from callManager.views import log_sms
+from callManager.utils.sms_outbox import enqueue_sms
 
 # Create a logger instance
 logger = logging.getLogger('callManager')
@@ -65,39 +63,13 @@ def admin_dashboard(request):
     if request.GET.get('include_past'):
         events = events.order_by('start_date')
     total_events = events.count()
-    pending_requests = LaborRequest.objects.filter(
-        availability_response__isnull=True).count()
-    declined_requests = LaborRequest.objects.filter(
-        availability_response='no').count()
-    labor_requirements = LaborRequirement.objects.select_related(
-        'labor_type', 'call_time__event').annotate(
-        confirmed_count=Count('labor_requests', filter=Q(labor_requests__confirmed=True)))
-    unfilled_spots = sum(max(0, lr.needed_labor - lr.confirmed_count) for lr in labor_requirements)
-    current_date = timezone.now()
-    start_of_month = current_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    next_month = (start_of_month + timedelta(days=32)).replace(day=1)
-    sent_messages = SentSMS.objects.filter(
-        datetime_sent__gte=start_of_month,
-        datetime_sent__lt=next_month).count()
-    event_labor_needs = {}
-    for event in events:
-        event_requirements = [lr for lr in labor_requirements if lr.call_time.event_id == event.id]
-        unfilled_requirements = [
-            lr for lr in event_requirements if lr.confirmed_count < lr.needed_labor]
-        unfilled_count = len(unfilled_requirements)
-        total_unfilled_spots = sum(max(0, lr.needed_labor - lr.confirmed_count) for lr in unfilled_requirements)
-        if unfilled_count > 3:
-            labor_needs_text = f"{unfilled_count} unfilled, {total_unfilled_spots} total labor needed"
-        elif unfilled_count > 0:
-            labor_needs_text = ", ".join(
-                f"{lr.labor_type.name}: {max(0, lr.needed_labor - lr.confirmed_count)} needed"
-                for lr in unfilled_requirements)
-        else:
-            labor_needs_text = "All calls filled"
-        event_labor_needs[event.id] = {
-            'unfilled_count': unfilled_count,
-            'total_unfilled_spots': total_unfilled_spots,
-            'labor_needs_text': labor_needs_text}
+    company_counters = list(all_company_counters())
+    pending_requests = sum(counters.pending_count for counters in company_counters)
+    declined_requests = sum(counters.declined_count for counters in company_counters)
+    unfilled_spots = sum(counters.unfilled_spots for counters in company_counters)
+    start_of_month = timezone.now().date().replace(day=1)
+    sent_messages = sms_sent_since(start_of_month)
+    event_labor_needs = labor_needs_by_event(events)
     if request.method == "POST":
         phone = request.POST.get('phone')
         if phone and phone != '':
@@ -113,22 +85,9 @@ def admin_dashboard(request):
         if phone:
             invitation = OwnerInvitation.objects.create(phone=phone)
             registration_url = request.build_absolute_uri(reverse('register_owner', args=[str(invitation.token)]))
-            client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN) if settings.TWILIO_ENABLED == 'enabled' else None
             message_body = f'You are invited to join Callman. Use the following link to register:\n{registration_url}'
-            if settings.TWILIO_ENABLED == 'enabled' and client:
-                try:
-                    client.messages.create(
-                        body=message_body,
-                        from_=settings.TWILIO_PHONE_NUMBER,
-                        to=phone)
-                    log_sms(request.user.manager.company)
-                    messages.success(request, f"Invitation sent to {phone}.")
-                except TwilioRestException as e:
-                    messages.error(request, f"Failed to send invitation: {str(e)}")
-            else:
-                log_sms(request.user.manager.company)
-                print(message_body)
-                messages.success(request, f"Invitation sent for {phone}.")
+            enqueue_sms(message_body, phone, request.user.manager.company)
+            messages.success(request, f"Invitation sent to {phone}.")
         else:
             messages.error(request, "Please provide a valid phone number.") 
     context = {
@@ -6,7 +6,6 @@ from callManager.models import (
         LaborType,
         Steward,
         Worker,
-        SentSMS,
         LocationProfile,
         )
 # Django imports
@@ -16,7 +15,11 @@ from django.db.models import Q,Count
 from datetime import datetime, timedelta
 from django.utils import timezone
 
+from callManager.utils.counters import get_company_counters, labor_needs_by_event
+from callManager.utils.sms_usage import sms_sent_since
+
 import logging
+import re
 
 
 # Create a logger instance
@@ -63,44 +66,14 @@ def manager_dashboard(request):
             events = events.filter(term_filter)
     events = events.order_by('start_date').distinct()
     total_events = events.count()
-    pending_requests = LaborRequest.objects.filter(
-        labor_requirement__call_time__event__company=company,
-        availability_response__isnull=True).count()
-    declined_requests = LaborRequest.objects.filter(
-        labor_requirement__call_time__event__company=company,
-        availability_response='no').count()
-    labor_requirements = LaborRequirement.objects.filter(
-        call_time__event__company=company).select_related(
-        'labor_type', 'call_time__event').annotate(
-        confirmed_count=Count('labor_requests', filter=Q(labor_requests__confirmed=True)))
-    unfilled_spots = sum(max(0, lr.needed_labor - lr.confirmed_count) for lr in labor_requirements)
-    current_date = timezone.now()
-    start_of_month = current_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    next_month = (start_of_month + timedelta(days=32)).replace(day=1)
-    sent_messages = SentSMS.objects.filter(
-        company=company,
-        datetime_sent__gte=start_of_month,
-        datetime_sent__lt=next_month).count()
-    event_labor_needs = {}
+    counters = get_company_counters(company)
+    pending_requests = counters.pending_count
+    declined_requests = counters.declined_count
+    unfilled_spots = counters.unfilled_spots
+    start_of_month = timezone.now().date().replace(day=1)
+    sent_messages = sms_sent_since(start_of_month, company)
+    event_labor_needs = labor_needs_by_event(events)
     stewards = Steward.objects.filter(company=company)
-    for event in events:
-        event_requirements = [lr for lr in labor_requirements if lr.call_time.event_id == event.id]
-        unfilled_requirements = [
-            lr for lr in event_requirements if lr.confirmed_count < lr.needed_labor]
-        unfilled_count = len(unfilled_requirements)
-        total_unfilled_spots = sum(max(0, lr.needed_labor - lr.confirmed_count) for lr in unfilled_requirements)
-        if unfilled_count > 3:
-            labor_needs_text = f"{unfilled_count} unfilled, {total_unfilled_spots} total labor needed"
-        elif unfilled_count > 0:
-            labor_needs_text = ", ".join(
-                f"{lr.labor_type.name}: {max(0, lr.needed_labor - lr.confirmed_count)} needed"
-                for lr in unfilled_requirements)
-        else:
-            labor_needs_text = "All calls filled"
-        event_labor_needs[event.id] = {
-            'unfilled_count': unfilled_count,
-            'total_unfilled_spots': total_unfilled_spots,
-            'labor_needs_text': labor_needs_text}
     context = {
         'company': company,
         'events': events,
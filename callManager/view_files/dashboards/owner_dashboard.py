@@ -12,12 +12,12 @@ from callManager.forms import (
 # Django imports
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from django.conf import settings
 from django.urls import reverse
 from django.contrib import messages
 import logging
 
-from callManager.views import log_sms, send_message
+from callManager.views import send_message
+from callManager.utils.sms_outbox import enqueue_sms
 
 # Create a logger instance
 logger = logging.getLogger('callManager')
@@ -34,22 +34,9 @@ def owner_dashboard(request):
             if phone:
                 invitation = ManagerInvitation.objects.create(company=company, phone=phone)
                 registration_url = request.build_absolute_uri(reverse('register_manager', args=[str(invitation.token)]))
-                client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN) if settings.TWILIO_ENABLED == 'enabled' else None
                 message_body = f'You are invited to become a manager for {company.name}. Register: {registration_url}'
-                if settings.TWILIO_ENABLED == 'enabled' and client:
-                    try:
-                        client.messages.create(
-                            body=message_body,
-                            from_=settings.TWILIO_PHONE_NUMBER,
-                            to=phone)
-                        log_sms(company)
-                        messages.success(request, f"Invitation sent to {phone}.")
-                    except TwilioRestException as e:
-                        messages.error(request, f"Failed to send invitation: {str(e)}")
-                else:
-                    log_sms(company)
-                    print(message_body)
-                    messages.success(request, f"Invitation printed for {phone}.")
+                enqueue_sms(message_body, phone, company)
+                messages.success(request, f"Invitation sent to {phone}.")
             else:
                 messages.error(request, "Please provide a phone number.")
         else:
@@ -5,7 +5,6 @@ from callManager.models import (
         Event,
         LaborRequirement,
         Steward,
-        SentSMS,
         TemporaryScanner,
         )
 #forms
@@ -16,17 +15,14 @@ from callManager.forms import (
 # Django imports
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.db.models import Q, Count
 from datetime import datetime, timedelta
-from django.conf import settings
 from django.utils import timezone
 from django.urls import reverse
 from django.contrib import messages
 from django.contrib.auth.models import User
 
-# Twilio imports
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
 
 # repotlab imports for PDF generation
 
@@ -36,7 +32,9 @@ import uuid
 
 # posssibly imports
 
-from callManager.views import log_sms, send_message, generate_short_token
+from callManager.views import send_message, generate_short_token
+from callManager.utils.sms_outbox import enqueue_sms
+from callManager.utils.sms_usage import sms_sent_since
 import logging
 
 # Create a logger instance
@@ -70,7 +68,7 @@ def event_detail(request, slug):
         else:
             call_time.has_changed = False
     labor_requirements = LaborRequirement.objects.filter(call_time__event=event)
-    labor_requests = LaborRequest.objects.filter(labor_requirement__call_time__event=event).values('labor_requirement_id').annotate(
+    labor_requests = LaborRequest.objects.filter(event=event).values('labor_requirement_id').annotate(
         pending_count=Count('id', filter=Q(requested=True) & Q(availability_response__isnull=True)),
         confirmed_count=Count('id', filter=Q(confirmed=True)),
         available_count=Count('id', filter=Q(availability_response='yes') & Q(confirmed=False)),
@@ -112,7 +110,7 @@ def event_detail(request, slug):
             messages.error(request, "You do not have permission to send messages for this event.")
             return redirect('event_detail', slug=slug)
         queued_requests = LaborRequest.objects.filter(
-                labor_requirement__call_time__event=event,
+                event=event,
                 requested=True,
                 sms_sent=False).select_related('worker')
         if queued_requests.exists():
@@ -134,11 +132,12 @@ def event_detail(request, slug):
                 else:
                     message_body = f"This is {manager.user.first_name}/{company.name_short or company.name}: Confirm availability for {event.event_name}: {confirmation_url}"
                 sms_errors.extend(send_message(message_body, worker, manager, company))
-                for labor_request in requests:
-                    if worker.sms_consent == True:
-                        labor_request.sms_sent = True
-                    labor_request.token_short = token
-                    labor_request.save()
+                with transaction.atomic():
+                    for labor_request in requests:
+                        if worker.sms_consent == True:
+                            labor_request.sms_sent = True
+                        labor_request.token_short = token
+                        labor_request.save()
             message = f"Messages processed for {len(workers_to_notify)} workers."
             if sms_errors:
                 message += f" Errors: {', '.join(sms_errors)}."
@@ -276,7 +275,6 @@ def cancel_event(request, slug):
     if request.method == "POST":
         call_times = event.call_times.all()
         message_body = f"Sorry, the event has been canceled: {event.event_name} on {event.start_date}"
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN) if settings.TWILIO_ENABLED == 'enabled' else None
         for call_time in call_times:
             labor_requirements = call_time.labor_requirements.all()
             for labor_requirement in labor_requirements:
@@ -284,19 +282,7 @@ def cancel_event(request, slug):
                 for labor_request in labor_requests:
                     if labor_request.worker.sms_consent and not labor_request.worker.stop_sms and labor_request.worker.phone_number:
                         if labor_request.confirmed or labor_request.availability_response == 'yes' or labor_request.availability_response == None:
-                            if settings.TWILIO_ENABLED == 'enabled' and client:
-                                try:
-                                    client.messages.create(
-                                        body=message_body,
-                                        from_=settings.TWILIO_PHONE_NUMBER,
-                                        to=str(labor_request.worker.phone_number))
-                                except TwilioRestException as e:
-                                    print(f"Failed to notify {labor_request.worker.name}: {str(e)}")
-                                finally:
-                                    log_sms(event.company)
-                            else:
-                                log_sms(event.company)
-                                print(message_body)
+                            enqueue_sms(message_body, labor_request.worker.phone_number, event.company, labor_request.worker)
         event.canceled = True
         event.steward = None
         event.save()
@@ -311,23 +297,18 @@ def cancel_event(request, slug):
     events = events.order_by('start_date').distinct()
     total_events = events.count()
     pending_requests = LaborRequest.objects.filter(
-        labor_requirement__call_time__event__company=company,
+        company=company,
         availability_response__isnull=True).count()
     declined_requests = LaborRequest.objects.filter(
-        labor_requirement__call_time__event__company=company,
+        company=company,
         availability_response='no').count()
     labor_requirements = LaborRequirement.objects.filter(
         call_time__event__company=company).select_related(
         'labor_type', 'call_time__event').annotate(
         confirmed_count=Count('labor_requests', filter=Q(labor_requests__confirmed=True)))
     unfilled_spots = sum(max(0, lr.needed_labor - lr.confirmed_count) for lr in labor_requirements)
-    current_date = timezone.now()
-    start_of_month = current_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    next_month = (start_of_month + timedelta(days=32)).replace(day=1)
-    sent_messages = SentSMS.objects.filter(
-        company=company,
-        datetime_sent__gte=start_of_month,
-        datetime_sent__lt=next_month).count()
+    start_of_month = timezone.now().date().replace(day=1)
+    sent_messages = sms_sent_since(start_of_month, company)
     event_labor_needs = {}
     stewards = Steward.objects.filter(company=company)
     for event in events:
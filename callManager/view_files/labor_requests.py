@@ -7,6 +7,7 @@ from callManager.models import (
         LaborRequest,
         LaborRequirement,
         LaborType,
+        Notifications,
         Worker,
         )
 #forms
@@ -19,18 +20,15 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q 
 from datetime import datetime, timedelta
-from django.conf import settings
 from django.utils import timezone
 from django.contrib import messages
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
-# Twilio imports
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
 
-
-from callManager.views import log_sms, generate_short_token, push_notification
+from callManager.views import generate_short_token, push_notification
+from callManager.utils.sms_outbox import enqueue_sms
 from callManager.view_files.notify import notify
+from callManager.utils.conflicts import conflicts_by_worker, worker_conflicts_context
 import logging
 
 # Create a logger instance
@@ -54,15 +52,14 @@ def labor_request_list(request, slug):
         company = manager.company
         labor_requirement = get_object_or_404(LaborRequirement, slug=slug, call_time__event__company=company)
     labor_requests = LaborRequest.objects.filter(labor_requirement=labor_requirement, requested=True).select_related('worker')
-    for labor_request in labor_requests:
-        notifications = labor_request.notifications.all()
-        for notification in notifications:
-            notification.read = True
-            notification.save()
-            push_notification(company)
+    read_ids = list(Notifications.objects.filter(
+        labor_request__in=labor_requests, read=False).values_list('id', flat=True))
+    if read_ids:
+        Notifications.objects.filter(id__in=read_ids).update(read=True)
+        push_notification(company, changed=read_ids)
     event = labor_requirement.call_time.event
     company = event.company
-    workers = Worker.objects.filter(company=company).distinct()
+    workers = Worker.objects.filter(company=company).distinct().prefetch_related('labor_types')
     if request.method == "POST":
         if 'action' in request.POST and request.POST['action'] == 'add_worker':
             add_worker_form = WorkerFormLite(request.POST)
@@ -92,7 +89,6 @@ def labor_request_list(request, slug):
                     labor_request.save()
                 messages.success(request, f"{worker.name} queued for request.")
             
-        client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN) if settings.TWILIO_ENABLED == 'enabled' else None
         if 'request_id' in request.POST:
             request_id = request.POST.get('request_id')
             action = request.POST.get('action')
@@ -106,19 +102,7 @@ def labor_request_list(request, slug):
                                 f"Sorry, the call has been filled:\n"
                                 f"{event.event_name} @ {event.location_profile.name} - {labor_requirement.labor_type.name} - {call_time.date.strftime('%B %d')} at {labor_requirement.call_time.time.strftime('%I %p')}."
                         )
-                        if settings.TWILIO_ENABLED == 'enabled' and client:
-                            try:
-                                client.messages.create(
-                                    body=message_body,
-                                    from_=settings.TWILIO_PHONE_NUMBER,
-                                    to=str(worker.phone_number))
-                            except TwilioRestException as e:
-                                sms_errors.append(f"Failed to notify {worker.name}: {str(e)}")
-                            finally:
-                                log_sms(company)
-                        else:
-                            log_sms(company)
-                            print(message_body)
+                        enqueue_sms(message_body, worker.phone_number, company, worker)
                     labor_request.delete()
                     messages.success(request, f"Call filled for {worker.name}.")
                 if action == 'confirm':
@@ -136,23 +120,7 @@ def labor_request_list(request, slug):
                                     f"for {event.event_name} - {call_time.name} at {call_time.time.strftime('%I:%M %p')} on {call_time.date.strftime('%B %d')}\n"
                                     f"Details: {confirmation_url}"
                             )
-                        msglen = len(message_body)
-                        if settings.TWILIO_ENABLED == 'enabled' and client:
-                            try:
-                                client.messages.create(
-                                    body=message_body,
-                                    from_=settings.TWILIO_PHONE_NUMBER,
-                                    to=str(worker.phone_number))
-                            except TwilioRestException as e:
-                                sms_errors.append(f"Failed to notify {worker.name}: {str(e)}")
-                            finally:
-                                log_sms(company)
-                        else:
-                            charges = 1
-                            while msglen > 144:
-                                charges += 1
-                                msglen -= 144
-                            log_sms(company)
+                        enqueue_sms(message_body, worker.phone_number, company, worker)
                     
                     if labor_request.availability_response in [None, 'no']:  # Allow confirm from pending or declined
                         labor_request.availability_response = 'yes'
@@ -244,7 +212,7 @@ def labor_request_list(request, slug):
         confirmed_requests = labor_requests.filter(confirmed=True)
         declined_requests = labor_requests.filter(availability_response='no', canceled=False)
         canceled_requests = labor_requests.filter(canceled=True)
-        workers = Worker.objects.filter(company=company).distinct()
+        workers = Worker.objects.filter(company=company).distinct().prefetch_related('labor_types')
         workers_list = list(workers)
         workers_list.sort(key=lambda w: (labor_requirement.labor_type not in w.labor_types.all(), w.name or ''))
         search_query = request.POST.get('search', request.GET.get('search', '')).strip()
@@ -266,31 +234,8 @@ def labor_request_list(request, slug):
             page_obj = paginator.page(1)
         except EmptyPage:
             page_obj = paginator.page(paginator.num_pages)
-        conflicting_requests = LaborRequest.objects.filter(
-            worker__in=page_obj.object_list,
-            requested=True
-        ).filter(
-            labor_requirement__call_time__date__gte=labor_requirement.call_time.event.start_date,
-            labor_requirement__call_time__date__lte=(labor_requirement.call_time.event.end_date or labor_requirement.call_time.event.start_date)
-        ).filter(
-            labor_requirement__call_time__time__gte=(datetime.combine(labor_requirement.call_time.date, labor_requirement.call_time.time) - timedelta(hours=5)).time(),
-            labor_requirement__call_time__time__lte=(datetime.combine(labor_requirement.call_time.date, labor_requirement.call_time.time) + timedelta(hours=5)).time()
-        ).select_related('labor_requirement__call_time', 'labor_requirement__labor_type')
-        worker_conflicts = {}
-        for labor_request in conflicting_requests:
-            if labor_request.worker_id not in worker_conflicts:
-                worker_conflicts[labor_request.worker_id] = {'conflicts': [], 'is_confirmed': False}
-            conflict_info = {
-                'event': labor_request.labor_requirement.call_time.event.event_name,
-                'call_time': f"{labor_request.labor_requirement.call_time.name} at {labor_request.labor_requirement.call_time.time}",
-                'labor_type': labor_request.labor_requirement.labor_type.name,
-                'status': 'Confirmed' if labor_request.confirmed else 'Available' if labor_request.availability_response == 'yes' else 'Declined' if labor_request.availability_response == 'no' else 'Pending',
-                'call_time_id': labor_request.labor_requirement.call_time.id,
-                'labor_type_id': labor_request.labor_requirement.labor_type.id
-            }
-            worker_conflicts[labor_request.worker_id]['conflicts'].append(conflict_info)
-            if labor_request.confirmed:
-                worker_conflicts[labor_request.worker_id]['is_confirmed'] = True
+        worker_conflicts = worker_conflicts_context(
+            conflicts_by_worker(labor_requirement, page_obj.object_list, requested_only=True))
         requested_worker_ids = list(labor_requests.values_list('worker__id', flat=True))
         context = {
             'labor_requirement': labor_requirement,
@@ -321,7 +266,7 @@ def labor_request_list(request, slug):
     confirmed_requests = labor_requests.filter(confirmed=True)
     declined_requests = labor_requests.filter(availability_response='no', canceled=False)
     canceled_requests = labor_requests.filter(canceled=True)
-    workers = Worker.objects.filter(company=company).distinct()
+    workers = Worker.objects.filter(company=company).distinct().prefetch_related('labor_types')
     workers_list = list(workers)
     workers_list.sort(key=lambda w: (labor_requirement.labor_type not in w.labor_types.all(), w.name or ''))
     search_query = request.GET.get('search', '').strip()
@@ -343,31 +288,8 @@ def labor_request_list(request, slug):
         page_obj = paginator.page(1)
     except EmptyPage:
         page_obj = paginator.page(paginator.num_pages)
-    conflicting_requests = LaborRequest.objects.filter(
-        worker__in=page_obj.object_list,
-        requested=True
-    ).filter(
-        labor_requirement__call_time__date__gte=labor_requirement.call_time.event.start_date,
-        labor_requirement__call_time__date__lte=(labor_requirement.call_time.event.end_date or labor_requirement.call_time.event.start_date)
-    ).filter(
-        labor_requirement__call_time__time__gte=(datetime.combine(labor_requirement.call_time.date, labor_requirement.call_time.time) - timedelta(hours=5)).time(),
-        labor_requirement__call_time__time__lte=(datetime.combine(labor_requirement.call_time.date, labor_requirement.call_time.time) + timedelta(hours=5)).time()
-    ).select_related('labor_requirement__call_time', 'labor_requirement__labor_type')
-    worker_conflicts = {}
-    for labor_request in conflicting_requests:
-        if labor_request.worker_id not in worker_conflicts:
-            worker_conflicts[labor_request.worker_id] = {'conflicts': [], 'is_confirmed': False}
-        conflict_info = {
-            'event': labor_request.labor_requirement.call_time.event.event_name,
-            'call_time': f"{labor_request.labor_requirement.call_time.name} at {labor_request.labor_requirement.call_time.time}",
-            'labor_type': labor_request.labor_requirement.labor_type.name,
-            'status': 'Confirmed' if labor_request.confirmed else 'Available' if labor_request.availability_response == 'yes' else 'Declined' if labor_request.availability_response == 'no' else 'Pending',
-            'call_time_id': labor_request.labor_requirement.call_time.id,
-            'labor_type_id': labor_request.labor_requirement.labor_type.id
-        }
-        worker_conflicts[labor_request.worker_id]['conflicts'].append(conflict_info)
-        if labor_request.confirmed:
-            worker_conflicts[labor_request.worker_id]['is_confirmed'] = True
+    worker_conflicts = worker_conflicts_context(
+        conflicts_by_worker(labor_requirement, page_obj.object_list, requested_only=True))
     labor_types = LaborType.objects.filter(company=company)
     requested_worker_ids = list(labor_requests.values_list('worker__id', flat=True))
     context = {
@@ -410,7 +332,7 @@ def fill_labor_request_list(request, slug):
     else:
         return redirect('dashboard_redirect')
     labor_requests = LaborRequest.objects.filter(labor_requirement=labor_requirement, requested=True).select_related('worker')
-    workers = Worker.objects.filter(company=company).distinct()
+    workers = Worker.objects.filter(company=company).distinct().prefetch_related('labor_types')
     search_query = request.GET.get('search', '').strip()
     skill_id = request.GET.get('skill', '').strip()
     if search_query or skill_id:
@@ -440,33 +362,8 @@ def fill_labor_request_list(request, slug):
         page_obj = paginator.page(1)
     except EmptyPage:
         page_obj = paginator.page(paginator.num_pages)
-    current_call_time = labor_requirement.call_time
-    event_start_date = current_call_time.event.start_date
-    event_end_date = current_call_time.event.end_date or event_start_date
-    call_datetime = datetime.combine(event_start_date, current_call_time.time)
-    window_start = call_datetime - timedelta(hours=5)
-    window_end = call_datetime + timedelta(hours=5)
-    conflicting_requests = LaborRequest.objects.filter(
-        worker__in=page_obj.object_list,
-        requested=True).filter(
-        labor_requirement__call_time__date__gte=window_start.date(),
-        labor_requirement__call_time__date__lte=window_end.date()).filter(
-        labor_requirement__call_time__time__gte=window_start.time() if window_start.date() == labor_requirement.call_time.date else '00:00:00',
-        labor_requirement__call_time__time__lte=window_end.time() if window_end.date() == labor_requirement.call_time.date else '23:59:59').select_related('labor_requirement__call_time', 'labor_requirement__labor_type')
-    worker_conflicts = {}
-    for labor_request in conflicting_requests:
-        if labor_request.worker_id not in worker_conflicts:
-            worker_conflicts[labor_request.worker_id] = {'conflicts': [], 'is_confirmed': False}
-        conflict_info = {
-            'event': labor_request.labor_requirement.call_time.event.event_name,
-            'call_time': f"{labor_request.labor_requirement.call_time.name} at {labor_request.labor_requirement.call_time.time}",
-            'labor_type': labor_request.labor_requirement.labor_type.name,
-            'status': 'Confirmed' if labor_request.confirmed else 'Available' if labor_request.availability_response == 'yes' else 'Declined' if labor_request.availability_response == 'no' else 'Pending',
-            'call_time_id': labor_request.labor_requirement.call_time.id,
-            'labor_type_id': labor_request.labor_requirement.labor_type.id}
-        worker_conflicts[labor_request.worker_id]['conflicts'].append(conflict_info)
-        if labor_request.confirmed:
-            worker_conflicts[labor_request.worker_id]['is_confirmed'] = True
+    worker_conflicts = worker_conflicts_context(
+        conflicts_by_worker(labor_requirement, page_obj.object_list, requested_only=True))
     requested_worker_ids = list(labor_requests.values_list('worker__id', flat=True))
     pending_requests = labor_requests.filter(availability_response__isnull=True)
     available_requests = labor_requests.filter(availability_response='yes', confirmed=False)
@@ -507,38 +404,9 @@ def worker_fill_partial(request, slug, worker_id):
     labor_requests = LaborRequest.objects.filter(labor_requirement=labor_requirement, requested=True).select_related('worker')
     requested_worker_ids = list(labor_requests.values_list('worker__id', flat=True))
     
-    # Conflict data (copied from fill_labor_request_list)
-    current_call_time = labor_requirement.call_time
-    event_start_date = current_call_time.event.start_date
-    event_end_date = current_call_time.event.end_date or event_start_date
-    call_datetime = datetime.combine(event_start_date, current_call_time.time)
-    window_start = call_datetime - timedelta(hours=5)
-    window_end = call_datetime + timedelta(hours=5)
-    conflicting_requests = LaborRequest.objects.filter(
-        worker=worker,
-        requested=True
-    ).filter(
-        labor_requirement__call_time__date__gte=window_start.date(),
-        labor_requirement__call_time__date__lte=window_end.date()
-    ).filter(
-        labor_requirement__call_time__time__gte=window_start.time() if window_start.date() == labor_requirement.call_time.date else '00:00:00',
-        labor_requirement__call_time__time__lte=window_end.time() if window_end.date() == labor_requirement.call_time.date else '23:59:59'
-    ).select_related('labor_requirement__call_time', 'labor_requirement__labor_type')
-    worker_conflicts = {}
-    worker_data = {'conflicts': [], 'is_confirmed': False}
-    for labor_request in conflicting_requests:
-        conflict_info = {
-            'event': labor_request.labor_requirement.call_time.event.event_name,
-            'call_time': f"{labor_request.labor_requirement.call_time.name} at {labor_request.labor_requirement.call_time.time}",
-            'labor_type': labor_request.labor_requirement.labor_type.name,
-            'status': 'Confirmed' if labor_request.confirmed else 'Available' if labor_request.availability_response == 'yes' else 'Declined' if labor_request.availability_response == 'no' else 'Pending',
-            'call_time_id': labor_request.labor_requirement.call_time.id,
-            'labor_type_id': labor_request.labor_requirement.labor_type.id
-        }
-        worker_data['conflicts'].append(conflict_info)
-        if labor_request.confirmed:
-            worker_data['is_confirmed'] = True
-    worker_conflicts[worker.id] = worker_data
+    worker_conflicts = worker_conflicts_context(
+        conflicts_by_worker(labor_requirement, [worker], requested_only=True))
+    worker_data = worker_conflicts.setdefault(worker.id, {'conflicts': [], 'is_confirmed': False})
     context = {
         'labor_requirement': labor_requirement,
         'worker': worker,
@@ -560,7 +428,7 @@ def declined_requests(request):
     manager = request.user.manager
     company = manager.company
     declined_requests = LaborRequest.objects.filter(
-        labor_requirement__call_time__event__company=company,
+        company=company,
         availability_response='no',
     ).select_related('worker', 'labor_requirement__call_time__event')
     context = {
@@ -587,7 +455,7 @@ def pending_requests(request):
     manager = request.user.manager
     company = manager.company
     pending_requests = LaborRequest.objects.filter(
-        labor_requirement__call_time__event__company=company,
+        company=company,
         availability_response__isnull=True,
     ).select_related('worker', 'labor_requirement__call_time__event')
     context = {
@@ -1,7 +1,17 @@
 from callManager.models import LaborRequest, Notifications
+from django.conf import settings
+from django.db import connection, transaction
 from django.shortcuts import get_object_or_404
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+import logging
+import threading
+
+logger = logging.getLogger('callManager')
+
+# company_id -> {'changed': set of notification ids, 'deleted': set of notification ids}
+_pending_pushes = {}
+_pending_lock = threading.Lock()
 
 
 def notify(labor_request_id, response, message):
@@ -22,22 +32,80 @@ def notify(labor_request_id, response, message):
         response=response,
         read=False,
     )
-    notification.save()
-    push_notification(company)
+    push_notification(company, changed=[notification.id])
     return
 
-def push_notification(company):
-    # Send via WebSocket to all users in the company
-    channel_layer = get_channel_layer()
-    group_name = f"company_{company.id}_notifications"
-    print(f"Pushing notification to group: {group_name}")  # Debug print
-    async_to_sync(channel_layer.group_send)(
-        group_name,
-        {
-            "type": "send_notification",
-            "notification": {
+
+def notification_data(notification):
+    """The JSON shape of a notification, shared by the API and the WebSocket push"""
+    return {
+        'id': notification.id,
+        'response': notification.response,
+        'message': notification.message,
+        'sent_at': notification.sent_at.isoformat(),
+        'read': notification.read,
+        'event': notification.event.event_name,
+        'call_time': notification.call_time.name if notification.call_time else None,
+        'labor_requirement_slug': notification.labor_requirement.slug if notification.labor_requirement else None,
+    }
+
+
+def push_notification(company, changed=(), deleted=()):
+    """Tell the company's WebSocket group that notifications changed.
+
+    Pushes are sent after the surrounding transaction commits and are coalesced
+    per company for NOTIFICATION_PUSH_DELAY seconds, so a burst of replies goes
+    out as one message carrying the new/changed rows and the deleted ids.
+    """
+    company_id = company.id
+    changed = set(changed)
+    deleted = set(deleted)
+    transaction.on_commit(lambda: queue_push(company_id, changed, deleted))
+
+
+def queue_push(company_id, changed, deleted):
+    with _pending_lock:
+        pending = _pending_pushes.get(company_id)
+        first = pending is None
+        if first:
+            pending = _pending_pushes[company_id] = {'changed': set(), 'deleted': set()}
+        pending['changed'] |= changed
+        pending['deleted'] |= deleted
+    if not first:
+        return
+    if settings.NOTIFICATION_PUSH_DELAY <= 0:
+        flush_push(company_id, close_connection=False)
+        return
+    timer = threading.Timer(settings.NOTIFICATION_PUSH_DELAY, flush_push, args=(company_id,))
+    timer.daemon = True
+    timer.start()
+
+
+def flush_push(company_id, close_connection=True):
+    with _pending_lock:
+        pending = _pending_pushes.pop(company_id, None)
+    if pending is None:
+        return
+    try:
+        deleted = pending['deleted']
+        changed = pending['changed'] - deleted
+        notifications = Notifications.objects.filter(
+            company_id=company_id, id__in=changed).select_related(
+            'event', 'call_time', 'labor_requirement').order_by('-sent_at', '-id')
+        unread_count = Notifications.objects.filter(company_id=company_id, read=False).count()
+        channel_layer = get_channel_layer()
+        async_to_sync(channel_layer.group_send)(
+            f"company_{company_id}_notifications",
+            {
                 "type": "send_notification",  # maps to send_notification() in consumer
+                "notifications": [notification_data(n) for n in notifications],
+                "deleted": sorted(deleted),
+                "unread_count": unread_count,
             }
-        }
-    )
-    return
+        )
+    except Exception:
+        logger.exception(f"Failed to push notifications for company {company_id}")
+    finally:
+        # the timer thread has its own connection, don't leave it open
+        if close_connection:
+            connection.close()
@@ -4,7 +4,8 @@ from callManager.models import (
         LaborRequest,
         Event,
         LaborType,
-        SentSMS,
+        ReportExport,
+        SMSUsage,
         )
 
 # Django imports
@@ -13,24 +14,21 @@ from django.contrib.auth.decorators import login_required
 from django.db.models import Count
 from django.contrib import messages
 
-# repotlab imports for PDF generation
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.platypus import (
-        PageBreak,
-        Table,
-        TableStyle,
-        Paragraph,
-        SimpleDocTemplate,
-        Table,
-        TableStyle,
-        Spacer,
-        KeepTogether,
+from io import BytesIO
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import content_disposition_header
+from callManager.utils.payroll import attach_payroll, time_entries_prefetch
+from callManager.utils.sign_in_sheet import SignInSheet, fit_column_widths
+from callManager.utils.sms_usage import usage_report_data
+from callManager.utils.workers_report import (
+        INLINE_PDF_ROWS,
+        build_workers_pdf,
+        iter_workers_report_rows,
+        start_workers_pdf_export,
+        stream_workers_csv,
+        workers_report_requests,
         )
-from reportlab.lib import colors
-from django.db.models.functions import TruncDate, TruncMonth
-from reportlab.lib.units import inch
-from reportlab.lib.styles import getSampleStyleSheet
 
 import logging
 
@@ -48,31 +46,17 @@ def call_time_report(request, slug):
     labor_type_filter = request.GET.get('labor_type', 'All')
     if labor_type_filter != 'All':
         labor_requests = labor_requests.filter(labor_requirement__labor_type__id=labor_type_filter)
-    confirmed_requests = labor_requests
+    confirmed_requests = attach_payroll(labor_requests.prefetch_related(time_entries_prefetch()), company.meal_penalty_trigger_time)
     labor_types = LaborType.objects.filter(laborrequirement__call_time=call_time).distinct()
     format_type = request.GET.get('format', 'html')
     if format_type == 'pdf':
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=landscape(letter), topMargin=0.25*inch, bottomMargin=0, leftMargin=0.5*inch, rightMargin=0.5*inch)
-        styles = getSampleStyleSheet()
-        elements = []
-        # Header content (to be repeated on each page)
-        def create_header():
-            return KeepTogether([
-                Paragraph(f"{company.name}", styles['Heading1']),
-                Paragraph(f"{call_time.event.event_name}: {call_time.name} at {call_time.time.strftime('%I:%M %p')} on {call_time.date.strftime('%B %d, %Y')}", styles['Heading2']),
-                Spacer(1, 0.2*inch)
-            ])
-        # Table headers
         headers = ['Name', 'Labor Type', 'Sign In', 'Sign Out', 'Meal Breaks', 'Hours', 'MP', 'Total Hours']
         table_data = []
         for req in confirmed_requests:
-            time_entry = req.time_entries.first()
-            if time_entry and time_entry.meal_breaks.exists():
-                for meal_break in time_entry.meal_breaks.all():
-                    meal_breaks = f"{meal_break.break_time.strftime('%I:%M %p')} ({meal_break.break_type.capitalize()})"
-                    break
-                meal_breaks = f"{meal_breaks}"
+            time_entry = req.time_entry
+            first_break = min(time_entry.meal_breaks.all(), key=lambda meal_break: meal_break.break_time, default=None) if time_entry else None
+            if first_break:
+                meal_breaks = f"{first_break.break_time.strftime('%I:%M %p')} ({first_break.break_type.capitalize()})"
             else:
                 meal_breaks = "None"
             row = [
@@ -86,52 +70,12 @@ def call_time_report(request, slug):
                 f"{time_entry.total_hours_worked:.2f}" if time_entry else "0.00"
             ]
             table_data.append(row)
-        # Calculate column widths based on content
-        c = canvas.Canvas(buffer, pagesize=landscape(letter))
-        font_name = 'Helvetica'
-        font_size = 10
-        padding = 10  # Padding in points for each cell
-        max_widths = [c.stringWidth(header, font_name, font_size) for header in headers]
-        for row in table_data:
-            for i, cell in enumerate(row):
-                cell_width = c.stringWidth(str(cell), font_name, font_size)
-                max_widths[i] = max(max_widths[i], cell_width)
-        # Add padding and scale to fit page
-        total_width = sum(max_widths) + 2 * padding * len(max_widths)
-        page_width = landscape(letter)[0] - doc.leftMargin - doc.rightMargin
-        if total_width > page_width:
-            scale_factor = page_width / total_width
-            max_widths = [w * scale_factor for w in max_widths]
-        col_widths = [w + 2 * padding for w in max_widths]
-        # Table styling
-        table_style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ])
-        # Calculate rows per page
-        page_height = landscape(letter)[1]
-        header_height = 1.5 * inch
-        signature_height = 1.0 * inch
-        available_height = page_height - header_height - signature_height - doc.topMargin - doc.bottomMargin
-        row_height = 0.3 * inch
-        rows_per_page = int(available_height // row_height)
-        # Split data into pages
-        data = [headers]
-        for i in range(0, len(table_data), rows_per_page):
-            elements.append(create_header())  # Add header to each page
-            page_data = data + table_data[i:i + rows_per_page]
-            table = Table(page_data, colWidths=col_widths)
-            table.setStyle(table_style)
-            elements.append(table)
-            if i + rows_per_page < len(table_data):
-                elements.append(PageBreak())
-        doc.build(elements)
+        buffer = BytesIO()
+        sheet = SignInSheet(buffer, headers, fit_column_widths(headers, table_data), title=company.name)
+        sheet.add_group(
+            f"{call_time.event.event_name}: {call_time.name} at {call_time.time.strftime('%I:%M %p')} on {call_time.date.strftime('%B %d, %Y')}",
+            table_data)
+        sheet.save()
         buffer.seek(0)
         return FileResponse(buffer, as_attachment=True, filename=f"call_time_report_{slug}.pdf")
     context = {
@@ -145,41 +89,11 @@ def call_time_report(request, slug):
 @login_required
 def sms_usage_report(request):
     manager = request.user.manager
-    daily_counts = SentSMS.objects.filter(
-        company=manager.company).annotate(
-        date=TruncDate('datetime_sent')).values(
-        'company__name', 'date').annotate(
-        count=Count('id')).order_by(
-        'company__name', '-date')
-    monthly_counts = SentSMS.objects.filter(
-        company=manager.company).annotate(
-        month=TruncMonth('datetime_sent')).values(
-        'company__name', 'month').annotate(
-        count=Count('id')).order_by(
-        'company__name', '-month')
-    monthly_daily_data = {}
-    monthly_counts_with_keys = []
-    for month_entry in monthly_counts:
-        month = month_entry['month']
-        key = month.strftime('%Y-%m')
-        daily_data = SentSMS.objects.filter(
-            company=manager.company,
-            datetime_sent__year=month.year,
-            datetime_sent__month=month.month).annotate(
-            date=TruncDate('datetime_sent')).values(
-            'date').annotate(
-            count=Count('id')).order_by('date')
-        monthly_daily_data[key] = [
-            {'date': entry['date'].strftime('%Y-%m-%d'), 'count': entry['count']}
-            for entry in daily_data]
-        monthly_counts_with_keys.append({
-            'company__name': month_entry['company__name'],
-            'month': month,
-            'count': month_entry['count'],
-            'chart_key': key})
+    daily_counts, monthly_counts, monthly_daily_data = usage_report_data(
+        SMSUsage.objects.filter(company=manager.company))
     context = {
         'daily_counts': daily_counts,
-        'monthly_counts': monthly_counts_with_keys,
+        'monthly_counts': monthly_counts,
         'monthly_daily_data': monthly_daily_data,
         'company': manager.company}
     return render(request, 'callManager/sms_usage_report.html', context)
@@ -189,40 +103,11 @@ def sms_usage_report(request):
 def admin_sms_usage_report(request):
     if not hasattr(request.user, 'administrator'):
         return redirect('login')
-    daily_counts = SentSMS.objects.annotate(
-        date=TruncDate('datetime_sent')).values(
-        'company__name', 'date').annotate(
-        count=Count('id')).order_by(
-        'company__name', '-date')
-    monthly_counts = SentSMS.objects.annotate(
-        month=TruncMonth('datetime_sent')).values(
-        'company__name', 'month').annotate(
-        count=Count('id')).order_by(
-        'company__name', '-month')
-    monthly_daily_data = {}
-    monthly_counts_with_keys = []
-    for month_entry in monthly_counts:
-        month = month_entry['month']
-        company_name = month_entry['company__name']
-        key = f"{company_name}_{month.strftime('%Y-%m')}"
-        daily_data = SentSMS.objects.filter(
-            company__name=company_name,
-            datetime_sent__year=month.year,
-            datetime_sent__month=month.month).annotate(
-            date=TruncDate('datetime_sent')).values(
-            'date').annotate(
-            count=Count('id')).order_by('date')
-        monthly_daily_data[key] = [
-            {'date': entry['date'].strftime('%Y-%m-%d'), 'count': entry['count']}
-            for entry in daily_data]
-        monthly_counts_with_keys.append({
-            'company__name': company_name,
-            'month': month,
-            'count': month_entry['count'],
-            'chart_key': key})
+    daily_counts, monthly_counts, monthly_daily_data = usage_report_data(
+        SMSUsage.objects.all(), keyed_by_company=True)
     context = {
         'daily_counts': daily_counts,
-        'monthly_counts': monthly_counts_with_keys,
+        'monthly_counts': monthly_counts,
         'monthly_daily_data': monthly_daily_data}
     return render(request, 'callManager/admin_sms_usage_report.html', context)
 
@@ -236,7 +121,6 @@ def event_workers_report(request):
     # Handle event_ids from POST (form submission) or GET (PDF download)
     event_ids = request.POST.getlist('event_ids') or request.GET.get('event_ids', '').split(',')
     event_ids = [id for id in event_ids if id]  # Remove empty strings
-    print(f"Received event_ids: {event_ids}")  # Debug POST/GET data
     if not event_ids:
         messages.error(request, "No events selected.")
         return redirect('manager_dashboard')
@@ -245,88 +129,27 @@ def event_workers_report(request):
         messages.error(request, "No valid events found.")
         return redirect('manager_dashboard')
     
-    # Gather workers by event and call time
-    report_data = []
-    for event in events.order_by('start_date'):
-        for call_time in event.call_times.all().order_by('date', 'time'):
-            labor_requests = LaborRequest.objects.filter(
-                labor_requirement__call_time=call_time,
-                confirmed=True
-            ).select_related('worker', 'labor_requirement__labor_type')
-            for req in labor_requests:
-                time_entry = req.time_entries.first() if hasattr(req, 'time_entries') and req.time_entries.exists() else None
-                report_data.append({
-                    'event': event.event_name,
-                    'call_time': f"{call_time.name} ({call_time.date} at {call_time.time.strftime('%I:%M %p')})",
-                    'worker': req.worker.name or "Unnamed Worker",
-                    'labor_type': req.labor_requirement.labor_type.name,
-                    'sign_in': time_entry.start_time.strftime('%I:%M %p') if time_entry and time_entry.start_time else '-',
-                    'sign_out': time_entry.end_time.strftime('%I:%M %p') if time_entry and time_entry.end_time else '-',
-                    'meal_breaks': time_entry.meal_breaks.count() if time_entry and hasattr(time_entry, 'meal_breaks') else '-',
-                    'total_hours': f"{time_entry.total_hours_worked:.2f}" if time_entry and time_entry.total_hours_worked is not None else '-'
-                })
+    valid_event_ids = list(events.values_list('id', flat=True))
 
     format_type = request.GET.get('format', 'html')
+    if format_type == 'csv':
+        rows = iter_workers_report_rows(company, valid_event_ids)
+        response = StreamingHttpResponse(stream_workers_csv(rows), content_type='text/csv')
+        response['Content-Disposition'] = content_disposition_header(True, f"workers_report_{company.name}.csv")
+        return response
     if format_type == 'pdf':
+        row_count = workers_report_requests(company, valid_event_ids).count()
+        if row_count > INLINE_PDF_ROWS:
+            export = start_workers_pdf_export(company, request.user, valid_event_ids, row_count)
+            return redirect('report_export_status', export_id=export.id)
         buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=landscape(letter), topMargin=0.5*inch, bottomMargin=1.5*inch, leftMargin=0.5*inch, rightMargin=0.5*inch)
-        styles = getSampleStyleSheet()
-        elements = []
-        elements.append(Paragraph(f"Workers Report for {company.name}", styles['Heading1']))
-        elements.append(Spacer(1, 0.2*inch))
-
-        # Group data by event for PDF
-        event_groups = {}
-        for row in report_data:
-            event_name = row['event']
-            if event_name not in event_groups:
-                event_groups[event_name] = []
-            event_groups[event_name].append(row)
-
-        # Calculate rows per page
-        page_width = landscape(letter)[0] - doc.leftMargin - doc.rightMargin  # 10 inches
-        colWidths = [130, 180, 130, 90, 70, 70, 70, 70]  # Adjusted to fit 10 inches
-        page_height = landscape(letter)[1]
-        header_height = 1.0 * inch
-        signature_height = 1.0 * inch
-        event_header_height = 0.5 * inch
-        row_height = 0.3 * inch
-        rows_per_page = int((page_height - header_height - signature_height - event_header_height) // row_height)
-
-        # Generate tables for each event
-        for event_name, rows in event_groups.items():
-            elements.append(Paragraph(f"Event: {event_name}", styles['Heading2']))
-            elements.append(Spacer(1, 0.1*inch))
-            data = [['Event', 'Call Time', 'Worker', 'Labor Type', 'Sign In', 'Sign Out', 'Meal Breaks', 'Total Hours']]
-            for row in rows:
-                data.append([row['event'], row['call_time'], row['worker'], row['labor_type'], row['sign_in'], row['sign_out'], row['meal_breaks'], row['total_hours']])
-            
-            # Split event data into pages
-            for i in range(0, len(data) - 1, rows_per_page):
-                page_data = data[:1] + data[i + 1:i + 1 + rows_per_page]
-                table = Table(page_data, colWidths=colWidths)
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                elements.append(table)
-                elements.append(Spacer(1, 0.5*inch))
-                elements.append(Paragraph("Signature: _______________________________", styles['Normal']))
-                if i + rows_per_page < len(data) - 1 or event_name != list(event_groups.keys())[-1]:
-                    elements.append(PageBreak())
-        
-        doc.build(elements)
+        build_workers_pdf(company, iter_workers_report_rows(company, valid_event_ids), buffer)
         buffer.seek(0)
         response = FileResponse(buffer, as_attachment=True, filename=f"workers_report_{company.name}.pdf")
         response['Content-Type'] = 'application/pdf'
         return response
-    
+
+    report_data = list(iter_workers_report_rows(company, valid_event_ids))
     context = {
         'company': company,
         'events': events,
@@ -335,3 +158,25 @@ def event_workers_report(request):
     }
     return render(request, 'callManager/event_workers_report.html', context)
 
+
+@login_required
+def report_export_status(request, export_id):
+    if not hasattr(request.user, 'manager'):
+        return redirect('login')
+    export = get_object_or_404(ReportExport, id=export_id, company=request.user.manager.company)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'status': export.status,
+            'row_count': export.row_count,
+            'download_url': reverse('report_export_download', args=[export.id]) if export.status == 'done' else None,
+            'error': export.error,
+        })
+    return render(request, 'callManager/report_export_status.html', {'export': export})
+
+
+@login_required
+def report_export_download(request, export_id):
+    if not hasattr(request.user, 'manager'):
+        return redirect('login')
+    export = get_object_or_404(ReportExport, id=export_id, company=request.user.manager.company, status='done')
+    return FileResponse(export.file.open('rb'), as_attachment=True, filename=export.file.name.rsplit('/', 1)[-1])
@@ -14,7 +14,6 @@ from callManager.models import (
 
 # Django imports
 from django.shortcuts import render, get_object_or_404, redirect
-from django.utils.http import base64
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q
 from datetime import datetime, timedelta
@@ -24,9 +23,10 @@ from django.urls import reverse
 from django.contrib import messages
 from django.contrib.auth import authenticate, login
 
+from callManager.utils.qr import qr_code_base64
+from callManager.utils.time_rules import time_rules_for
+
 # other imports
-import qrcode
-from io import BytesIO
 
 import logging
 
@@ -86,18 +86,11 @@ def display_qr_code(request, slug, worker_slug):
         worker=worker,
         defaults={'expires_at': timezone.now() + timedelta(days=1), 'qr_sent': False})
     clock_in_url = request.build_absolute_uri(reverse('worker_clock_in_out', args=[str(token.token)]))
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-    qr.add_data(clock_in_url)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
     context = {
         'event': event,
         'worker': worker,
         'clock_in_url': clock_in_url,
-        'qr_code_data': base64.b64encode(buffer.getvalue()).decode('utf-8')}
+        'qr_code_data': qr_code_base64(clock_in_url, expires_at=token.expires_at)}
     return render(request, 'callManager/display_qr_code.html', context)
 
 @login_required
@@ -111,18 +104,11 @@ def manager_display_qr_code(request, slug, worker_slug):
         worker=worker,
         defaults={'expires_at': timezone.now() + timedelta(days=1)})
     clock_in_url = request.build_absolute_uri(reverse('worker_clock_in_out', args=[str(token.token)]))
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-    qr.add_data(clock_in_url)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
     context = {
         'event': event,
         'worker': worker,
         'clock_in_url': clock_in_url,
-        'qr_code_data': base64.b64encode(buffer.getvalue()).decode('utf-8')}
+        'qr_code_data': qr_code_base64(clock_in_url, expires_at=token.expires_at)}
     return render(request, 'callManager/display_qr_code.html', context)
 
 @login_required
@@ -150,29 +136,18 @@ def worker_clock_in_out(request, token):
         action = request.POST.get('action')
         call_time = get_object_or_404(CallTime, id=call_time_id, event=event)
         labor_request = get_object_or_404(LaborRequest, worker=worker, labor_requirement__call_time=call_time, confirmed=True)
-        minimum_hours = labor_request.labor_requirement.minimum_hours or call_time.minimum_hours or event.location_profile.minimum_hours or company.minimum_hours
+        rules = time_rules_for(call_time)
         time_entry, created = TimeEntry.objects.get_or_create(
             labor_request=labor_request,
             worker=worker,
             call_time=call_time,
             defaults={'start_time': None, 'end_time': None})
         if action == 'clock_in' and not time_entry.start_time:
-            time_entry.start_time = datetime.combine(call_time.date, call_time.time)
+            time_entry.start_time = rules.call_datetime
             time_entry.save()
             messages.success(request, f"Signed in at {time_entry.start_time.strftime('%I:%M %p')}.")
         elif action == 'clock_out' and time_entry.start_time and not time_entry.end_time:
-            end_time = timezone.now()
-            minutes = end_time.minute
-            round_up = event.location_profile.hour_round_up or company.hour_round_up
-            if minutes > 30 + round_up:
-                end_time = end_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
-            elif minutes > company.hour_round_up:
-                end_time = end_time.replace(minute=30, second=0, microsecond=0)
-            else:
-                end_time = end_time.replace(minute=0, second=0, microsecond=0)
-            if time_entry.start_time + timedelta(hours=minimum_hours) > end_time:
-                end_time = time_entry.start_time + timedelta(hours=minimum_hours)
-            time_entry.end_time = end_time
+            time_entry.end_time = rules.clock_out(timezone.now(), time_entry.start_time, labor_request.labor_requirement_id)
             time_entry.save()
             messages.success(request, f"Signed out at {time_entry.end_time.strftime('%I:%M %p')}.")
         else:
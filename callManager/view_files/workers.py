@@ -19,7 +19,6 @@ from callManager.forms import (
         )
 # Django imports
 from django.shortcuts import render, get_object_or_404, redirect
-from django.utils.http import base64
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_GET, require_POST
 from django.db.models import Sum, Q, Case, When, IntegerField, Count
@@ -29,11 +28,12 @@ from django.urls import reverse
 from django.contrib import messages
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
+from callManager.utils.qr import qr_code_base64
+from callManager.utils.worker_import import parse_vcf, start_import
 
 
 # other imports
-import qrcode
-from io import BytesIO, TextIOWrapper
+from io import TextIOWrapper
 import re
 import random
 import string
@@ -48,6 +48,7 @@ import io
 import logging
 
 from callManager.views import send_message
+from callManager.utils.sms_outbox import enqueue_sms
 
 # Create a logger instance
 logger = logging.getLogger('callManager')
@@ -241,49 +242,15 @@ def import_workers(request):
         form = WorkerImportForm(request.POST, request.FILES)
         if form.is_valid():
             vcf_file = TextIOWrapper(request.FILES['file'].file, encoding='utf-8')
-            imported = 0
-            errors = 0
-            current_name = None
-            current_phone = None
-            for _, line in enumerate(vcf_file):
-                line = line.strip()
-                try:
-                    if line.startswith('END:VCARD'):
-                        if current_name or current_phone:
-                            if current_phone:
-                                current_phone = current_phone.replace(' ', '')
-                                current_phone = current_phone.replace('-', '')
-                                current_phone = current_phone.replace('(', '')
-                                current_phone = current_phone.replace(')', '')
-                                current_phone = current_phone.replace('.', '')
-                                if current_phone.startswith('1') and len(current_phone) == 11:
-                                    current_phone = f"+{current_phone}"
-                                elif not current_phone.startswith('+') and len(current_phone) == 10:
-                                    current_phone = f"+1{current_phone}"
-                                elif len(current_phone) < 10:
-                                    messages.error(request, f"Invalid phone number: {current_phone}")
-                                    continue
-                            _, created = Worker.objects.get_or_create(
-                                phone_number=current_phone,
-                                company=manager.company,
-                                defaults={'name': current_name.strip() if current_name else None})
-                            if created:
-                                imported += 1
-                        current_name = None
-                        current_phone = None
-                    elif line.startswith('FN:'):
-                        current_name = line[3:].strip()
-                    elif line.startswith('TEL'):
-                        parts = line.split(':')
-                        if len(parts) > 1:
-                            current_phone = parts[-1].strip()
-                except Exception:
-                    error_msg = f"Failed to import: {current_name or 'Unnamed'}, {current_phone or 'No phone'}"
-                    messages.error(request, error_msg)
-                    errors += 1
-            messages.success(request, f"Imported {imported} workers.")
-            if errors:
-                messages.warning(request, f"Encountered {errors} import errors.")
+            job = start_import(manager.company, request.user, 'vcf', parse_vcf(vcf_file))
+            if not job.finished_at:
+                messages.info(request, f"Importing {job.total} contacts in the background.")
+            else:
+                messages.success(request, f"Imported {job.imported} workers.")
+                for error in job.errors:
+                    messages.error(request, f"Failed to import: {error['name'] or 'Unnamed'} ({error['message']})")
+                if job.errors:
+                    messages.warning(request, f"Encountered {len(job.errors)} import errors.")
             return redirect('view_workers')
     else:
         form = WorkerImportForm()
@@ -357,22 +324,7 @@ def worker_self_add(request, slug):
             worker.company = company
             worker.save()
             sms_message = f"Thanks for adding your contact info. To complete your registration, reply 'Yes.' to receive job requests from {company_short_name}."
-            if settings.TWILIO_ENABLED == 'enabled':
-                client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-                try:
-                    client.messages.create(
-                        body=sms_message,
-                        from_=settings.TWILIO_PHONE_NUMBER,
-                        to=str(worker.phone_number)
-                    )
-                except TwilioRestException as e:
-                    messages.error(request, f"Failed to send SMS: {str(e)}")
-                finally:
-                    log_sms(company)
-
-            else:
-                log_sms(company)
-                print(sms_message)
+            enqueue_sms(sms_message, worker.phone_number, company, worker)
             messages.success(request, "Successfully added your contact info.")
             return redirect('worker_self_add_success', slug=slug)
         else:
@@ -391,14 +343,7 @@ def worker_self_add_qr(request, slug):
     "display worker self add qr code"
     company = get_object_or_404(Company, slug=slug)
     qr_url = request.build_absolute_uri(reverse('worker_self_add', args=[company.slug]))
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-    qr.add_data(qr_url)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-    qr_code_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    qr_code_data = qr_code_base64(qr_url)
     context = {
         'qr_code_data': qr_code_data,
         'company_name': company.name_short,
@@ -410,7 +355,7 @@ def worker_self_add_qr(request, slug):
 def worker_history(request, slug):
     worker = get_object_or_404(Worker, slug=slug)
     company = request.user.manager.company
-    labor_requests = worker.labor_requests.filter(labor_requirement__call_time__event__company=company)
+    labor_requests = worker.labor_requests.filter(company=company)
     confirmed_requests = labor_requests.filter(confirmed=True)
     declined_requests = labor_requests.filter(availability_response='no')
     ncns_requests = labor_requests.filter(availability_response='ncns')
@@ -7,7 +7,6 @@ from .models import (
         LaborType,
         Notifications,
         Worker,
-        SentSMS,
         ClockInToken,
         )
 
@@ -20,12 +19,11 @@ from .forms import (
 
 # Django imports
 from django.shortcuts import render, get_object_or_404, redirect
-from django.utils.http import base64
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_GET
+from django.db import transaction
 from django.db.models import Q, Count
 from datetime import datetime, timedelta
-from django.conf import settings
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
@@ -34,14 +32,9 @@ from django.contrib import messages
 from django.contrib.messages import get_messages as django_get_messages
 
 # Twilio imports
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
 from twilio.twiml.messaging_response import MessagingResponse
 
 # other imports
-import qrcode
-import random
-import string
 from urllib.parse import quote
 
 # channels imports
@@ -50,8 +43,13 @@ from asgiref.sync import async_to_sync
 from api.utils import frontend_url
 
 from callManager.view_files.notify import notify, push_notification
+from callManager.utils.counters import schedule_event_refresh
+from callManager.utils.inbound_sms import claim_inbound_sms, workers_for_phone
+from callManager.utils.qr import qr_code_base64
+from callManager.utils.short_tokens import generate_short_token
+from callManager.utils.sms_outbox import enqueue_sms
+from callManager.utils.sms_usage import record_sms_usage
 from time import sleep
-from io import BytesIO
 
 
 
@@ -72,12 +70,11 @@ def index(request):
         return redirect('dashboard_redirect')
     return render(request, 'callManager/index.html')
 
-def log_sms(company):
-    """logs the SMS sent to the SentSMS model"""
+def log_sms(company, count=1):
+    """adds the sent SMS segments to the company's daily SMSUsage row"""
     if company == None:
         return
-    sms = SentSMS.objects.create(company=company)
-    sms.save()
+    record_sms_usage(company, count)
 
 
 # this view is dead and shold be removed soon
@@ -97,19 +94,9 @@ def confirm_assignment(request, token):
     return render(request, 'callManager/confirmation_form.html', {'assignment': assignment})
 
 
-def generate_short_token(length=6):
-    """Generate a unique random alphanumeric token of specified length."""
-    characters = string.ascii_letters + string.digits  # a-z, A-Z, 0-9
-    while True:
-        token = ''.join(random.choice(characters) for _ in range(length))
-        if not LaborRequest.objects.filter(token_short=token).exists():
-            return token
-
-
 def send_message(message_body, worker, manager=None, company=None):
-    client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN) if settings.TWILIO_ENABLED == 'enabled' else None
+    """Queues the message for the SMS outbox. Delivery happens in the process_sms_outbox command."""
     sms_errors = []
-    message_length = len(message_body)
     if worker.stop_sms:
         sms_errors.append(f"{worker.name} (opted out via STOP)")
     elif not worker.sms_consent and not worker.sent_consent_msg:
@@ -117,45 +104,11 @@ def send_message(message_body, worker, manager=None, company=None):
             consent_body = f"This is {manager.user.first_name} with {company.name}.\nWe're using Callman to send out gigs. Reply 'Yes.' to receive job requests\nReply 'No.' or 'STOP' to opt out."
         else:
             consent_body = f"Reply 'Yes.' to receive job requests\nReply 'No.' or 'STOP' to opt out."
-        if settings.TWILIO_ENABLED == 'enabled' and client:
-            try:
-                client.messages.create(
-                    body=consent_body,
-                    from_=settings.TWILIO_PHONE_NUMBER,
-                    to=str(worker.phone_number)
-                )
-                worker.sent_consent_msg = True
-                worker.save()
-            except TwilioRestException as e:
-                sms_errors.append(f"Consent SMS failed for {worker.name}: {str(e)}")
-            finally:
-                log_sms(company)
-        else:
-            log_sms(company)
-            worker.sent_consent_msg = True
-            worker.save()
-            print(consent_body)
+        enqueue_sms(consent_body, worker.phone_number, company, worker)
+        worker.sent_consent_msg = True
+        worker.save()
     elif worker.sms_consent:
-        if settings.TWILIO_ENABLED == 'enabled' and client:
-            try:
-                client.messages.create(
-                    body=message_body,
-                    from_=settings.TWILIO_PHONE_NUMBER,
-                    to=str(worker.phone_number)
-                )
-            except TwilioRestException as e:
-                sms_errors.append(f"SMS failed for {worker.name}: {str(e)}")
-            finally:
-                log_sms(company)
-                while message_length > 144:
-                    log_sms(company)
-                    message_length -= 144
-        else:
-            log_sms(company)
-            while message_length > 144:
-                log_sms(company)
-                message_length -= 144
-            print(message_body)
+        enqueue_sms(message_body, worker.phone_number, company, worker)
     else:
         sms_errors.append(f"{worker.name} (awaiting consent)")
     return sms_errors
@@ -178,93 +131,91 @@ def labor_type_partial(request, slug):
 
 @csrf_exempt
 def sms_webhook(request):
-    stop_list = ['stop', 'optout', 'cancel', 'end', 'quit', 'unsubscribe', 'revoke', 'stopall']
-    go_list = ['yes', 'start', 'go', 'resume', 'subscribe']
     if request.method == "POST":
         from_number = request.POST.get('From')
         body = request.POST.get('Body', '').strip().lower()
-        workers = Worker.objects.filter(phone_number=from_number)
-        response = MessagingResponse()
-        for worker in workers:
-            print(worker.name)
-        if not workers.exists():
-            response.message("Number not recognized. Please contact your Steward")
-            return HttpResponse(str(response), content_type='text/xml')
-        # Check if any worker has stopped SMS
-        if any(worker.stop_sms for worker in workers) and not body in go_list:
-            response.message("You’ve been unsubscribed from CallMan messages. Reply 'START' to resume.")
-            return HttpResponse(str(response), content_type='text/xml')
-        if body.startswith('yes') or body == 'y' or body == 'start':
-            consent_state = True
-            for worker in workers: 
-                if worker.sms_consent != True:
-                    consent_state = False
-            if consent_state == True:
-                response.message( "You're already set. Sending 'yes' doesn't do anything here. Click the link to confirm availability." )
-            else:
-                response.message("Thank you! You’ll now receive job requests.")
-            for worker in workers:
-                worker.sms_consent = True
-                worker.stop_sms = False
-                worker.save()
-            # Process queued labor requests for all workers
-            queued_requests = LaborRequest.objects.filter(
-                worker__in=workers,
-                requested=True,
-                sms_sent=False
-            ).select_related('worker', 'labor_requirement__call_time__event', 'labor_requirement__call_time__event__company')
-            if queued_requests.exists():
-                # Group requests by event only
-                events_to_notify = {}
-                for req in queued_requests:
-                    event = req.labor_requirement.call_time.event
-                    if event.id not in events_to_notify:
-                        events_to_notify[event.id] = {'event': event, 'company': event.company, 'requests': []}
-                    events_to_notify[event.id]['requests'].append(req)
-                # Send one message per event
-                for _, data in events_to_notify.items():
-                    event = data['event']
-                    company = data['company']
-                    requests = data['requests']
-                    # Use existing token_short if available, otherwise generate new
-                    token = next((req.token_short for req in requests if req.token_short), generate_short_token())
-                    confirmation_url = frontend_url(request, f"/event/{event.slug}/confirm/{token}/")
-                    response.message(
-                        f"This is {company.name}: Confirm availability for {event.event_name} "
-                        f"on {event.start_date}: {confirmation_url}"
-                    )
-                    # Update all requests for this event with the same token
-                    for req in requests:
-                        req.sms_sent = True
-                        req.token_short = token
-                        req.save()
-            
-        elif body in stop_list:
-            for worker in workers:
-                worker.sms_consent = False
-                worker.stop_sms = True
-                worker.save()
-        else:
-            # Catchall response based on sms_consent
-            if any(not worker.sms_consent for worker in workers):
-                response.message("Response not recognized. Please reply 'Yes' or 'Y' to consent to SMS notifications, or 'STOP' to unsubscribe.")
-            else:
-                response.message("This is an automated system. No one is reading your response. Reply 'STOP' to unsubscribe.")
-        return HttpResponse(str(response), content_type='text/xml')
+        with transaction.atomic():
+            inbound_sms, duplicate = claim_inbound_sms(request.POST.get('MessageSid'), from_number, body)
+            if duplicate:
+                # Twilio retry of a message we already handled: replay the answer, change nothing
+                return HttpResponse(inbound_sms.response or str(MessagingResponse()), content_type='text/xml')
+            response = str(sms_reply(request, from_number, body))
+            if inbound_sms:
+                inbound_sms.response = response
+                inbound_sms.save(update_fields=['response'])
+        return HttpResponse(response, content_type='text/xml')
     return HttpResponse(status=400)
 
 
+def sms_reply(request, from_number, body):
+    """Apply an inbound text to the sender's workers and build the TwiML reply"""
+    stop_list = ['stop', 'optout', 'cancel', 'end', 'quit', 'unsubscribe', 'revoke', 'stopall']
+    go_list = ['yes', 'start', 'go', 'resume', 'subscribe']
+    workers = workers_for_phone(from_number)
+    worker_ids = [worker.id for worker in workers]
+    response = MessagingResponse()
+    if not workers:
+        response.message("Number not recognized. Please contact your Steward")
+        return response
+    # Check if any worker has stopped SMS
+    if any(worker.stop_sms for worker in workers) and not body in go_list:
+        response.message("You’ve been unsubscribed from CallMan messages. Reply 'START' to resume.")
+        return response
+    if body.startswith('yes') or body == 'y' or body == 'start':
+        if all(worker.sms_consent for worker in workers):
+            response.message( "You're already set. Sending 'yes' doesn't do anything here. Click the link to confirm availability." )
+        else:
+            response.message("Thank you! You’ll now receive job requests.")
+        Worker.objects.filter(id__in=worker_ids).update(sms_consent=True, stop_sms=False)
+        # Process queued labor requests for all workers
+        queued_requests = LaborRequest.objects.filter(
+            worker_id__in=worker_ids,
+            requested=True,
+            sms_sent=False
+        ).select_related('event__company')
+        # Group requests by event only
+        events_to_notify = {}
+        for req in queued_requests:
+            if req.event_id not in events_to_notify:
+                events_to_notify[req.event_id] = {'event': req.event, 'company': req.event.company, 'requests': []}
+            events_to_notify[req.event_id]['requests'].append(req)
+        # Send one message per event
+        for event_id, data in events_to_notify.items():
+            event = data['event']
+            company = data['company']
+            requests = data['requests']
+            # Use existing token_short if available, otherwise generate new
+            token = next((req.token_short for req in requests if req.token_short), None) or generate_short_token()
+            confirmation_url = frontend_url(request, f"/event/{event.slug}/confirm/{token}/")
+            response.message(
+                f"This is {company.name}: Confirm availability for {event.event_name} "
+                f"on {event.start_date}: {confirmation_url}"
+            )
+            # Update all requests for this event with the same token
+            LaborRequest.objects.filter(id__in=[req.id for req in requests]).update(sms_sent=True, token_short=token)
+            schedule_event_refresh(event_id)
+    elif body in stop_list:
+        Worker.objects.filter(id__in=worker_ids).update(sms_consent=False, stop_sms=True)
+    else:
+        # Catchall response based on sms_consent
+        if any(not worker.sms_consent for worker in workers):
+            response.message("Response not recognized. Please reply 'Yes' or 'Y' to consent to SMS notifications, or 'STOP' to unsubscribe.")
+        else:
+            response.message("This is an automated system. No one is reading your response. Reply 'STOP' to unsubscribe.")
+    return response
+
+
 def confirm_event_requests(request, slug, event_token):
     event = get_object_or_404(Event, slug=slug)
     company = event.company
     if len(event_token) > 6:
         first_request = LaborRequest.objects.filter(
-            labor_requirement__call_time__event=event,
+            event=event,
             event_token=event_token,
             worker__phone_number__isnull=False).select_related('worker').first()
     else:
         first_request = LaborRequest.objects.filter(
-            labor_requirement__call_time__event=event,
+            event=event,
             token_short=event_token,
             worker__phone_number__isnull=False).select_related('worker').first()
     if not first_request:
@@ -273,7 +224,7 @@ def confirm_event_requests(request, slug, event_token):
     worker = first_request.worker
     worker_phone = worker.phone_number
     labor_requests = LaborRequest.objects.filter(
-        labor_requirement__call_time__event=event,
+        event=event,
         requested=True,
         worker__phone_number=worker_phone).select_related(
         'labor_requirement__call_time',
@@ -313,14 +264,7 @@ def confirm_event_requests(request, slug, event_token):
             worker=worker,
             defaults={'expires_at': timezone.now() + timedelta(days=1), 'qr_sent': False})
         clock_in_url = request.build_absolute_uri(reverse('worker_clock_in_out', args=[str(token.token)]))
-        qr = qrcode.QRCode(version=1, box_size=10, border=4)
-        qr.add_data(clock_in_url)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffer = BytesIO()
-        img.save(buffer, format="PNG")
-        buffer.seek(0)
-        qr_code_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
+        qr_code_data = qr_code_base64(clock_in_url, expires_at=token.expires_at)
     if request.method == "POST":
         sms_errors = []
         for labor_request in pending_call_times:
@@ -338,7 +282,6 @@ def confirm_event_requests(request, slug, event_token):
                     notif_message = f"{worker.name} Available for {event.event_name} - {call_time.name} - {labor_type.name}, Requires confirmation"
                     notify(labor_request.id, 'Available', notif_message)
                     print(notif_message)
-                client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN) if settings.TWILIO_ENABLED == 'enabled' else None
                 if response == 'yes' and labor_request.labor_requirement.fcfs_positions > 0 and not labor_request.is_reserved:
                     notif_message = f"{worker.name} confirmed for {event.event_name} - {call_time.name} - {labor_type.name}"
                     notify(labor_request.id, 'Confirmed', notif_message)
@@ -353,19 +296,7 @@ def confirm_event_requests(request, slug, event_token):
                             message_body = (
                                 f"Confirmed {labor_request.labor_requirement.labor_type} "
                                 f"for {event.event_name} - {call_time.name} at {call_time.time.strftime('%I:%M %p')} on {call_time.date.strftime('%B %d')}")
-                            if settings.TWILIO_ENABLED == 'enabled' and client:
-                                try:
-                                    client.messages.create(
-                                        body=message_body,
-                                        from_=settings.TWILIO_PHONE_NUMBER,
-                                        to=str(worker.phone_number))
-                                except TwilioRestException as e:
-                                    sms_errors.append(f"Failed to notify {worker.name}: {str(e)}")
-                                finally:
-                                    log_sms(company)
-                            else:
-                                log_sms(company)
-                                print(message_body)
+                            enqueue_sms(message_body, worker.phone_number, company, worker)
                 elif response == 'yes' and labor_request.is_reserved:
                     notif_message = f"{worker.name} confirmed for {event.event_name} - {call_time.name} - {labor_type.name}"
                     notify(labor_request.id, 'Confirmed', notif_message)
@@ -376,19 +307,7 @@ def confirm_event_requests(request, slug, event_token):
                         message_body = (
                             f"Confirmed {labor_request.labor_requirement.labor_type} "
                             f"for {event.event_name} - {call_time.name} at {call_time.time.strftime('%I:%M %p')} on {call_time.date.strftime('%B %d')}")
-                        if settings.TWILIO_ENABLED == 'enabled' and client:
-                            try:
-                                client.messages.create(
-                                    body=message_body,
-                                    from_=settings.TWILIO_PHONE_NUMBER,
-                                    to=str(worker.phone_number))
-                            except TwilioRestException as e:
-                                sms_errors.append(f"Failed to notify {worker.name}: {str(e)}")
-                            finally:
-                                log_sms(company)
-                        else:
-                            log_sms(company)
-                            print(message_body)
+                        enqueue_sms(message_body, worker.phone_number, company, worker)
                 if response == 'no':
                     notif_message = f"{worker.name} declined {event.event_name} - {call_time.name} - {labor_type.name}"
                     notify(labor_request.id, 'Declined', notif_message)
@@ -455,7 +374,7 @@ def send_clock_in_link(request, slug):
     manager = request.user.manager
     event = get_object_or_404(Event, slug=slug, company=manager.company)
     confirmed_workers = Worker.objects.filter(
-        labor_requests__labor_requirement__call_time__event=event,
+        labor_requests__event=event,
         labor_requests__confirmed=True).distinct()
     sms_errors = []
     for worker in confirmed_workers:
@@ -505,26 +424,10 @@ def add_worker(request):
             worker = form.save(commit=False)
             worker.save()
             consent_body = f"This is {user.first_name} with {company.name_short}. Reply 'Yes.' to receive jobs through CallMan. Reply 'No.' or 'STOP' to opt out."
-            if settings.TWILIO_ENABLED == 'enabled':
-                client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-                try:
-                    client.messages.create(
-                        body=consent_body,
-                        from_=settings.TWILIO_PHONE_NUMBER,
-                        to=str(worker.phone_number)
-                    )
-                    worker.sent_consent_msg = True
-                    worker.save()
-                    log_sms(company)
-                    messages.success(request, f"Worker '{worker.name}' added and consent message sent.")
-                except TwilioRestException as e:
-                    messages.error(request, f"Failed to send consent message: {str(e)}")
-            else:
-                log_sms(company)
-                print(consent_body)
-                worker.sent_consent_msg = True
-                worker.save()
-                messages.success(request, f"Worker '{worker.name}' added (SMS disabled).")
+            enqueue_sms(consent_body, worker.phone_number, company, worker)
+            worker.sent_consent_msg = True
+            worker.save()
+            messages.success(request, f"Worker '{worker.name}' added and consent message sent.")
             return redirect('add_worker')  # Stay on the page for more entries
     else:
         form = WorkerForm()
@@ -559,19 +462,22 @@ def notifications(request):
             notification = get_object_or_404(Notifications, id=notification_id)
             notification.read = True
             notification.save()
-            push_notification(company)
+            push_notification(company, changed=[notification.id])
         if action == 'clear_read':
             read_notifications = notifications.filter(read=True)
+            deleted_ids = list(read_notifications.values_list('id', flat=True))
             read_notifications.delete()
-            push_notification(company)
+            push_notification(company, deleted=deleted_ids)
         if action == 'delete':
             notification_id = request.POST.get('notification_id')
             notification = get_object_or_404(Notifications, id=notification_id)
+            deleted_id = notification.id
             notification.delete()
-            push_notification(company)
+            push_notification(company, deleted=[deleted_id])
         if action == 'delete_all':
+            deleted_ids = list(notifications.values_list('id', flat=True))
             notifications.delete()
-            push_notification(company)
+            push_notification(company, deleted=deleted_ids)
     context = {'notifications': notifications}
     return render(request, 'callManager/notifications.html', context)
 
@@ -61,6 +61,7 @@ if os.environ.get('DJANGO_ENV') != 'production':
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'callManager.middleware.QueryBudgetMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -96,7 +97,7 @@ TEMPLATES = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -220,6 +221,23 @@ TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
 TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER')
 TWILIO_ENABLED = os.environ.get('TWILIO_ENABLED')
 
+# sms outbox settings (see the process_sms_outbox command)
+SMS_OUTBOX_RATE_LIMIT = float(os.environ.get('SMS_OUTBOX_RATE_LIMIT', '1'))  # messages per second
+SMS_OUTBOX_BATCH_SIZE = int(os.environ.get('SMS_OUTBOX_BATCH_SIZE', '50'))
+SMS_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('SMS_OUTBOX_MAX_ATTEMPTS', '5'))
+
+# seconds to coalesce notification and fill-status WebSocket pushes (0 pushes immediately)
+NOTIFICATION_PUSH_DELAY = float(os.environ.get('NOTIFICATION_PUSH_DELAY', '0.5'))
+
+# rendered QR codes (see callManager.utils.qr)
+QR_CACHE_DIR = os.environ.get('QR_CACHE_DIR', str(BASE_DIR / 'cache' / 'qr'))
+QR_CACHE_SIZE = int(os.environ.get('QR_CACHE_SIZE', '1024'))  # images kept in memory per process
+QR_CACHE_TTL = int(os.environ.get('QR_CACHE_TTL', '86400'))  # seconds, for images not tied to a token expiry
+
+# per-request query stats (see callManager.middleware.QueryBudgetMiddleware)
+QUERY_STATS_LOG = os.environ.get('QUERY_STATS_LOG', 'true' if os.environ.get('DJANGO_ENV') == 'production' else 'false') == 'true'
+QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT', 'false') == 'true'  # raise instead of logging; set in tests
+
 
 # login
 LOGIN_URL = '/login/'
@@ -446,6 +464,20 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Shared by every worker process: cached auth principals, time rules and station
+# state are invalidated here, so a per-process cache would let other workers serve
+# stale data. CACHE_URL=locmem:// is only for tests and single-process development.
+CACHE_URL = os.environ.get('CACHE_URL', 'redis://localhost:6379/1')
+if CACHE_URL.startswith('locmem://'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        },
+    }
+
 #else:
 #
 